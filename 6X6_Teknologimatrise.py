@@ -2,22 +2,22 @@
 
 #MATRIXSOLVER 4747474
 
-import numpy as np 
+from numerics.balance import BalanceNetwork
 
-#   𝑥01,  𝑥12,     𝑥20,    𝑥23,    𝑥30,     𝑥31
-A = np.array([
-[    1,    -1,     -1,       0,      0,      1,    0], #1
-[    0,     1,      0,      -1,     -1,      0,    0], #2
-[    0,     0,      1,       0,      1,     -1,   -1], #3
-[    0,     1,      0,       0,      0,      0,    0], #4
-[   -0.1,   0,      1,       0,      0,     -0.1,  0], #5
-[    0,    -0.9,    0,       0,      1,      0,    0], #6
-[    0,     0,  -0.15,       0,  -0.15,      1,    0], #7
-])
+#   𝑥01,  𝑥12,     𝑥20,    𝑥23,    𝑥30,     𝑥31,   𝑥3ut
+net = BalanceNetwork(["x01", "x12", "x20", "x23", "x30", "x31", "x3ut"])
+net.node("1", inlets=["x01", "x31"], outlets=["x12", "x20"])                  #1
+net.node("2", inlets=["x12"], outlets=["x23", "x30"])                         #2
+net.node("3", inlets=["x20", "x30"], outlets=["x31", "x3ut"])                 #3
+net.spec({"x12": 1}, rhs=95000, name="produksjon")                            #4
+net.spec({"x01": -0.1, "x20": 1, "x31": -0.1})                                #5
+net.spec({"x12": -0.9, "x30": 1})                                             #6
+net.spec({"x20": -0.15, "x30": -0.15, "x31": 1})                              #7
 
-y = np.array([[0], [0], [0], [95000], [0], [0], [0]])
+y = net.rhs()[:, None]
 
-x = np.linalg.inv(A)@y
+# Factor once, solve (also works for many production rates: net.rhs(produksjon=[...]))
+x = net.factor().solve(y)
 print("Svar: ")
 print("")
 print(x)
\ No newline at end of file
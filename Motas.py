@@ -1,242 +1,107 @@
-import csv
-from datetime import timedelta, datetime
-import kspice
+import argparse
+
+from simlog.catalog import Catalog
+from simlog.resultcache import ResultCache
+from simlog.scenarios import Scenario, SimulatorConfig, run_scenarios
+from simlog.steady import SteadyState
+from simlog.warmcache import WarmStateCache
 
 # -----------------------------------------------------------------------------
-# Module: Buffered Switch-Case Simulation
-# Description: Runs K-Spice simulations in sequential states, adjusting parameters
-#              between runs, and writes results to separate CSV files using a
-#              chunked buffer strategy to minimize data loss on failure.
+# Module: Buffered Scenario Simulation
+# Description: Runs K-Spice step experiments (settle, adjust one parameter,
+#              record the response) in parallel worker processes, and writes
+#              each to its own file using a chunked buffer strategy to
+#              minimize data loss on failure.
 # -----------------------------------------------------------------------------
 
-# --- CSV Buffering Helpers ---
-def _write_header_if_needed(filename, variables):
-    """
-    Write the CSV header if the file does not exist or is empty.
-
-    Params:
-        filename (str): Path to the CSV file.
-        variables (List[List[str, str]]): List of [name, unit] pairs for columns.
-    """
-    try:
-        with open(filename, 'r', newline='') as f:
-            # If file already has content, skip writing header
-            if f.read(1):
-                return
-    except FileNotFoundError:
-        # File does not exist -> will write header
-        pass
-
-    header = [['ModelTime', 's']] + variables
-    # Flatten header to "Name [unit]" format
-    header_flat = [f"{var[0]} [{var[1]}]" for var in header]
-    with open(filename, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(header_flat)
-
-
-def _flush_buffer(filename, buffer):
-    """
-    Append all rows in the buffer to the CSV file and clear the buffer.
-
-    Params:
-        filename (str): Path to the CSV file.
-        buffer (List[List[float]]): Rows to flush to disk.
-    """
-    with open(filename, 'a', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerows(buffer)
-    # Caller should clear buffer after flush
-
-
-def run_buffered_simulation(timeline, app, variables, minutes, chunk_size, filename):
-    """
-    Run a chunked simulation for a given duration, writing results in increments
-    to CSV to avoid data loss on errors or process termination.
-
-    Params:
-        timeline (kspice.Timeline): Active K-Spice timeline object.
-        app (str): Application name within the timeline.
-        variables (List[List[str, str]]): Variables to sample ([name, unit]).
-        minutes (int): Simulation duration in minutes.
-        chunk_size (int): Number of samples to buffer before writing.
-        filename (str): Output CSV file path.
-    """
-    total_seconds = minutes * 60
-    buffer = []
-
-    # Progress checkpoints at 25%, 50%, 75%, 100%
-    checkpoints = [
-        int(total_seconds * 0.25),
-        int(total_seconds * 0.50),
-        int(total_seconds * 0.75),
-        total_seconds
-    ]
-    next_cp = 0
-
-    # Ensure CSV header is present
-    _write_header_if_needed(filename, variables)
-    print(f"Starting {minutes}min simulation (chunk {chunk_size}) → {filename}")
-
-    try:
-        for sec in range(1, total_seconds + 1):
-            # Advance simulation by one second
-            timeline.run_for(timedelta(seconds=1))
-            # Sample variables and prepend model time
-            sample = timeline.get_values(app, variables)
-            sample.insert(0, timeline.model_time.total_seconds())
-            buffer.append(sample)
-
-            # Flush to disk if buffer is full
-            if len(buffer) >= chunk_size:
-                _flush_buffer(filename, buffer)
-                buffer.clear()
-
-            # Print progress at defined checkpoints
-            if next_cp < len(checkpoints) and sec == checkpoints[next_cp]:
-                print(f"  Progress {25 * (next_cp + 1)}%...")
-                next_cp += 1
-
-        # Final flush of any remaining rows
-        if buffer:
-            _flush_buffer(filename, buffer)
-            buffer.clear()
-
-        print(f"Completed {minutes}min simulation → data in {filename}")
-
-    except Exception as e:
-        # On error, flush what's left, log, then re-raise
-        if buffer:
-            _flush_buffer(filename, buffer)
-        print(f"[ERROR] Simulation failed: {e!r}")
-        print(f"Partial data flushed to {filename}")
-        raise
-
-
-# --- Parameter Adjustment Helper ---
-def adjust_parameter(timeline, app, parameter_name, multiplier):
-    """
-    Multiply a control parameter by a given factor and update the timeline.
-
-    Params:
-        timeline (kspice.Timeline): Active timeline object.
-        app (str): Application name.
-        parameter_name (str): Name of the parameter to adjust.
-        multiplier (float): Factor to multiply the current value by.
-    """
-    current = timeline.get_value(app, parameter_name)
-    new_val = current * multiplier
-    timeline.set_value(app, parameter_name, new_val)
-    print(f"Adjusted {parameter_name}: {current} → {new_val} ({multiplier*100:.1f}%)")
-
-
-# --- Filename Generator ---
-def generate_filename(project_name, state):
-    """
-    Create a filename with project name, state index, and timestamp.
-
-    Params:
-        project_name (str): Base name for the project.
-        state (int): Simulation state index.
-
-    Returns:
-        str: Generated filename.
-    """
-    ts = datetime.now().strftime("%d.%m.%Y_%H-%M")
-    return f"{project_name}_state{state}_{ts}.csv"
-
-
 # --- Main Simulation Flow ---
 if __name__ == "__main__":
-    # Initialize simulator
-    project_path = r"C:\K-Spice-Projects\Yggdrasil Hugin LATEST_Eryk_2"
-    sim = kspice.Simulator(project_path)
-    tl  = sim.activate_timeline("Yggdrasil_LCS")
-    tl.load("Yggdrasil", "Yggdrasil", "Yggdrasil_Steady_State_Manual_Mode")
-    tl.initialize()
-    tl.set_speed(2.0)
-
-    # Application names
-    app0 = tl.applications[0].name  # Hugin A
-    app1 = tl.applications[1].name  # Hugin B
+    parser = argparse.ArgumentParser(description="Run the Yggdrasil step-experiment sweep.")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue interrupted states from their manifests, skip completed ones")
+    parser.add_argument("--metrics", action="store_true",
+                        help="write step/flush timings and real-time factor to <output>.metrics.jsonl")
+    parser.add_argument("--until-steady", action="store_true",
+                        help="end warmups and responses once all variables are steady "
+                             "(scenario minutes become the upper limit)")
+    parser.add_argument("--force", action="store_true",
+                        help="simulate every state even if an identical run is in the result cache")
+    args = parser.parse_args()
+
+    # Simulator and initial condition; every worker process loads these itself
+    config = SimulatorConfig(
+        project_path=r"C:\K-Spice-Projects\Yggdrasil Hugin LATEST_Eryk_2",
+        timeline="Yggdrasil_LCS",
+        model_file="Yggdrasil",
+        parameter_file="Yggdrasil",
+        values_file="Yggdrasil_Steady_State_Manual_Mode",
+        speed=2.0,
+    )
 
     # Variables to sample: [name, unit]
-    variables = [
+    hugin_variables = [
         ["D-13HCV2627:TargetPosition","%"],
         # ... rest of your variable list ...
         ["D-13PT2122:MeasuredValue","barg"],
     ]
 
-    project_name = "Yggdrasil"
-    chunk_size   = 500
-    state        = 0
-
-    print("=== Starting buffered switch-case simulation ===")
-
-    # Loop through states as experiments
-    while True:
-        try:
-            match state:
-                case 0:
-                    # State 0: 2min, adjust valve, 180min
-                    filename = generate_filename(project_name, state)
-                    print("\n--- STATE 0 ---")
-                    run_buffered_simulation(tl, app1, variables, 2,   chunk_size, filename)
-                    adjust_parameter(tl, app1, "G-13HCV0505:TargetPosition", 1.1)
-                    run_buffered_simulation(tl, app1, variables, 180, chunk_size, filename)
-                    state = 1
-
-                case 1:
-                    filename = generate_filename(project_name, state)
-                    print("\n--- STATE 1 ---")
-                    tl.load("Yggdrasil", "Yggdrasil", "Yggdrasil_Steady_State_Manual_Mode")
-                    tl.initialize()
-                    run_buffered_simulation(tl, app0, variables, 60,  chunk_size, filename)
-                    adjust_parameter(tl, app0, "D-27PIC0101:InternalSetpoint", 1.1)
-                    run_buffered_simulation(tl, app0, variables, 180, chunk_size, filename)
-                    state = 2
-
-                case 2:
-                    filename = generate_filename(project_name, state)
-                    print("\n--- STATE 2 ---")
-                    tl.load("Yggdrasil", "Yggdrasil", "Yggdrasil_Steady_State_Manual_Mode")
-                    tl.initialize()
-                    run_buffered_simulation(tl, app0, variables, 60,  chunk_size, filename)
-                    adjust_parameter(tl, app0, "D-27TIC0106:InternalSetpoint", 1.1)
-                    run_buffered_simulation(tl, app0, variables, 180, chunk_size, filename)
-                    state = 3
-
-                case 3:
-                    filename = generate_filename(project_name, state)
-                    print("\n--- STATE 3 ---")
-                    tl.load("Yggdrasil", "Yggdrasil", "Yggdrasil_Steady_State_Manual_Mode")
-                    tl.initialize()
-                    run_buffered_simulation(tl, app0, variables, 60,  chunk_size, filename)
-                    adjust_parameter(tl, app0, "D-24PIC0002:InternalSetpoint", 1.1)
-                    run_buffered_simulation(tl, app0, variables, 180, chunk_size, filename)
-                    state = 4
-
-                case 4:
-                    filename = generate_filename(project_name, state)
-                    print("\n--- STATE 4 ---")
-                    tl.load("Yggdrasil", "Yggdrasil", "Yggdrasil_Steady_State_Manual_Mode")
-                    tl.initialize()
-                    run_buffered_simulation(tl, app0, variables, 60,  chunk_size, filename)
-                    adjust_parameter(tl, app0, "D-26PIC0056:InternalSetpoint", 1.1)
-                    run_buffered_simulation(tl, app0, variables, 180, chunk_size, filename)
-                    state = 5
-
-                case 5:
-                    filename = generate_filename(project_name, state)
-                    print("\n--- STATE 5 ---")
-                    tl.load("Yggdrasil", "Yggdrasil", "Yggdrasil_Steady_State_Manual_Mode")
-                    tl.initialize()
-                    run_buffered_simulation(tl, app0, variables, 60,  chunk_size, filename)
-                    adjust_parameter(tl, app0, "D-20PIC0304:InternalSetpoint", 0.9)
-                    run_buffered_simulation(tl, app0, variables, 180, chunk_size, filename)
-                    print("\n=== Simulation complete! ===")
-                    break
+    # Both applications are recorded in one pass on a shared ModelTime, so
+    # every state logs plant-wide data. Keys are application indices as in
+    # Scenario.app; columns are named "<application name>/<variable>", and
+    # the catalog still finds them by tag or "Tag:Attribute".
+    variables = {
+        0: hugin_variables,
+        1: hugin_variables,
+    }
+
+    # Experiments: app 0 = Hugin A, app 1 = Hugin B (the stepped application)
+    #           state app warmup  parameter                         multiplier  run
+    scenarios = [
+        Scenario(0,   1,  2,      "G-13HCV0505:TargetPosition",     1.1,        180),
+        Scenario(1,   0,  60,     "D-27PIC0101:InternalSetpoint",   1.1,        180),
+        Scenario(2,   0,  60,     "D-27TIC0106:InternalSetpoint",   1.1,        180),
+        Scenario(3,   0,  60,     "D-24PIC0002:InternalSetpoint",   1.1,        180),
+        Scenario(4,   0,  60,     "D-26PIC0056:InternalSetpoint",   1.1,        180),
+        Scenario(5,   0,  60,     "D-20PIC0304:InternalSetpoint",   0.9,        180),
+    ]
 
-        except Exception as e:
-            print(f"[FATAL] Interrupted in state {state}: {e!r}")
-            break
+    project_name   = "Yggdrasil"
+    chunk_size     = 500
+    output_backend = "csv-async"  # "csv", "csv-async", "memmap" or "parquet"
+    workers        = 3            # simulator instances running in parallel
+
+    # Settled warmup states are simulated once, saved by the timeline as an
+    # initial condition and loaded for each scenario. Only if the timeline
+    # cannot save initial conditions are these variables written back
+    # instead; the logged signals are not enough (many are computed outputs),
+    # so list the plant states: holdups, levels, controller integrators and
+    # setpoints. Left empty, such a timeline runs every warmup in full.
+    warm_cache      = WarmStateCache(".warm_cache")
+    state_variables = []
+
+    # Steady-state detection: at least 10 min per phase, steady for 5 min,
+    # trend and noise within 0.1% of each value
+    steady = SteadyState(min_minutes=10, hold_s=300, rtol=1e-3) if args.until_steady else None
+
+    # Completed outputs keyed by every input; unchanged states are copied, not
+    # simulated. Add the model files to config.source_files so edits to them
+    # invalidate the cached results.
+    result_cache = ResultCache(".result_cache", max_bytes=20 * 1024**3)
+
+    # Finished runs are indexed for `python -m simlog.catalog --db Yggdrasil_runs.sqlite ...`
+    catalog = Catalog(f"{project_name}_runs.sqlite")
+
+    print("=== Starting scenario sweep ===")
+    results, failures = run_scenarios(scenarios, config, variables, project_name,
+                                      workers=workers, chunk_size=chunk_size,
+                                      backend=output_backend, warm_cache=warm_cache,
+                                      state_variables=state_variables, resume=args.resume,
+                                      metrics=args.metrics, steady=steady, catalog=catalog,
+                                      result_cache=result_cache, force=args.force)
+    catalog.close()
+    for result in results:
+        print(f"{result['scenario']}: {result['filename']} ({result['wall_s']:.0f}s)")
+    for name, e in failures.items():
+        print(f"[FATAL] Interrupted in {name}: {e!r}")
+    if not failures:
+        print("\n=== Simulation complete! ===")
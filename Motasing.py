@@ -1,7 +1,14 @@
+import argparse
+import os
 import re
 import sys
 import pandas as pd
 
+from simlog.columnar import read_output
+from simlog.derived import derived_filename, process_directory, process_file
+from simlog.pyramid import build_pyramid
+from simlog.schema import split_column
+
 # =========================================
 # Input and output file names
 # =========================================
@@ -28,102 +35,132 @@ def extract_unit_from_colname(col_name: str):
     - ' unit' at end
     Returns unit in lowercase without brackets, or None if not found.
     """
-    patterns = [
-        r"\[(?P<u>[^\]]+)\]",   # [bar]
-        r"\((?P<u>[^)]+)\)",    # (kPa)
-        r"\b(?P<u>(?:mbar|kpa|mpa|psi|bar|pa))\b"  # token in name
-    ]
-    name = col_name.lower()
-    for pat in patterns:
-        m = re.search(pat, name)
-        if m:
-            return m.group("u").strip().lower()
-    return None
+    unit = split_column(col_name)[1]
+    return unit.lower() if unit else None
 
 ###################################################################################################################################################################################################################
 ################################################################################################ Processing #######################################################################################################
 ###################################################################################################################################################################################################################
 
-# Read CSV
-try:
-    df = pd.read_csv(input_file)
-except FileNotFoundError:
-    print(f"Error: File '{input_file}' not found.")
-    sys.exit(1)
-except Exception as e:
-    print(f"Error reading file: {e}")
-    sys.exit(1)
-
-# List columns
-print("Available columns:")
-for i, col in enumerate(df.columns):
-    print(f"  {i}: {col}")
-
-# Get indices
-user_input = input("\nEnter TWO column indices for Δp (first - second): ")
-try:
-    idx_first, idx_second = parse_two_indices(user_input)
-except Exception as e:
-    print(f"Invalid input: {e}")
-    sys.exit(1)
-
-# Validate
-ncols = len(df.columns)
-for idx in (idx_first, idx_second):
-    if idx < 0 or idx >= ncols:
-        print(f"Index {idx} is out of range (0–{ncols-1}).")
+def interactive_dp(input_file, output_file):
+    """Prompt for two columns and add their difference (Δp) as a new column."""
+    # Read simulation output (CSV, .f64 memmap or .parquet)
+    try:
+        df = read_output(input_file)
+    except FileNotFoundError:
+        print(f"Error: File '{input_file}' not found.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        sys.exit(1)
+
+    # List columns
+    print("Available columns:")
+    for i, col in enumerate(df.columns):
+        print(f"  {i}: {col}")
+
+    # Get indices
+    user_input = input("\nEnter TWO column indices for Δp (first - second): ")
+    try:
+        idx_first, idx_second = parse_two_indices(user_input)
+    except Exception as e:
+        print(f"Invalid input: {e}")
+        sys.exit(1)
+
+    # Validate
+    ncols = len(df.columns)
+    for idx in (idx_first, idx_second):
+        if idx < 0 or idx >= ncols:
+            print(f"Index {idx} is out of range (0–{ncols-1}).")
+            sys.exit(1)
+
+    col_first = df.columns[idx_first]
+    col_second = df.columns[idx_second]
+
+    print("\nSelected columns:")
+    print(f"  first  = {idx_first} ({col_first})")
+    print(f"  second = {idx_second} ({col_second})")
+
+    # Extract units from column names
+    unit_first = extract_unit_from_colname(col_first)
+    unit_second = extract_unit_from_colname(col_second)
+
+    print("\nDetected units:")
+    print(f"  {col_first} → {unit_first or 'UNKNOWN'}")
+    print(f"  {col_second} → {unit_second or 'UNKNOWN'}")
+
+    # Check match
+    if not unit_first or not unit_second:
+        print("\nERROR: Could not detect unit for one or both columns. Make sure units are in column names.")
+        sys.exit(1)
+
+    if unit_first != unit_second:
+        print("\nERROR: Units do not match between the two columns. Try again with matching units.")
+        sys.exit(1)
+
+    # Name for new column
+    new_column_name = input("\nEnter the name of the new Δp column: ").strip()
+    if not new_column_name:
+        new_column_name = "DP"
+
+    header_dp = f"{new_column_name} [{unit_first}]"
+
+    # Compute Δp row-wise
+    try:
+        s_first  = pd.to_numeric(df[col_first], errors="coerce")
+        s_second = pd.to_numeric(df[col_second], errors="coerce")
+    except Exception as e:
+        print(f"Error: Non-numeric data encountered. {e}")
+        sys.exit(1)
+
+    df[header_dp] = s_first - s_second
+
+    # Save
+    try:
+        df.to_csv(output_file, index=False)
+        print(f"\nFile saved successfully as: {output_file}")
+    except Exception as e:
+        print(f"Error saving file: {e}")
         sys.exit(1)
 
-col_first = df.columns[idx_first]
-col_second = df.columns[idx_second]
-
-print("\nSelected columns:")
-print(f"  first  = {idx_first} ({col_first})")
-print(f"  second = {idx_second} ({col_second})")
-
-# Extract units from column names
-unit_first = extract_unit_from_colname(col_first)
-unit_second = extract_unit_from_colname(col_second)
-
-print("\nDetected units:")
-print(f"  {col_first} → {unit_first or 'UNKNOWN'}")
-print(f"  {col_second} → {unit_second or 'UNKNOWN'}")
-
-# Check match
-if not unit_first or not unit_second:
-    print("\nERROR: Could not detect unit for one or both columns. Make sure units are in column names.")
-    sys.exit(1)
-
-if unit_first != unit_second:
-    print("\nERROR: Units do not match between the two columns. Try again with matching units.")
-    sys.exit(1)
-
-# Name for new column
-new_column_name = input("\nEnter the name of the new Δp column: ").strip()
-if not new_column_name:
-    new_column_name = "DP"
-
-header_dp = f"{new_column_name} [{unit_first}]"
-
-# Compute Δp row-wise
-try:
-    s_first  = pd.to_numeric(df[col_first], errors="coerce")
-    s_second = pd.to_numeric(df[col_second], errors="coerce")
-except Exception as e:
-    print(f"Error: Non-numeric data encountered. {e}")
-    sys.exit(1)
-
-df[header_dp] = s_first - s_second
-
-# Save
-try:
-    df.to_csv(output_file, index=False)
-    print(f"\nFile saved successfully as: {output_file}")
-except Exception as e:
-    print(f"Error saving file: {e}")
-    sys.exit(1)
-
-# Show final headers
-print("Updated column headers:")
-for col in df.columns:
-    print(" ", col)
+    # Show final headers
+    print("Updated column headers:")
+    for col in df.columns:
+        print(" ", col)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Add derived columns to simulator result files. Without --spec, "
+                    "asks interactively for one Δp column.")
+    parser.add_argument("paths", nargs="*", help="result files or directories (default: input_file)")
+    parser.add_argument("--spec", help="spec file of derived columns (see simlog/derived.py)")
+    parser.add_argument("--out-dir", help="write results here instead of next to the inputs")
+    parser.add_argument("--workers", type=int, default=None, help="processes for directories")
+    parser.add_argument("--chunk-rows", type=int, default=None,
+                        help="stream CSV inputs in chunks of this many rows (bounded memory)")
+    parser.add_argument("--pyramid", action="store_true",
+                        help="also build the min/max/mean plot pyramid of each output (see simlog/pyramid.py)")
+    args = parser.parse_args()
+
+    if not args.spec:
+        interactive_dp(args.paths[0] if args.paths else input_file,
+                       output_file if not args.paths else derived_filename(args.paths[0], args.out_dir))
+        return
+
+    for path in args.paths or [input_file]:
+        if os.path.isdir(path):
+            outputs = process_directory(path, args.spec, args.out_dir, workers=args.workers,
+                                        chunk_rows=args.chunk_rows)
+        else:
+            if args.out_dir:
+                os.makedirs(args.out_dir, exist_ok=True)
+            outputs = [process_file(path, args.spec, derived_filename(path, args.out_dir), args.chunk_rows)]
+        for out in outputs:
+            print(f"File saved successfully as: {out}")
+            if args.pyramid:
+                print(f"Plot pyramid written to: {build_pyramid(out)}")
+
+
+if __name__ == "__main__":
+    main()
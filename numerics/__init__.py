@@ -0,0 +1,6 @@
+"""
+Numerical routines grown out of the course assignments (linear systems,
+elimination, quadrature, differentiation, ODE integration, root finding, the
+temperature data files), written to be imported by the analysis scripts
+instead of copied between notebooks.
+"""
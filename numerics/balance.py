@@ -0,0 +1,234 @@
+import time
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Module: Mass-Balance Solver
+# Description: Builds the linear system A x = y of a flow network from a
+#              declarative description (streams, node balances and linear
+#              specifications such as split fractions or fixed rates),
+#              factors A once and reuses the factorization for any number
+#              of right-hand sides. Small networks use a dense LU
+#              factorization, large ones a sparse LU (scipy.sparse), instead
+#              of forming the explicit inverse with np.linalg.inv.
+# -----------------------------------------------------------------------------
+
+# Networks up to this many streams are factored densely by default
+DENSE_LIMIT = 200
+
+
+class BalanceNetwork:
+    """
+    Linear mass-balance equations over a set of streams.
+
+    Each equation is a row of A; its right-hand side is named so batches of
+    production rates can be given per equation (see rhs()).
+
+    Params:
+        streams (Iterable[str]): Stream names, one unknown each, in column order.
+    """
+
+    def __init__(self, streams):
+        self.streams = list(streams)
+        self.columns = {name: i for i, name in enumerate(self.streams)}
+        if len(self.columns) != len(self.streams):
+            raise ValueError("Stream names must be unique")
+        self.equations = []   # (name, {column: coefficient}, rhs)
+
+    def node(self, name, inlets=(), outlets=(), rhs=0.0):
+        """Conservation at a node: sum(inlets) - sum(outlets) = rhs."""
+        coefficients = {}
+        for stream in inlets:
+            coefficients[stream] = coefficients.get(stream, 0.0) + 1.0
+        for stream in outlets:
+            coefficients[stream] = coefficients.get(stream, 0.0) - 1.0
+        return self.spec(coefficients, rhs, name)
+
+    def spec(self, coefficients, rhs=0.0, name=None):
+        """
+        Any linear relation sum(coefficient * stream) = rhs, e.g. a split
+        fraction {"x20": 1, "x01": -0.1} or a fixed rate {"x12": 1}.
+        """
+        row = {}
+        for stream, coefficient in coefficients.items():
+            if stream not in self.columns:
+                raise KeyError(f"Unknown stream {stream!r}")
+            row[self.columns[stream]] = float(coefficient)
+        self.equations.append((name or f"eq{len(self.equations)}", row, float(rhs)))
+        return self
+
+    @property
+    def shape(self):
+        return len(self.equations), len(self.streams)
+
+    def matrix(self, sparse=False):
+        """
+        Coefficient matrix A.
+
+        Params:
+            sparse (bool): Return a scipy.sparse CSC matrix instead of an ndarray.
+        """
+        rows, cols, data = [], [], []
+        for i, (_, row, _) in enumerate(self.equations):
+            rows.extend([i] * len(row))
+            cols.extend(row.keys())
+            data.extend(row.values())
+        if sparse:
+            from scipy import sparse as sp
+
+            return sp.csc_matrix((data, (rows, cols)), shape=self.shape)
+        A = np.zeros(self.shape)
+        np.add.at(A, (rows, cols), data)
+        return A
+
+    def rhs(self, **values):
+        """
+        Right-hand side(s) y.
+
+        Params:
+            **values: Equation name -> value or 1-D array of values; arrays
+                give one column of y per entry (all of the same length).
+
+        Returns:
+            np.ndarray: (n,) vector, or (n, k) for k right-hand sides.
+        """
+        names = [name for name, _, _ in self.equations]
+        unknown = set(values) - set(names)
+        if unknown:
+            raise KeyError(f"Unknown equations: {sorted(unknown)}")
+        k = max((np.size(v) for v in values.values() if np.ndim(v)), default=None)
+        y = np.empty(len(names) if k is None else (len(names), k))
+        for i, (name, _, default) in enumerate(self.equations):
+            y[i] = values.get(name, default)
+        return y
+
+    def factor(self, method="auto"):
+        """Factor A once; see BalanceSolver."""
+        if self.shape[0] != self.shape[1]:
+            raise ValueError(f"Network has {self.shape[0]} equations for {self.shape[1]} streams")
+        if method == "auto":
+            method = "dense" if len(self.streams) <= DENSE_LIMIT else "sparse"
+        return BalanceSolver(self.matrix(sparse=method == "sparse"), method, self.streams)
+
+    def solve(self, y=None, method="auto"):
+        """Factor and solve in one go (y defaults to the equations' rhs)."""
+        return self.factor(method).solve(self.rhs() if y is None else y)
+
+
+class BalanceSolver:
+    """
+    LU factorization of a square A, reused for every solve.
+
+    Params:
+        A (np.ndarray | scipy.sparse matrix): Coefficient matrix.
+        method (str): "dense" (LAPACK getrf via scipy.linalg, np.linalg.solve
+            without scipy) or "sparse" (SuperLU via scipy.sparse.linalg).
+        streams (List[str] | None): Stream names, for as_dict().
+    """
+
+    def __init__(self, A, method="dense", streams=None):
+        self.method = method
+        self.streams = streams
+        if method == "sparse":
+            from scipy.sparse.linalg import splu
+
+            self._lu = splu(A.tocsc() if hasattr(A, "tocsc") else A)
+        elif method == "dense":
+            A = A.toarray() if hasattr(A, "toarray") else np.asarray(A, dtype=np.float64)
+            try:
+                from scipy.linalg import lu_factor
+            except ImportError:
+                # No reusable factorization without scipy; each solve refactors
+                self._lu = None
+                self._A = A
+            else:
+                self._lu = lu_factor(A, check_finite=False)
+                if np.any(np.diag(self._lu[0]) == 0):
+                    raise np.linalg.LinAlgError("Singular balance matrix")
+        else:
+            raise ValueError(f"Unknown method {method!r}, expected 'dense' or 'sparse'")
+
+    def solve(self, y):
+        """
+        Solve A x = y for one or many right-hand sides in one call.
+
+        Params:
+            y (array-like): (n,) vector or (n, k) matrix of right-hand sides.
+
+        Returns:
+            np.ndarray: x with the same shape as y.
+        """
+        y = np.asarray(y, dtype=np.float64)
+        if self.method == "sparse":
+            return self._lu.solve(y)
+        if self._lu is None:
+            return np.linalg.solve(self._A, y)
+        from scipy.linalg import lu_solve
+
+        return lu_solve(self._lu, y, check_finite=False)
+
+    def as_dict(self, x):
+        """{stream: flow} for a single solution vector."""
+        return dict(zip(self.streams, np.asarray(x).tolist()))
+
+
+# --- Benchmark ---
+def random_network(n, fanout=3, seed=0):
+    """
+    Plant-like test network: every stream is fed by a few others through
+    split fractions (x_i - sum f_ij x_j = feed_i, sum_j f_ij < 1), which
+    keeps A sparse and non-singular.
+    """
+    rng = np.random.default_rng(seed)
+    net = BalanceNetwork([f"x{i}" for i in range(n)])
+    for i in range(n):
+        sources = rng.choice(n - 1, size=min(fanout, n - 1), replace=False)
+        sources[sources >= i] += 1
+        fractions = rng.dirichlet(np.ones(len(sources))) * 0.9
+        coefficients = {f"x{j}": -f for j, f in zip(sources, fractions)}
+        coefficients[f"x{i}"] = 1.0
+        net.spec(coefficients, rhs=rng.random(), name=f"feed{i}")
+    return net
+
+
+def benchmark_balance(sizes=(7, 50, 200, 1000, 3000), n_rhs=100):
+    """
+    Solve n_rhs right-hand sides with np.linalg.inv(A) @ y (as in
+    6X6_Teknologimatrise.py) and with the factored solvers.
+
+    Returns:
+        List[dict]: Wall time per method and network size.
+    """
+    # Import scipy before timing anything
+    random_network(5).factor("dense")
+    random_network(5).factor("sparse")
+    results = []
+    for n in sizes:
+        net = random_network(n)
+        Y = np.random.default_rng(1).random((n, n_rhs))
+        A = net.matrix()
+        methods = {
+            "inv": lambda: np.linalg.inv(A) @ Y,
+            "dense-lu": lambda: net.factor("dense").solve(Y),
+            "sparse-lu": lambda: net.factor("sparse").solve(Y),
+        }
+        reference = None
+        for name, run in methods.items():
+            start = time.perf_counter()
+            x = run()
+            wall = time.perf_counter() - start
+            if reference is None:
+                reference = x
+            results.append({
+                "n": n,
+                "method": name,
+                "wall_s": wall,
+                "max_diff": float(np.max(np.abs(x - reference))),
+            })
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'n':>6} {'method':>10} {'wall [ms]':>10} {'max |dx|':>10}")
+    for r in benchmark_balance():
+        print(f"{r['n']:>6} {r['method']:>10} {r['wall_s'] * 1e3:>10.2f} {r['max_diff']:>10.1e}")
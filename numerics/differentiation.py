@@ -0,0 +1,345 @@
+import math
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from numerics.quadrature import TIME_UNITS
+
+# -----------------------------------------------------------------------------
+# Module: Differentiation
+# Description: Finite differences from the Assignment1 numerical derivatives
+#              notebook, which evaluates sin(x) and sin(x+h) one float at a
+#              time, generalised to forward, backward and central stencils of
+#              any order over whole arrays. For sampled data (e.g. d(level)/dt
+#              of a logged column against ModelTime) every row gets a window
+#              of neighbouring samples, shifted one-sided at the ends, and
+#              weights from a local polynomial fit: an exact fit is the usual
+#              finite-difference stencil, a least-squares fit over a longer
+#              window is Savitzky-Golay smoothing. Uniform spacing uses one
+#              set of weights as a correlation; for non-uniform spacing the
+#              weights of all rows come from array operations over the batch
+#              (Fornberg's recursion for stencils, power sums for the
+#              least-squares fit), in blocks of rows. No Python loop runs
+#              per sample.
+# -----------------------------------------------------------------------------
+
+METHODS = ("forward", "backward", "central")
+
+# Window elements per block of rows when weights are fitted per row
+CHUNK_ELEMENTS = 1 << 16
+
+
+# --- Stencils ---
+def stencil_size(deriv=1, method="central", order=2):
+    """
+    Number of points of a stencil for the deriv-th derivative with truncation
+    error O(h**order); central stencils need an even order.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+    if deriv < 1 or order < 1:
+        raise ValueError("deriv and order must be at least 1")
+    if method == "central":
+        if order % 2:
+            raise ValueError("Central stencils need an even order")
+        return 2 * ((deriv + 1) // 2) - 1 + order
+    return deriv + order
+
+
+def stencil_offsets(m, method="central"):
+    """Offsets (in steps) of an m-point stencil: 0..m-1, -(m-1)..0 or centred."""
+    left = {"forward": 0, "backward": m - 1, "central": (m - 1) // 2}[method]
+    return np.arange(m) - left
+
+
+def _fornberg(u, deriv):
+    """
+    Interpolating stencil weights by Fornberg's recursion ("Generation of
+    finite difference formulas on arbitrarily spaced grids", 1988), with
+    every step an array operation over the batch of stencils in u (..., m).
+    """
+    m = u.shape[-1]
+    u = np.moveaxis(u, -1, 0)
+    c = np.zeros((m, deriv + 1) + u.shape[1:])
+    c[0, 0] = 1.0
+    c1 = 1.0
+    for i in range(1, m):
+        c2 = 1.0
+        for j in range(i):
+            c3 = u[i] - u[j]
+            c2 = c2 * c3
+            if j == i - 1:
+                for k in range(min(i, deriv), 0, -1):
+                    c[i, k] = c1 * (k * c[i - 1, k - 1] - u[i - 1] * c[i - 1, k]) / c2
+                c[i, 0] = -c1 * u[i - 1] * c[i - 1, 0] / c2
+            for k in range(min(i, deriv), 0, -1):
+                c[j, k] = (u[i] * c[j, k] - k * c[j, k - 1]) / c3
+            c[j, 0] = u[i] * c[j, 0] / c3
+        c1 = c2
+    return np.moveaxis(c[:, deriv], 0, -1)
+
+
+def stencil_weights(offsets, deriv=1, degree=None):
+    """
+    Weights w such that f^(deriv)(0) is approximately sum(w * f(offsets)).
+
+    The weights differentiate the polynomial of the given degree fitted to
+    the points: with degree = m - 1 the fit interpolates and w is the
+    finite-difference stencil, with a lower degree it is a least-squares
+    (Savitzky-Golay) fit.
+
+    Params:
+        offsets (array-like): (..., m) sample positions relative to the point
+            of evaluation; leading dimensions are solved as a batch.
+        deriv (int): Order of the derivative.
+        degree (int | None): Polynomial degree (default m - 1).
+
+    Returns:
+        np.ndarray: (..., m) weights.
+    """
+    offsets = np.asarray(offsets, dtype=np.float64)
+    m = offsets.shape[-1]
+    degree = m - 1 if degree is None else degree
+    if not deriv <= degree < m:
+        raise ValueError(f"Need deriv <= degree < points, got deriv={deriv}, degree={degree}, points={m}")
+    # Scale the offsets to about [-1, 1] to keep the systems well conditioned
+    scale = np.abs(offsets).max(axis=-1, keepdims=True)
+    u = offsets / scale
+    if degree == m - 1:
+        return _fornberg(u, deriv) / scale ** deriv
+
+    # Least squares: w = V (V^T V)^-1 e. V^T V only holds the power sums
+    # sum(u**k), k <= 2 * degree, so long windows never build V itself.
+    sums = np.empty(offsets.shape[:-1] + (2 * degree + 1,))
+    power = np.ones_like(u)
+    for k in range(2 * degree + 1):
+        sums[..., k] = power.sum(axis=-1)
+        power *= u
+    e = np.zeros(offsets.shape[:-1] + (degree + 1, 1))
+    e[..., deriv, 0] = math.factorial(deriv)
+    k = np.arange(degree + 1)
+    z = np.linalg.solve(sums[..., k[:, None] + k], e)[..., 0]
+    # w_j = sum_k z_k u_j**k by Horner's rule
+    w = np.broadcast_to(z[..., degree:], u.shape).copy()
+    for k in range(degree - 1, -1, -1):
+        w *= u
+        w += z[..., k:k + 1]
+    return w / scale ** deriv
+
+
+# --- Functions ---
+def optimal_step(x, deriv=1, method="central", order=2):
+    """
+    Step that balances truncation error O(h**order) against rounding error
+    O(eps / h**deriv): h = eps**(1 / (order + deriv)) * max(|x|, 1), rounded
+    so that x + h is exactly representable.
+
+    Forward differences of order 1 get the familiar sqrt(eps) ~ 1.5e-8,
+    central differences of order 2 eps**(1/3) ~ 6e-6; the notebook's fixed
+    h = 0.001 is far from either.
+
+    Returns:
+        np.ndarray: Step per x.
+    """
+    stencil_size(deriv, method, order)  # validates the arguments
+    x = np.asarray(x, dtype=np.float64)
+    h = np.finfo(np.float64).eps ** (1 / (order + deriv)) * np.maximum(np.abs(x), 1.0)
+    return (x + h) - x
+
+
+def derivative(f, x, h=None, deriv=1, method="central", order=2):
+    """
+    Finite-difference derivative of a vectorized function at many points.
+
+    f is called once, on an (..., m) array holding every stencil point of
+    every x, so it must broadcast (NumPy ufuncs such as np.sin do).
+
+    Params:
+        f (Callable[[np.ndarray], np.ndarray]): Vectorized function.
+        x (array-like): Points of evaluation.
+        h (float | array-like | None): Step (default optimal_step).
+        deriv (int): Order of the derivative.
+        method (str): "forward", "backward" or "central".
+        order (int): Order of accuracy of the stencil.
+
+    Returns:
+        np.ndarray: Derivative at each x.
+    """
+    m = stencil_size(deriv, method, order)
+    offsets = stencil_offsets(m, method)
+    w = stencil_weights(offsets, deriv)
+    x = np.asarray(x, dtype=np.float64)
+    h = optimal_step(x, deriv, method, order) if h is None else np.broadcast_to(np.asarray(h, np.float64), x.shape)
+    values = np.asarray(f(x[..., None] + h[..., None] * offsets), dtype=np.float64)
+    return values @ w / h ** deriv
+
+
+# --- Sampled data ---
+def _window_starts(n, m, left):
+    """First sample of each row's window: centred on the row, shifted inwards at the ends."""
+    if n < m:
+        raise ValueError(f"Need at least {m} samples, got {n}")
+    return np.clip(np.arange(n) - left, 0, n - m)
+
+
+def differentiate_samples(y, x=None, dx=1.0, deriv=1, method="central", order=2, smooth=None, degree=2):
+    """
+    Derivative of sampled values, e.g. a logged column against model time.
+
+    Each row uses the stencil of the method around it; rows too close to an
+    end use a window of the same length shifted inwards (one-sided), so the
+    output has the length of the input. Non-uniform x gets weights fitted to
+    the actual sample positions.
+
+    Params:
+        y (array-like): (n,) samples, or (n, k) for k columns at once.
+        x (array-like | None): (n,) strictly increasing sample positions; if
+            None the samples are dx apart.
+        dx (float): Spacing when x is None.
+        deriv (int): Order of the derivative.
+        method (str): "forward", "backward" or "central".
+        order (int): Order of accuracy of the stencil.
+        smooth (int | None): Savitzky-Golay window in samples: fit a
+            polynomial of the given degree to this many samples instead of
+            interpolating the stencil (noise-robust rates).
+        degree (int): Polynomial degree with smooth.
+
+    Returns:
+        np.ndarray: Derivative with the shape of y.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if smooth is None:
+        m, degree = stencil_size(deriv, method, order), None
+    else:
+        if method not in METHODS:
+            raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+        m = smooth
+    left = -stencil_offsets(m, method)[0]
+    starts = _window_starts(n, m, left)
+    position = np.arange(n) - starts             # row's index inside its window
+    windows = sliding_window_view(y, m, axis=0)  # (n - m + 1, [k,] m), no copy
+
+    if x is not None:
+        x = np.asarray(x, dtype=np.float64)
+        steps = np.diff(x)
+        if len(x) != n:
+            raise ValueError(f"x has {len(x)} samples, y has {n}")
+        if not (steps > 0).all():
+            raise ValueError("Sample positions must be strictly increasing")
+        if np.allclose(steps, steps[0], rtol=1e-9, atol=0):
+            x, dx = None, (x[-1] - x[0]) / (n - 1)
+
+    if x is None:
+        # One weight set per position in the window; interior rows share one
+        W = stencil_weights(np.arange(m)[None, :] - np.arange(m)[:, None], deriv, degree) / dx ** deriv
+        out = np.empty_like(y)
+        out[left:n - m + 1 + left] = windows @ W[left]
+        edges = np.r_[0:left, n - m + 1 + left:n]
+        out[edges] = np.einsum("i...m,im->i...", windows[starts[edges]], W[position[edges]])
+        return out
+
+    # Weights per row, in blocks of rows so long smoothing windows stay in cache
+    out = np.empty_like(y)
+    x_windows = sliding_window_view(x, m)
+    block = max(1, CHUNK_ELEMENTS // m)
+    for lo in range(0, n, block):
+        rows = slice(lo, lo + block)
+        W = stencil_weights(x_windows[starts[rows]] - x[rows, None], deriv, degree)
+        out[rows] = np.einsum("i...m,im->i...", windows[starts[rows]], W)
+    return out
+
+
+def differentiate_column(filename, column, time_column="ModelTime", per=None, **kwargs):
+    """
+    Rate of change of a logged column, e.g. a level in m as m/s or a
+    pressure ramp in barg/min.
+
+    Params:
+        filename (str): .csv, .f64 or .parquet simulation output.
+        column (str): Column base name ("Tag:Attribute") or full header.
+        time_column (str): Base name of the time column.
+        per (str | None): Time unit of the result ("s", "min", "h", "d");
+            default the time column's unit.
+        **kwargs: Passed to differentiate_samples (method, order, smooth, ...).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, str]: Model time, derivative and its unit.
+    """
+    from simlog.columnar import read_output
+    from simlog.schema import HeaderSchema
+
+    df = read_output(filename)
+    schema = HeaderSchema(df.columns)
+    y = df.iloc[:, schema.position(column)].to_numpy(np.float64)
+    t = df.iloc[:, schema.position(time_column)].to_numpy(np.float64)
+    unit = schema.unit(column) or "-"
+    time_unit = schema.unit(time_column) or "s"
+    rate = differentiate_samples(y, t, **kwargs)
+
+    deriv = kwargs.get("deriv", 1)
+    if per is not None and per != time_unit:
+        if per not in TIME_UNITS or time_unit not in TIME_UNITS:
+            raise ValueError(f"Cannot convert {time_unit!r} to {per!r}")
+        rate *= (TIME_UNITS[per] / TIME_UNITS[time_unit]) ** deriv
+        time_unit = per
+    return t, rate, f"{unit}/{time_unit}" + (f"^{deriv}" if deriv > 1 else "")
+
+
+# --- Benchmark ---
+def _notebook_loop(sin, xs, h):
+    """The notebook version: (sin(x + h) - sin(x)) / h, one scalar call at a time."""
+    return [(float(sin(x + h)) - float(sin(x))) / h for x in xs]
+
+
+def benchmark_differentiation(n_points=(1_000, 86_400), rows=86_400, seed=0):
+    """
+    Time the notebook's scalar forward difference (with sympy.sin as in the
+    notebook if sympy is installed, else math.sin) against derivative() on
+    sin over [0, 2pi], and differentiate_samples on a day of 1 Hz samples
+    with jittered timestamps and 0.1% noise (a level ramping in a sine).
+
+    Returns:
+        List[dict]: Case, n, wall time and max error against the exact derivative.
+    """
+    try:
+        import sympy
+        sin, loop = sympy.sin, "sympy-loop"
+    except ImportError:
+        sin, loop = math.sin, "math-loop"
+    results = []
+
+    def record(case, n, run, exact):
+        start = time.perf_counter()
+        value = np.asarray(run())
+        wall = time.perf_counter() - start
+        results.append({"case": case, "n": n, "wall_s": wall, "error": float(np.abs(value - exact).max())})
+
+    for n in n_points:
+        xs = np.linspace(0, 2 * np.pi, n)
+        exact = np.cos(xs)
+        record(loop, n, lambda: _notebook_loop(sin, xs.tolist(), 0.001), exact)
+        record("forward h=1e-3", n, lambda: derivative(np.sin, xs, 0.001, method="forward", order=1), exact)
+        record("forward", n, lambda: derivative(np.sin, xs, method="forward", order=1), exact)
+        record("central", n, lambda: derivative(np.sin, xs), exact)
+        record("central-4", n, lambda: derivative(np.sin, xs, order=4), exact)
+
+    rng = np.random.default_rng(seed)
+    period = 6 * 3600.0
+    for label, jitter in (("1Hz", 0.0), ("jitter", 0.2)):
+        t = np.arange(rows) + rng.uniform(-jitter, jitter, rows)
+        level = 2 + 0.5 * np.sin(2 * np.pi * t / period)
+        rate = 0.5 * 2 * np.pi / period * np.cos(2 * np.pi * t / period)
+        noisy = level + rng.normal(0, 1e-3, rows)
+        record(f"np.gradient {label}", rows, lambda: np.gradient(noisy, t), rate)
+        record(f"central {label}", rows, lambda: differentiate_samples(noisy, t), rate)
+        record(f"central-4 {label}", rows, lambda: differentiate_samples(noisy, t, order=4), rate)
+        record(f"savgol-301 {label}", rows, lambda: differentiate_samples(noisy, t, smooth=301), rate)
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'case':>18} {'n':>7} {'wall [ms]':>10} {'max error':>10}")
+    for r in benchmark_differentiation():
+        print(f"{r['case']:>18} {r['n']:>7} {r['wall_s'] * 1e3:>10.3f} {r['error']:>10.1e}")
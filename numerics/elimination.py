@@ -0,0 +1,210 @@
+import time
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Module: Gaussian Elimination
+# Description: Partial-pivoting Gaussian elimination from the Assignment6
+#              notebook (swap, add, getMaxRow, rowOps, Gauss, backSubs) as an
+#              importable module. The row-by-row helpers are kept as the
+#              reference; eliminate() clears a whole pivot column with one
+#              rank-1 update over all remaining rows, works on stacks of
+#              systems (batch, n, n) at once and records the row permutation.
+# -----------------------------------------------------------------------------
+
+
+# --- Row operations (as in the notebook) ---
+def swap(A, i1, i2):
+    """Swap rows i1 and i2 of A in place."""
+    A[[i1, i2]] = A[[i2, i1]]
+
+
+def add(A, i1, i2, num):
+    """Add num times row i1 to row i2 of A in place."""
+    A[i2, :] += num * A[i1, :]
+
+
+def get_max_row(A, i, j):
+    """Row index (from row i down) of the largest |entry| in column j."""
+    return i + int(np.argmax(np.abs(A[i:, j])))
+
+
+def row_ops(A, i, j):
+    """Zero column j below the pivot A[i, j], one row at a time."""
+    if A[i, j] == 0:
+        return
+    for k in range(i + 1, len(A)):
+        add(A, i, k, -A[k, j] / A[i, j])
+
+
+def gauss(A):
+    """
+    Reduce an augmented matrix to echelon form in place, row by row.
+
+    Columns without a usable pivot are skipped, as in the notebook.
+    """
+    n_rows, n_cols = A.shape
+    i = 0
+    for j in range(n_cols - 1):
+        if i >= n_rows:
+            break
+        p = get_max_row(A, i, j)
+        if A[p, j] == 0:
+            continue
+        swap(A, i, p)
+        row_ops(A, i, j)
+        i += 1
+
+
+def back_subs(A):
+    """Solve an augmented matrix in echelon form (n, n + 1) by back substitution."""
+    n = len(A)
+    x = np.zeros(n)
+    for j in range(n - 1, -1, -1):
+        x[j] = (A[j, -1] - A[j, j + 1:n] @ x[j + 1:]) / A[j, j]
+    return x
+
+
+# --- Vectorized, batched engine ---
+def eliminate(A, B):
+    """
+    Partial-pivoting elimination of stacked systems A X = B.
+
+    Each pivot column is cleared for every system at once with a single
+    rank-1 update of the remaining rows.
+
+    Params:
+        A (np.ndarray): (batch, n, n) coefficient matrices.
+        B (np.ndarray): (batch, n, k) right-hand sides.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Upper triangular U
+        (batch, n, n), transformed right-hand sides (batch, n, k) and the row
+        permutation (batch, n): row r of U came from row perm[r] of A.
+    """
+    U = np.array(A, dtype=np.float64)
+    C = np.array(B, dtype=np.float64)
+    batch, n, _ = U.shape
+    perm = np.tile(np.arange(n), (batch, 1))
+    systems = np.arange(batch)
+
+    for j in range(n):
+        # Pivot: largest |entry| in column j from row j down, per system
+        p = j + np.argmax(np.abs(U[:, j:, j]), axis=1)
+        swapped = p != j
+        if swapped.any():
+            s, ps = systems[swapped], p[swapped]
+            U[s, j], U[s, ps] = U[s, ps], U[s, j].copy()
+            C[s, j], C[s, ps] = C[s, ps], C[s, j].copy()
+            perm[s, j], perm[s, ps] = perm[s, ps], perm[s, j].copy()
+        pivot = U[:, j, j]
+        if np.any(pivot == 0):
+            raise np.linalg.LinAlgError(f"Singular matrix (no pivot in column {j})")
+        if j == n - 1:
+            break
+        # Rank-1 update: rows below minus factor * pivot row
+        factors = U[:, j + 1:, j] / pivot[:, None]
+        U[:, j + 1:, j:] -= factors[:, :, None] * U[:, j, None, j:]
+        C[:, j + 1:] -= factors[:, :, None] * C[:, j, None]
+    return U, C, perm
+
+
+def back_substitute(U, C):
+    """
+    Solve stacked upper triangular systems U X = C.
+
+    Params:
+        U (np.ndarray): (batch, n, n) upper triangular matrices.
+        C (np.ndarray): (batch, n, k) right-hand sides.
+
+    Returns:
+        np.ndarray: (batch, n, k) solutions.
+    """
+    n = U.shape[1]
+    X = np.empty_like(C)
+    for i in range(n - 1, -1, -1):
+        rest = np.einsum("bj,bjk->bk", U[:, i, i + 1:], X[:, i + 1:])
+        X[:, i] = (C[:, i] - rest) / U[:, i, i, None]
+    return X
+
+
+def solve(A, b):
+    """
+    Solve A x = b by vectorized partial-pivoting elimination.
+
+    Params:
+        A (array-like): (n, n) matrix or (batch, n, n) stack.
+        b (array-like): (n,) or (n, k) for one matrix; (batch, n) or
+            (batch, n, k) for a stack.
+
+    Returns:
+        np.ndarray: x with the shape of b.
+    """
+    A = np.asarray(A, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    single = A.ndim == 2
+    if single:
+        A, b = A[None], b[None]
+    vector = b.ndim == 2
+    if vector:
+        b = b[:, :, None]
+    U, C, _ = eliminate(A, b)
+    x = back_substitute(U, C)
+    if vector:
+        x = x[:, :, 0]
+    return x[0] if single else x
+
+
+# --- Benchmark ---
+def _solve_rowwise(A, b):
+    M = np.column_stack((A, b))
+    gauss(M)
+    return back_subs(M)
+
+
+def benchmark_elimination(sizes=(10, 50, 100, 200, 500, 1000, 2000), rowwise_limit=500, batch=100):
+    """
+    Time the row-by-row notebook version, solve() and np.linalg.solve on
+    random well-conditioned systems, plus a (batch, 10, 10) stack.
+
+    Params:
+        sizes (Iterable[int]): System sizes n.
+        rowwise_limit (int): Largest n run with the row-by-row version.
+        batch (int): Number of systems in the stacked run.
+
+    Returns:
+        List[dict]: Wall time and max error per method and size.
+    """
+    rng = np.random.default_rng(0)
+    results = []
+
+    def record(n, method, run, reference):
+        start = time.perf_counter()
+        x = run()
+        wall = time.perf_counter() - start
+        results.append({"n": n, "method": method, "wall_s": wall,
+                        "max_diff": float(np.max(np.abs(x - reference)))})
+
+    for n in sizes:
+        A = rng.random((n, n)) + n * np.eye(n)
+        b = rng.random(n)
+        reference = np.linalg.solve(A, b)
+        if n <= rowwise_limit:
+            record(n, "row-by-row", lambda: _solve_rowwise(A, b), reference)
+        record(n, "vectorized", lambda: solve(A, b), reference)
+        record(n, "np.linalg", lambda: np.linalg.solve(A, b), reference)
+
+    A = rng.random((batch, 10, 10)) + 10 * np.eye(10)
+    b = rng.random((batch, 10))
+    reference = np.linalg.solve(A, b[:, :, None])[:, :, 0]
+    label = f"{batch}x10"
+    record(label, "row-by-row", lambda: np.array([_solve_rowwise(a, v) for a, v in zip(A, b)]), reference)
+    record(label, "vectorized", lambda: solve(A, b), reference)
+    record(label, "np.linalg", lambda: np.linalg.solve(A, b[:, :, None])[:, :, 0], reference)
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'n':>7} {'method':>11} {'wall [ms]':>10} {'max |dx|':>10}")
+    for r in benchmark_elimination():
+        print(f"{r['n']:>7} {r['method']:>11} {r['wall_s'] * 1e3:>10.2f} {r['max_diff']:>10.1e}")
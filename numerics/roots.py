@@ -0,0 +1,346 @@
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Module: Batched Root Finding
+# Description: Bisection, secant and Newton (Assignment2 BisectionSearch,
+#              Assignemnt4 Sekantmetoden) for many independent equations at
+#              once, e.g. inverting a valve characteristic for every row of a
+#              logged time series. Every lane has its own convergence mask;
+#              f is only evaluated on the lanes that are still active, so
+#              converged lanes stop costing work. hybrid() is a safeguarded
+#              secant/bisection mix in the spirit of Brent's method.
+#
+#              f is called as f(x, *args) with x and each arg sliced to the
+#              active lanes, so per-lane parameters (targets, valve
+#              constants) are passed as arrays in args.
+# -----------------------------------------------------------------------------
+
+# root: (n,) roots (NaN where there was no valid bracket), converged: (n,)
+# bool, iterations: (n,) per lane, evaluations: total calls of f per lane summed
+RootResult = namedtuple("RootResult", ["root", "converged", "iterations", "evaluations"])
+
+
+def _prepare(shape_from, args):
+    """Flatten the starting values and broadcast args to one value per lane."""
+    arrays = [np.array(a, dtype=np.float64) for a in shape_from]
+    shape = np.broadcast_shapes(*(a.shape for a in arrays), *(np.shape(a) for a in args))
+    arrays = [np.broadcast_to(a, shape).ravel().copy() for a in arrays]
+    args = [np.broadcast_to(np.asarray(a), shape).ravel() for a in args]
+    return shape, arrays, args
+
+
+class _Lanes:
+    """
+    Outputs of all lanes plus the compacted working set of the active ones.
+
+    Solvers iterate on compact arrays that only hold active lanes; finished
+    lanes are written out and dropped with retire(), so later iterations
+    neither evaluate nor index them.
+    """
+
+    def __init__(self, size):
+        self.root = np.full(size, np.nan)
+        self.converged = np.zeros(size, dtype=bool)
+        self.iterations = np.zeros(size, dtype=np.int64)
+        self.evaluations = 0
+        self.idx = np.arange(size)
+
+    def retire(self, finished, converged, root, state):
+        """
+        Record finished lanes and drop them from the working set.
+
+        Params:
+            finished (np.ndarray): Bool mask over the working set.
+            converged (np.ndarray): Bool mask of lanes that converged.
+            root (np.ndarray): Current root estimate of the working set.
+            state (List[np.ndarray]): Per-lane working arrays to compact.
+
+        Returns:
+            List[np.ndarray]: The compacted state arrays.
+        """
+        if not finished.any():
+            return state
+        lanes = self.idx[finished]
+        self.root[lanes] = root[finished]
+        self.converged[lanes] = converged[finished]
+        keep = ~finished
+        self.idx = self.idx[keep]
+        return [a[keep] for a in state]
+
+    def step(self):
+        self.iterations[self.idx] += 1
+        self.evaluations += self.idx.size
+
+    def result(self, shape, root=None):
+        if root is not None and self.idx.size:
+            # Lanes still running at max_iter keep their last estimate
+            self.root[self.idx] = root
+        return RootResult(self.root.reshape(shape), self.converged.reshape(shape),
+                          self.iterations.reshape(shape), self.evaluations)
+
+
+def _tolerance(x, xtol, rtol):
+    return xtol + rtol * np.abs(x)
+
+
+def _bracket(f, lanes, a, b, args):
+    """Evaluate the bracket ends; retire ends that are roots and invalid brackets."""
+    fa, fb = f(a, *args), f(b, *args)
+    lanes.evaluations += 2 * a.size
+    for end, f_end in ((a, fa), (b, fb)):
+        hit = f_end == 0
+        lanes.root[hit], lanes.converged[hit] = end[hit], True
+    keep = np.sign(fa) * np.sign(fb) < 0
+    lanes.idx = lanes.idx[keep]
+    return [x[keep] for x in (a, b, fa, fb)] + [[arg[keep] for arg in args]]
+
+
+def bisection(f, lo, hi, args=(), xtol=1e-12, rtol=4 * np.finfo(float).eps, max_iter=200):
+    """
+    Bisection on arrays of brackets [lo, hi] with f(lo), f(hi) of opposite sign.
+
+    Params:
+        f (Callable): Vectorized f(x, *args).
+        lo, hi (array-like): Bracket ends, broadcast against each other and args.
+        args (tuple): Per-lane parameters of f (arrays or scalars).
+        xtol, rtol (float): Stop when the bracket is narrower than xtol + rtol*|x|.
+        max_iter (int): Most halvings per lane.
+
+    Returns:
+        RootResult: Lanes without a sign change have root NaN and converged False.
+    """
+    shape, (lo, hi), args = _prepare((lo, hi), args)
+    lanes = _Lanes(lo.size)
+    lo, hi, f_lo, _, args = _bracket(f, lanes, lo, hi, args)
+    mid = (lo + hi) / 2
+
+    for _ in range(max_iter):
+        if lanes.idx.size == 0:
+            break
+        mid = (lo + hi) / 2
+        f_mid = f(mid, *args)
+        lanes.step()
+        left = np.sign(f_mid) == np.sign(f_lo)
+        lo = np.where(left, mid, lo)
+        f_lo = np.where(left, f_mid, f_lo)
+        hi = np.where(left, hi, mid)
+        done = (f_mid == 0) | (hi - lo <= _tolerance(mid, xtol, rtol))
+        lo, hi, f_lo, mid, *args = lanes.retire(done, done, mid, [lo, hi, f_lo, mid, *args])
+    return lanes.result(shape, mid)
+
+
+def secant(f, x0, x1, args=(), xtol=1e-12, rtol=4 * np.finfo(float).eps, max_iter=100):
+    """
+    Secant method on arrays of starting pairs (x0, x1).
+
+    Lanes whose secant slope becomes zero stop with converged False (the
+    notebook version returned None there).
+
+    Returns:
+        RootResult: See bisection.
+    """
+    shape, (x0, x1), args = _prepare((x0, x1), args)
+    lanes = _Lanes(x0.size)
+    f0, f1 = f(x0, *args), f(x1, *args)
+    lanes.evaluations += 2 * x0.size
+    done = f1 == 0
+    x0, x1, f0, f1, *args = lanes.retire(done, done, x1, [x0, x1, f0, f1, *args])
+
+    for _ in range(max_iter):
+        if lanes.idx.size == 0:
+            break
+        slope = f1 - f0
+        stuck = slope == 0
+        if stuck.any():
+            x0, x1, f0, f1, slope, *args = lanes.retire(stuck, ~stuck, x1, [x0, x1, f0, f1, slope, *args])
+        x2 = x1 - f1 * (x1 - x0) / slope
+        f2 = f(x2, *args)
+        lanes.step()
+        done = (f2 == 0) | (np.abs(x2 - x1) <= _tolerance(x2, xtol, rtol))
+        x0, f0, x1, f1 = x1, f1, x2, f2
+        x0, x1, f0, f1, *args = lanes.retire(done, done, x1, [x0, x1, f0, f1, *args])
+    return lanes.result(shape, x1)
+
+
+def newton(f, fprime, x0, args=(), xtol=1e-12, rtol=4 * np.finfo(float).eps, max_iter=50):
+    """
+    Newton's method on an array of initial guesses.
+
+    Params:
+        fprime (Callable): Vectorized f'(x, *args).
+
+    Returns:
+        RootResult: See bisection; evaluations counts calls of f and f'.
+    """
+    shape, (x,), args = _prepare((x0,), args)
+    lanes = _Lanes(x.size)
+
+    for _ in range(max_iter):
+        if lanes.idx.size == 0:
+            break
+        fx = f(x, *args)
+        dfx = fprime(x, *args)
+        lanes.step()
+        lanes.evaluations += lanes.idx.size
+        root = fx == 0
+        flat = (dfx == 0) & ~root
+        if (root | flat).any():
+            x, fx, dfx, *args = lanes.retire(root | flat, root, x, [x, fx, dfx, *args])
+        step = fx / dfx
+        x = x - step
+        done = np.abs(step) <= _tolerance(x, xtol, rtol)
+        x, *args = lanes.retire(done, done, x, [x, *args])
+    return lanes.result(shape, x)
+
+
+def hybrid(f, lo, hi, args=(), xtol=1e-12, rtol=4 * np.finfo(float).eps, max_iter=200):
+    """
+    Safeguarded false position/bisection on brackets, in the spirit of
+    Brent's method.
+
+    Each lane takes the false-position point of its bracket, with the
+    Illinois modification (the f value of an end that is kept twice in a row
+    is halved, so both ends move) and kept at least one tolerance away from
+    the ends, as in Brent's method. It bisects instead when that point is
+    not inside the bracket, would not be shorter than half the step before
+    last, or when two steps in a row have not halved the bracket (Dekker's
+    safeguard). The bracket therefore halves at least every third step, so
+    every lane needs at most about three times the bisection count, and
+    converges superlinearly near a simple root.
+
+    Returns:
+        RootResult: See bisection.
+    """
+    shape, (a, b), args = _prepare((lo, hi), args)
+    lanes = _Lanes(a.size)
+    a, b, fa, fb, args = _bracket(f, lanes, a, b, args)
+    # Step lengths one and two iterations back, and which end was replaced last (+1 a, -1 b)
+    step_1 = np.full(a.size, np.inf)
+    step_2 = np.full(a.size, np.inf)
+    last = np.zeros(a.size)
+    # Bracket width when it last halved, and steps taken since
+    width_ref = np.abs(b - a)
+    stalled = np.zeros(a.size, dtype=np.int64)
+    x = (a + b) / 2
+
+    for _ in range(max_iter):
+        if lanes.idx.size == 0:
+            break
+        with np.errstate(divide="ignore", invalid="ignore"):
+            c = b - fb * (b - a) / (fb - fa)
+        low, high = np.minimum(a, b), np.maximum(a, b)
+        inside = (low < c) & (c < high)
+        # At least one tolerance from either end, so a point that lands on the
+        # root is followed by one just across it and the bracket collapses
+        tol = _tolerance(c, xtol, rtol)
+        c = np.clip(c, low + tol, high - tol)
+        # Brent's test: the interpolated step must be under half the one before last
+        # and the bracket must have halved within the last two steps
+        interpolate = inside & (np.abs(c - x) < 0.5 * step_2) & (stalled < 2)
+        x_new = np.where(interpolate, c, (a + b) / 2)
+        step_2, step_1 = step_1, np.abs(x_new - x)
+        x = x_new
+        fx = f(x, *args)
+        lanes.step()
+
+        # Keep the sign change: replace the end that has the same sign as f(x)
+        same_a = np.sign(fx) == np.sign(fa)
+        # Illinois: halve the f value of the end that survives twice in a row
+        fa = np.where(~same_a & (last == -1), fa / 2, fa)
+        fb = np.where(same_a & (last == 1), fb / 2, fb)
+        a = np.where(same_a, x, a)
+        fa = np.where(same_a, fx, fa)
+        b = np.where(same_a, b, x)
+        fb = np.where(same_a, fb, fx)
+        last = np.where(same_a, 1.0, -1.0)
+        width = np.abs(b - a)
+        halved = ~interpolate | (width <= 0.5 * width_ref)
+        width_ref = np.where(halved, width, width_ref)
+        stalled = np.where(halved, 0, stalled + 1)
+        done = (fx == 0) | (np.abs(b - a) <= _tolerance(x, xtol, rtol))
+        a, b, fa, fb, x, step_1, step_2, last, width_ref, stalled, *args = lanes.retire(
+            done, done, x, [a, b, fa, fb, x, step_1, step_2, last, width_ref, stalled, *args])
+    return lanes.result(shape, x)
+
+
+# --- Scalar reference versions (notebook style, without printing) ---
+def _bisection_scalar(f, lo, hi, c, xtol=1e-12):
+    f_lo = f(lo, c)
+    while hi - lo > xtol:
+        mid = (lo + hi) / 2
+        f_mid = f(mid, c)
+        if f_mid == 0:
+            return mid
+        if (f_mid < 0) == (f_lo < 0):
+            lo, f_lo = mid, f_mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def _secant_scalar(f, x0, x1, c, xtol=1e-12):
+    f0, f1 = f(x0, c), f(x1, c)
+    while abs(x1 - x0) > xtol and f1 != f0:
+        x0, x1 = x1, x1 - f1 * (x1 - x0) / (f1 - f0)
+        f0, f1 = f1, f(x1, c)
+    return x1
+
+
+def _newton_scalar(f, fprime, x, c, xtol=1e-12):
+    for _ in range(50):
+        step = f(x, c) / fprime(x, c)
+        x -= step
+        if abs(step) <= xtol:
+            break
+    return x
+
+
+def benchmark_roots(n=100_000, n_scalar=2_000):
+    """
+    Roots/s of the batched solvers against scalar loops, on x^3 + x - c = 0
+    with a different c per lane (like inverting a characteristic per row).
+
+    Params:
+        n (int): Lanes for the batched solvers.
+        n_scalar (int): Equations solved one by one with the scalar versions.
+
+    Returns:
+        List[dict]: Method, equations, roots/s and max residual.
+    """
+    rng = np.random.default_rng(0)
+    c = rng.uniform(-100, 100, n)
+    # One f for both: x * x * x keeps NumPy off its generic power loop
+    f = lambda x, c: x * x * x + x - c
+    fprime = lambda x, c: 3 * x * x + 1
+    lo, hi = -10.0, 10.0
+    results = []
+
+    def record(method, count, run, cs):
+        start = time.perf_counter()
+        roots = np.asarray(run())
+        wall = time.perf_counter() - start
+        results.append({"method": method, "equations": count, "roots_per_s": count / wall,
+                        "max_residual": float(np.max(np.abs(f(roots, cs))))})
+
+    cs = c[:n_scalar].tolist()
+    record("bisection loop", n_scalar, lambda: [_bisection_scalar(f, lo, hi, ci) for ci in cs], c[:n_scalar])
+    record("secant loop", n_scalar,
+           lambda: [_secant_scalar(f, math.copysign(1.0, ci), math.copysign(2.0, ci), ci) for ci in cs],
+           c[:n_scalar])
+    record("newton loop", n_scalar, lambda: [_newton_scalar(f, fprime, math.copysign(1.0, ci), ci) for ci in cs],
+           c[:n_scalar])
+    record("bisection", n, lambda: bisection(f, lo, hi, (c,)).root, c)
+    record("secant", n, lambda: secant(f, np.sign(c), 2 * np.sign(c), (c,)).root, c)
+    record("newton", n, lambda: newton(f, fprime, np.sign(c), (c,)).root, c)
+    record("hybrid", n, lambda: hybrid(f, lo, hi, (c,)).root, c)
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'method':>15} {'equations':>10} {'roots/s':>12} {'max |f|':>9}")
+    for r in benchmark_roots():
+        print(f"{r['method']:>15} {r['equations']:>10} {r['roots_per_s']:>12.0f} {r['max_residual']:>9.1e}")
@@ -0,0 +1,313 @@
+import mmap
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Module: Temperature Loader
+# Description: Bulk loader for the Trondheim temperature format of the
+#              Assignment7 plotting notebook: a record of four lines (dates
+#              "dd.mm.yyyy", mean, minimum and maximum temperatures, all
+#              whitespace separated). A file may hold any number of records,
+#              e.g. one per year or per station. The file is memory-mapped
+#              and each line is parsed by NumPy in one call instead of one
+#              float() per value; the result is cached in a <file>.npz next
+#              to the source, keyed by its mtime and size, so plotting and
+#              statistics share a single load.
+# -----------------------------------------------------------------------------
+
+LINES_PER_RECORD = 4
+
+# dates (datetime64[D]), temperatures (float64) and record start offsets: record
+# i is [offsets[i], offsets[i + 1])
+TemperatureData = namedtuple("TemperatureData", ["dates", "mean", "min", "max", "offsets"])
+
+
+def cache_path(filename):
+    """Path of the cached binary form of a temperature file."""
+    return filename + ".npz"
+
+
+def parse_dates(line):
+    """
+    Parse a line of "dd.mm.yyyy" dates.
+
+    Params:
+        line (bytes): Whitespace-separated dates.
+
+    Returns:
+        np.ndarray: datetime64[D] array.
+    """
+    line = bytes(line).strip()
+    raw = np.frombuffer(line + b" ", dtype=np.uint8)
+    gaps = raw[10::11]
+    if raw.size % 11 == 0 and np.all((gaps == ord(" ")) | (gaps == ord("\t"))):
+        # Single-separated fixed-width tokens: read the bytes in place
+        chars = raw.reshape(-1, 11)[:, :10]
+    else:
+        chars = np.array(line.split(), dtype="S10").view(np.uint8).reshape(-1, 10)
+    digits = chars - np.uint8(ord("0"))   # wraps around below "0"
+    valid = digits <= 9
+    valid[:, [2, 5]] = chars[:, [2, 5]] == ord(".")
+    if not valid.all():
+        raise ValueError("Dates must be written as dd.mm.yyyy")
+    digits = digits.astype(np.int32)
+    day = digits[:, 0] * 10 + digits[:, 1]
+    month = digits[:, 3] * 10 + digits[:, 4]
+    year = digits[:, 6] * 1000 + digits[:, 7] * 100 + digits[:, 8] * 10 + digits[:, 9]
+    months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    return months.astype("datetime64[D]") + (day - 1)
+
+
+def parse_values(line):
+    """Parse a line of whitespace-separated floats (the notebook's get_list)."""
+    return np.fromstring(line, sep=" ") if line.strip() else np.empty(0)
+
+
+def parse_file(filename):
+    """
+    Parse a temperature file without the cache.
+
+    Params:
+        filename (str): File of one or more four-line records.
+
+    Returns:
+        TemperatureData: All records concatenated in file order.
+    """
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"{filename} is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Line boundaries from the mapped bytes; blank lines are skipped
+            raw = np.frombuffer(mm, dtype=np.uint8)
+            ends = np.flatnonzero(raw == ord("\n"))
+            starts = np.concatenate(([0], ends + 1))
+            ends = np.concatenate((ends, [len(mm)]))
+            text = np.concatenate(([0], np.cumsum(raw > ord(" "))))
+            blank = text[ends] == text[starts]
+            lines = list(zip(starts[~blank].tolist(), ends[~blank].tolist()))
+            del raw  # the map cannot close while an array views it
+            if len(lines) % LINES_PER_RECORD:
+                raise ValueError(f"{filename}: {len(lines)} lines is not a whole number of "
+                                 f"{LINES_PER_RECORD}-line records")
+
+            dates, columns, offsets = [], ([], [], []), [0]
+            for r in range(0, len(lines), LINES_PER_RECORD):
+                s, e = lines[r]
+                record_dates = parse_dates(mm[s:e])
+                for column, (s, e) in zip(columns, lines[r + 1:r + LINES_PER_RECORD]):
+                    try:
+                        values = parse_values(mm[s:e])
+                    except ValueError:
+                        raise ValueError(f"{filename}: record {r // LINES_PER_RECORD} has a "
+                                         f"value that is not a number") from None
+                    if len(values) != len(record_dates):
+                        raise ValueError(f"{filename}: record {r // LINES_PER_RECORD} has "
+                                         f"{len(record_dates)} dates but {len(values)} values")
+                    column.append(values)
+                dates.append(record_dates)
+                offsets.append(offsets[-1] + len(record_dates))
+    return TemperatureData(np.concatenate(dates), *(np.concatenate(c) for c in columns),
+                           np.array(offsets))
+
+
+# Loaded files of this process, keyed by (path, mtime, size)
+_loaded = {}
+
+
+def load(filename, use_cache=True):
+    """
+    Temperature data of a file, parsed once per file version.
+
+    The arrays are kept in memory and, if use_cache, in <file>.npz; both
+    are keyed by the file's mtime and size, so an edited file is parsed
+    again.
+
+    Params:
+        filename (str): File of one or more four-line records.
+        use_cache (bool): Read and write the .npz cache.
+
+    Returns:
+        TemperatureData: Shared arrays; copy before modifying them.
+    """
+    path = os.path.abspath(filename)
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key in _loaded:
+        return _loaded[key]
+
+    data = None
+    cache = cache_path(filename)
+    if use_cache:
+        try:
+            with np.load(cache) as npz:
+                if npz["mtime_ns"] == st.st_mtime_ns and npz["size"] == st.st_size:
+                    data = TemperatureData(*(npz[field] for field in TemperatureData._fields))
+        except (OSError, ValueError, KeyError):
+            pass  # missing, stale or damaged: parse again
+    if data is None:
+        data = parse_file(filename)
+        if use_cache:
+            try:
+                tmp = cache + ".tmp"
+                with open(tmp, "wb") as f:
+                    np.savez(f, mtime_ns=st.st_mtime_ns, size=st.st_size, **data._asdict())
+                os.replace(tmp, cache)
+            except OSError:
+                pass  # read-only location: the in-memory cache still applies
+    _loaded[key] = data
+    return data
+
+
+def records(data):
+    """Iterate over the records of loaded data as TemperatureData views."""
+    for lo, hi in zip(data.offsets[:-1], data.offsets[1:]):
+        yield TemperatureData(data.dates[lo:hi], data.mean[lo:hi], data.min[lo:hi],
+                              data.max[lo:hi], np.array([0, hi - lo]))
+
+
+# --- Statistics and plotting ---
+def monthly(data):
+    """
+    Monthly statistics per record: mean of the daily means, lowest minimum
+    and highest maximum.
+
+    Params:
+        data (TemperatureData | str): Loaded data, or a file to load().
+
+    Returns:
+        dict: "record", "month" (datetime64[M]), "mean", "min", "max" and
+        "days", one entry per record and month.
+    """
+    if isinstance(data, (str, os.PathLike)):
+        data = load(data)
+    months = data.dates.astype("datetime64[M]")
+    # A group starts where the month changes or a new record begins
+    new = np.ones(len(months), dtype=bool)
+    new[1:] = months[1:] != months[:-1]
+    new[data.offsets[:-1][data.offsets[:-1] < len(months)]] = True
+    starts = np.flatnonzero(new)
+    days = np.diff(np.append(starts, len(months)))
+    return {
+        "record": np.searchsorted(data.offsets, starts, side="right") - 1,
+        "month": months[starts],
+        "mean": np.add.reduceat(data.mean, starts) / days,
+        "min": np.minimum.reduceat(data.min, starts),
+        "max": np.maximum.reduceat(data.max, starts),
+        "days": days,
+    }
+
+
+def plot(data, ax=None, title="Trondheim Temperatures Over Time"):
+    """
+    Plot mean, minimum and maximum temperature against date, as plot_data in
+    the notebook but without re-reading the file.
+
+    Params:
+        data (TemperatureData | str): Loaded data, or a file to load().
+        ax (matplotlib.axes.Axes | None): Axes to draw on; current axes if None.
+        title (str): Axes title.
+
+    Returns:
+        matplotlib.axes.Axes: The axes.
+    """
+    import matplotlib.dates as mdates
+    import matplotlib.pyplot as plt
+
+    if isinstance(data, (str, os.PathLike)):
+        data = load(data)
+    ax = ax or plt.gca()
+    for i, record in enumerate(records(data)):
+        for values, label in ((record.mean, "Mean Temp"), (record.min, "Min Temp"),
+                              (record.max, "Max Temp")):
+            ax.plot(record.dates, values, label=label if i == 0 else None)
+    ax.set_title(title)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Temperature (°C)")
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(ax.xaxis.get_major_locator()))
+    ax.legend()
+    return ax
+
+
+# --- Benchmark ---
+def _get_list(line):
+    return [float(value) for value in line.split()]
+
+
+def _get_data_notebook(file):
+    """The notebook's get_data, extended to every record: one float() per value."""
+    dates, meantemps, mintemps, maxtemps = [], [], [], []
+    for i, line in enumerate(file):
+        line = line.strip()
+        if i % 4 == 0:
+            dates += line.split()
+        elif i % 4 == 1:
+            meantemps += _get_list(line)
+        elif i % 4 == 2:
+            mintemps += _get_list(line)
+        else:
+            maxtemps += _get_list(line)
+    return dates, meantemps, mintemps, maxtemps
+
+
+def write_synthetic(filename, years=50, stations=20, seed=0):
+    """
+    Write a multi-decade, multi-station file in the notebook's format: one
+    record of daily values per station and year.
+    """
+    rng = np.random.default_rng(seed)
+    with open(filename, "w") as f:
+        for _ in range(stations):
+            for year in range(1970, 1970 + years):
+                dates = np.arange(f"{year}-01-01", f"{year + 1}-01-01", dtype="datetime64[D]")
+                day = np.arange(len(dates))
+                mean = 5 - 10 * np.cos(2 * np.pi * day / len(dates)) + rng.normal(0, 3, len(dates))
+                spread = rng.uniform(1, 6, len(dates))
+                text = np.datetime_as_string(dates)
+                f.write(" ".join(f"{d[8:10]}.{d[5:7]}.{d[0:4]}" for d in text) + "\n")
+                for values in (mean, mean - spread, mean + spread):
+                    f.write(" ".join(f"{v:.1f}" for v in values) + "\n")
+
+
+def benchmark_loader(years=50, stations=20, directory=None):
+    """
+    Time the notebook's get_data, parse_file, and load() with a cold and a
+    warm .npz, on a synthetic file of years * stations records.
+
+    Returns:
+        List[dict]: Method, values read, wall time and values/s.
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        filename = os.path.join(tmp, "temperatures.txt")
+        write_synthetic(filename, years, stations)
+        results = []
+
+        def record(method, run):
+            start = time.perf_counter()
+            n = run()
+            wall = time.perf_counter() - start
+            results.append({"method": method, "values": n, "wall_s": wall, "values_per_s": n / wall})
+
+        def notebook():
+            with open(filename) as f:
+                dates, *temps = _get_data_notebook(f)
+            return sum(map(len, temps))
+
+        record("notebook", notebook)
+        record("parse_file", lambda: 3 * len(parse_file(filename).dates))
+        record("load (cold)", lambda: 3 * len(load(filename).dates))
+        _loaded.clear()
+        record("load (.npz)", lambda: 3 * len(load(filename).dates))
+        record("load (memory)", lambda: 3 * len(load(filename).dates))
+        _loaded.clear()
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'method':>14} {'values':>9} {'wall [ms]':>10} {'values/s':>12}")
+    for r in benchmark_loader():
+        print(f"{r['method']:>14} {r['values']:>9} {r['wall_s'] * 1e3:>10.2f} {r['values_per_s']:>12.0f}")
@@ -0,0 +1,8 @@
+"""
+Helpers shared by the K-Spice simulation scripts (Motas.py, 47Motas.py, ...).
+
+simlog.recording.SimulationRecorder is the one implementation of the sampling
+loop. Nothing in this package imports kspice at import time (open_timeline in
+simlog.scenarios loads it on first use), so it can be used by analysis tools and
+benchmarks (see simlog.fake_kspice) without the simulator SDK installed.
+"""
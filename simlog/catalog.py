@@ -0,0 +1,491 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+import numpy as np
+
+from simlog.columnar import BACKEND_EXTENSIONS
+from simlog.manifest import RunManifest, manifest_path
+from simlog.pyramid import iter_blocks
+from simlog.schema import read_columns, split_app, split_column
+from simlog.stepping import APP_SEPARATOR
+
+# -----------------------------------------------------------------------------
+# Module: Run Catalog
+# Description: SQLite index of the sweep output files, so questions like
+#              "which runs stepped D-27PIC0101" or "max of D-13PT2122 across
+#              states" are answered without opening every result file. Per
+#              file it stores the project, state and timestamp encoded by
+#              generate_filename, the scenario from the run manifest, the
+#              variable list, row count, time range and per-column
+#              min/max/mean. Columns of runs that record several
+#              applications are stored under their "Tag:Attribute" name with
+#              the application in its own field, so tag and name queries
+#              match them in every application ("App/Tag:Attribute" picks
+#              one). Queries that need the data itself first prune
+#              on the column summaries and open only files that can match.
+#              run_scenarios adds each run as it finishes; update() rescans
+#              a directory and re-reads only files whose mtime or size
+#              changed.
+# -----------------------------------------------------------------------------
+
+DEFAULT_DB = "runs.sqlite"
+
+# "<project>_state<n>_<dd.mm.yyyy_HH-MM>.<ext>" as written by generate_filename
+_FILENAME_RE = re.compile(r"^(?P<project>.+)_state(?P<state>\d+)_(?P<ts>\d\d\.\d\d\.\d{4}_\d\d-\d\d)\.\w+$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    project TEXT,
+    state INTEGER,
+    started TEXT,
+    parameter TEXT,
+    multiplier REAL,
+    scenario TEXT,
+    complete INTEGER,
+    rows INTEGER NOT NULL,
+    t_min REAL,
+    t_max REAL
+);
+CREATE TABLE IF NOT EXISTS columns (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    app TEXT,
+    name TEXT NOT NULL,
+    unit TEXT,
+    min REAL,
+    max REAL,
+    mean REAL,
+    count INTEGER,
+    PRIMARY KEY (run_id, position)
+);
+CREATE INDEX IF NOT EXISTS columns_name ON columns(name);
+CREATE INDEX IF NOT EXISTS runs_parameter ON runs(parameter);
+"""
+
+_STATS = {"min": "MIN(c.min)", "max": "MAX(c.max)", "mean": "SUM(c.mean * c.count) / SUM(c.count)"}
+
+
+def summarize(filename, chunk_rows=100_000):
+    """
+    Per-column summary of a result file, read in blocks.
+
+    Params:
+        filename (str): .csv, .f64 (memmap) or .parquet file.
+        chunk_rows (int): Rows per block; bounds peak memory.
+
+    Returns:
+        dict: "rows", "t_min", "t_max" and "columns": a list of
+        (app, name, unit, min, max, mean, count) for the data columns, app
+        None unless the run records several applications (NaN samples are
+        left out).
+    """
+    headers = read_columns(filename)
+    n = len(headers) - 1
+    rows, t_min, t_max = 0, None, None
+    low, high = np.full(n, np.nan), np.full(n, np.nan)
+    total, count = np.zeros(n), np.zeros(n, dtype=np.int64)
+    for block in iter_blocks(filename, chunk_rows):
+        if not len(block):
+            continue
+        if t_min is None:
+            t_min = float(block[0, 0])
+        t_max = float(block[-1, 0])
+        rows += len(block)
+        data = block[:, 1:]
+        valid = ~np.isnan(data)
+        # fmin/fmax skip NaN; a column that is all NaN stays NaN
+        low = np.fmin(low, np.fmin.reduce(data, axis=0))
+        high = np.fmax(high, np.fmax.reduce(data, axis=0))
+        total += np.where(valid, data, 0.0).sum(axis=0)
+        count += valid.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+    columns = []
+    for j, header in enumerate(headers[1:]):
+        name, unit = split_column(header)
+        columns.append((*split_app(name), unit, *(None if np.isnan(v) else float(v) for v in (low[j], high[j], mean[j])),
+                        int(count[j])))
+    return {"rows": rows, "t_min": t_min, "t_max": t_max, "columns": columns}
+
+
+def _run_info(filename):
+    """Project, state and start time from the filename, scenario from the manifest."""
+    info = {"project": None, "state": None, "started": None, "parameter": None, "multiplier": None,
+            "scenario": None, "complete": None}
+    match = _FILENAME_RE.match(os.path.basename(filename))
+    if match:
+        info["project"] = match["project"]
+        info["state"] = int(match["state"])
+        info["started"] = datetime.strptime(match["ts"], "%d.%m.%Y_%H-%M").isoformat()
+    if os.path.exists(manifest_path(filename)):
+        data = RunManifest.load(filename).data
+        scenario = data.get("scenario") or {}
+        info.update(state=data.get("state", info["state"]), parameter=scenario.get("parameter"),
+                    multiplier=scenario.get("multiplier"), scenario=json.dumps(data),
+                    complete=int(bool(data.get("complete"))))
+    return info
+
+
+def _version(path):
+    """
+    (mtime_ns, size) that changes when a file or its manifest is rewritten
+    (the manifest is completed after the last rows are flushed).
+    """
+    stat = os.stat(path)
+    mtime = stat.st_mtime_ns
+    try:
+        mtime = max(mtime, os.stat(manifest_path(path)).st_mtime_ns)
+    except FileNotFoundError:
+        pass
+    return mtime, stat.st_size
+
+
+def _like_prefix(text):
+    """LIKE pattern (with ESCAPE '\\') matching strings that start with text."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _variable_filter(column, variable, app_column=None):
+    """
+    SQL condition matching a full name ("Tag:Attribute") or a bare tag; with
+    app_column, "App/Tag:Attribute" or "App/Tag" also matches the application.
+    """
+    condition = f"({column} = ? OR {column} LIKE ? ESCAPE '\\')"
+    args = [variable, _like_prefix(variable + ":")]
+    app, sep, name = variable.partition(APP_SEPARATOR)
+    if app_column is not None and sep and ":" not in app:
+        # Also the name within one application; the whole text still matches
+        # as a name, for columns such as "DP/DT"
+        condition = f"({condition} OR ({column} = ? OR {column} LIKE ? ESCAPE '\\') AND {app_column} = ?)"
+        args += [name, _like_prefix(name + ":"), app]
+    return condition, args
+
+
+def _matches(name, variable):
+    """Python side of _variable_filter for a column name read from a file."""
+    app, name = split_app(name)
+    if app is not None and variable.startswith(app + APP_SEPARATOR):
+        variable = variable[len(app) + len(APP_SEPARATOR):]
+    return name == variable or name.startswith(variable + ":")
+
+
+class Catalog:
+    """
+    SQLite catalog of result files.
+
+    Params:
+        path (str): Database file (created if missing).
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(_SCHEMA)
+        if "app" not in {row["name"] for row in self.db.execute("PRAGMA table_info(columns)")}:
+            # Catalogs from before the app field: add it and have update()
+            # re-read every file, so "App/Tag:Attribute" names are split
+            with self.db:
+                self.db.execute("ALTER TABLE columns ADD COLUMN app TEXT")
+                self.db.execute("UPDATE runs SET mtime_ns = 0")
+
+    # --- Updating ---
+    def add(self, filename):
+        """(Re)index one result file."""
+        path = os.path.abspath(filename)
+        mtime_ns, size = _version(path)
+        summary = summarize(path)
+        info = _run_info(path)
+        with self.db:
+            self.db.execute("DELETE FROM runs WHERE path = ?", (path,))
+            cursor = self.db.execute(
+                "INSERT INTO runs (path, mtime_ns, size, project, state, started, parameter, multiplier,"
+                " scenario, complete, rows, t_min, t_max) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, mtime_ns, size, info["project"], info["state"], info["started"],
+                 info["parameter"], info["multiplier"], info["scenario"], info["complete"],
+                 summary["rows"], summary["t_min"], summary["t_max"]))
+            self.db.executemany(
+                "INSERT INTO columns (run_id, position, app, name, unit, min, max, mean, count)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, j, *column) for j, column in enumerate(summary["columns"])])
+
+    def update(self, directory, pattern=None, report=print):
+        """
+        Bring the catalog in line with a directory: index new files, re-index
+        files whose mtime or size changed, drop files that are gone.
+
+        Params:
+            directory (str): Directory with result files.
+            pattern (str | None): Glob for result files (default: every
+                backend extension).
+            report (Callable[[str], None]): Receives skipped-file messages.
+
+        Returns:
+            dict: Counts of "added", "updated", "unchanged", "removed" and
+            "failed" files.
+        """
+        patterns = [pattern] if pattern else [f"*.{ext}" for ext in sorted(set(BACKEND_EXTENSIONS.values()))]
+        files = sorted({os.path.abspath(f) for p in patterns for f in glob.glob(os.path.join(directory, p))})
+        directory = os.path.abspath(directory)
+        known = {row["path"]: (row["mtime_ns"], row["size"]) for row in self.db.execute(
+            "SELECT path, mtime_ns, size FROM runs WHERE path LIKE ? ESCAPE '\\'",
+            (_like_prefix(directory + os.sep),))}
+        counts = dict.fromkeys(("added", "updated", "unchanged", "removed", "failed"), 0)
+        for path in files:
+            if known.get(path) == _version(path):
+                counts["unchanged"] += 1
+                continue
+            try:
+                self.add(path)
+            except Exception as e:
+                report(f"[WARN] Skipped {path}: {e!r}")
+                counts["failed"] += 1
+                continue
+            counts["updated" if path in known else "added"] += 1
+        gone = [path for path in known if os.path.dirname(path) == directory and path not in files]
+        with self.db:
+            self.db.executemany("DELETE FROM runs WHERE path = ?", [(path,) for path in gone])
+        counts["removed"] = len(gone)
+        return counts
+
+    # --- Queries ---
+    def runs(self, parameter=None, state=None, project=None, variable=None, complete=None):
+        """
+        Indexed runs matching all given filters, oldest first.
+
+        Params:
+            parameter (str | None): Stepped parameter (full name or tag).
+            state (int | None): State index.
+            project (str | None): Project name.
+            variable (str | None): Only runs that log this variable (name or
+                tag, optionally "App/..." for one application).
+            complete (bool | None): Only complete (or incomplete) runs.
+
+        Returns:
+            List[dict]: Run rows (path, project, state, started, parameter,
+            multiplier, rows, t_min, t_max, ...).
+        """
+        where, args = [], []
+        if parameter is not None:
+            condition, values = _variable_filter("parameter", parameter)
+            where.append(condition)
+            args += values
+        for column, value in (("state", state), ("project", project)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                args.append(value)
+        if complete is not None:
+            where.append("complete = ?")
+            args.append(int(complete))
+        if variable is not None:
+            condition, values = _variable_filter("name", variable, "app")
+            where.append(f"id IN (SELECT run_id FROM columns WHERE {condition})")
+            args += values
+        sql = "SELECT * FROM runs" + (" WHERE " + " AND ".join(where) if where else "") + \
+              " ORDER BY started, path"
+        return [dict(row) for row in self.db.execute(sql, args)]
+
+    def stats(self, variable, **filters):
+        """
+        Summary of a variable in every matching run, from the catalog only.
+
+        Params:
+            variable (str): Full name ("Tag:Attribute") or tag, optionally
+                "App/..." for one application.
+            **filters: As for runs().
+
+        Returns:
+            List[dict]: path, state, parameter, app, name, unit, min, max,
+            mean and count per run and matching column.
+        """
+        paths = {run["path"] for run in self.runs(**filters)}
+        condition, args = _variable_filter("c.name", variable, "c.app")
+        rows = self.db.execute(
+            "SELECT r.path, r.state, r.parameter, c.app, c.name, c.unit, c.min, c.max, c.mean, c.count"
+            f" FROM columns c JOIN runs r ON r.id = c.run_id WHERE {condition}"
+            " ORDER BY r.state, r.path, c.position", args)
+        return [dict(row) for row in rows if row["path"] in paths]
+
+    def aggregate(self, variable, stat="max", **filters):
+        """
+        One statistic of a variable across all matching runs ("min", "max"
+        or "mean", weighted by sample count), from the catalog only.
+        """
+        if stat not in _STATS:
+            raise ValueError(f"stat must be one of {sorted(_STATS)}")
+        condition, args = _variable_filter("c.name", variable, "c.app")
+        ids = [run["id"] for run in self.runs(**filters)]
+        if not ids:
+            return None
+        marks = ",".join("?" * len(ids))
+        row = self.db.execute(f"SELECT {_STATS[stat]} FROM columns c WHERE {condition}"
+                              f" AND c.run_id IN ({marks})", args + ids).fetchone()
+        return row[0]
+
+    def prune(self, variable, above=None, below=None, **filters):
+        """
+        Files whose summaries allow a sample of variable above and/or below
+        the given values; other files cannot match and need not be opened.
+
+        Returns:
+            List[str]: Paths of candidate files.
+        """
+        files = []
+        for row in self.stats(variable, **filters):
+            if above is not None and (row["max"] is None or row["max"] <= above):
+                continue
+            if below is not None and (row["min"] is None or row["min"] >= below):
+                continue
+            if row["path"] not in files:
+                files.append(row["path"])
+        return files
+
+    def load(self, variable, above=None, below=None, **filters):
+        """
+        Rows where variable is above and/or below the given values, opening
+        only the files prune() keeps.
+
+        Returns:
+            dict: {path: DataFrame of the matching rows}.
+        """
+        from simlog.columnar import read_output
+
+        result = {}
+        for path in self.prune(variable, above, below, **filters):
+            df = read_output(path)
+            names = [split_column(col)[0] for col in df.columns]
+            keep = np.zeros(len(df), dtype=bool)
+            for j, name in enumerate(names):
+                if _matches(name, variable):
+                    values = df.iloc[:, j].to_numpy()
+                    match = np.ones(len(df), dtype=bool)
+                    if above is not None:
+                        match &= values > above
+                    if below is not None:
+                        match &= values < below
+                    keep |= match
+            if keep.any():
+                result[path] = df[keep]
+        return result
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# --- Benchmark ---
+def benchmark_catalog(n_files=40, rows=10_000, n_variables=18, directory=None):
+    """
+    Answer "max of one variable across states" and "rows above a threshold"
+    by opening every CSV, and from the catalog; also time a cold and an
+    unchanged update().
+
+    Returns:
+        List[dict]: Method, wall time and result files opened.
+    """
+    import tempfile
+
+    import pandas as pd
+
+    from simlog.schema import format_column
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        header = [format_column("ModelTime", "s")] + [format_column(f"D-{j:02d}PT{j}:MeasuredValue", "barg")
+                                                      for j in range(n_variables)]
+        for f in range(n_files):
+            data = np.column_stack((np.arange(1.0, rows + 1),
+                                    rng.normal(50 + f, 1, (rows, n_variables))))
+            pd.DataFrame(data, columns=header).to_csv(os.path.join(tmp, f"Bench_state{f}_01.01.2026_12-00.csv"),
+                                                      index=False)
+        variable, threshold = "D-03PT3", 50 + n_files - 3
+        results = []
+
+        files = sorted(glob.glob(os.path.join(tmp, "*.csv")))
+
+        def record(method, run, opened):
+            start = time.perf_counter()
+            run()
+            results.append({"method": method, "wall_s": time.perf_counter() - start, "opened": opened})
+
+        with Catalog(os.path.join(tmp, "runs.sqlite")) as catalog:
+            record("update (cold)", lambda: catalog.update(tmp), len(files))
+            record("update (unchanged)", lambda: catalog.update(tmp), 0)
+            record("max: open every file",
+                   lambda: max(pd.read_csv(f)[header[4]].max() for f in files), len(files))
+            record("max: catalog", lambda: catalog.aggregate(variable, "max"), 0)
+            record("above: open every file",
+                   lambda: [f for f in files if (pd.read_csv(f)[header[4]] > threshold).any()], len(files))
+            record("above: catalog + pruned", lambda: catalog.load(variable, above=threshold),
+                   len(catalog.prune(variable, above=threshold)))
+    return results
+
+
+# --- Command line ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m simlog.catalog", description="Query the run catalog.")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"catalog database (default {DEFAULT_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    update = commands.add_parser("update", help="index new and changed result files of a directory")
+    update.add_argument("directory")
+    runs = commands.add_parser("runs", help="list runs")
+    stats = commands.add_parser("stats", help="per-run summary of a variable")
+    stats.add_argument("variable")
+    find = commands.add_parser("find", help="files that can have the variable above/below a value")
+    find.add_argument("variable")
+    find.add_argument("--above", type=float)
+    find.add_argument("--below", type=float)
+    for command in (runs, stats, find):
+        command.add_argument("--parameter", help="stepped parameter (name or tag)")
+        command.add_argument("--state", type=int)
+        command.add_argument("--project")
+    runs.add_argument("--variable", help="only runs that log this variable")
+    stats.add_argument("--stat", choices=sorted(_STATS), help="one value across all matching runs")
+    commands.add_parser("benchmark", help="time catalog queries against opening every file")
+    args = parser.parse_args(argv)
+
+    if args.command == "benchmark":
+        print(f"{'method':>24} {'wall [ms]':>10} {'opened':>7}")
+        for r in benchmark_catalog():
+            print(f"{r['method']:>24} {r['wall_s'] * 1e3:>10.1f} {r['opened']:>7}")
+        return
+
+    with Catalog(args.db) as catalog:
+        if args.command == "update":
+            print(catalog.update(args.directory))
+            return
+        filters = {"parameter": args.parameter, "state": args.state, "project": args.project}
+        if args.command == "runs":
+            for run in catalog.runs(variable=args.variable, **filters):
+                print(f"{run['path']}  state={run['state']} parameter={run['parameter']} "
+                      f"multiplier={run['multiplier']} rows={run['rows']} "
+                      f"t=[{run['t_min']}, {run['t_max']}] complete={run['complete']}")
+        elif args.command == "stats" and args.stat:
+            print(catalog.aggregate(args.variable, args.stat, **filters))
+        elif args.command == "stats":
+            for row in catalog.stats(args.variable, **filters):
+                print(f"{row['path']}  state={row['state']} {row['name']} [{row['unit']}] "
+                      f"min={row['min']} max={row['max']} mean={row['mean']}")
+        else:
+            for path in catalog.prune(args.variable, args.above, args.below, **filters):
+                print(path)
+
+
+if __name__ == "__main__":
+    main()
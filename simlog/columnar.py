@@ -0,0 +1,264 @@
+import json
+import os
+
+import numpy as np
+
+from simlog.schema import format_column
+
+# -----------------------------------------------------------------------------
+# Module: Columnar Output
+# Description: Binary alternatives to the CSV logger. MemmapSink writes rows
+#              into a preallocated float64 NumPy memmap (raw .f64 file plus a
+#              .json sidecar with columns, units and row count); ParquetSink
+#              writes Arrow row groups with the units stored as schema
+#              metadata. Both use the same write_rows/flush/close interface as
+#              the CSV sinks, so they plug into run_buffered_simulation.
+# -----------------------------------------------------------------------------
+
+
+def column_layout(variables):
+    """
+    Column names and units for a [name, unit] variables list, with ModelTime
+    as column 0.
+
+    Params:
+        variables (List[List[str, str]]): List of [name, unit] pairs.
+
+    Returns:
+        Tuple[List[str], List[str]]: Column names and units.
+    """
+    layout = [['ModelTime', 's']] + list(variables)
+    return [var[0] for var in layout], [var[1] for var in layout]
+
+
+def sidecar_path(filename):
+    """Path of the JSON metadata file that accompanies a .f64 memmap."""
+    return filename + ".json"
+
+
+class MemmapSink:
+    """
+    Float64 memmap sink with a preallocated (capacity, n_columns) layout.
+
+    Rows are copied straight into the mapped file. When the capacity runs out
+    the file is grown by doubling, and on close it is truncated to the rows
+    actually written. Re-opening an existing file with the same columns
+    appends after its last row.
+
+    Params:
+        filename (str): Output path (conventionally *.f64).
+        variables (List[List[str, str]]): Sampled variables ([name, unit]).
+        capacity (int): Rows to preallocate, e.g. minutes * 60 / sample_period.
+    """
+
+    def __init__(self, filename, variables, capacity=3600):
+        self.filename = filename
+        self.variables = variables
+        self.columns, self.units = column_layout(variables)
+        self.n_cols = len(self.columns)
+        self.rows = 0
+        self.closed = False
+
+        meta_file = sidecar_path(filename)
+        if os.path.exists(filename) and os.path.exists(meta_file):
+            with open(meta_file) as f:
+                meta = json.load(f)
+            if meta["columns"] != self.columns:
+                raise ValueError(f"{filename} has a different column layout")
+            self.rows = meta["rows"]
+
+        self.capacity = max(capacity, self.rows, 1)
+        self._map = self._open_map(self.capacity)
+        self._write_sidecar()
+
+    def _open_map(self, capacity):
+        nbytes = capacity * self.n_cols * 8
+        mode = 'r+b' if os.path.exists(self.filename) else 'w+b'
+        with open(self.filename, mode) as f:
+            f.truncate(nbytes)
+        return np.memmap(self.filename, dtype=np.float64, mode='r+', shape=(capacity, self.n_cols))
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        self._map.flush()
+        del self._map
+        self._map = self._open_map(capacity)
+        self.capacity = capacity
+
+    def _write_sidecar(self):
+        meta = {
+            "format": "float64-memmap",
+            "columns": self.columns,
+            "units": self.units,
+            "rows": self.rows,
+        }
+        tmp = sidecar_path(self.filename) + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, sidecar_path(self.filename))
+
+    def write_rows(self, rows):
+        """Copy a chunk of rows (list of rows or 2-D array) into the memmap."""
+        block = np.asarray(rows, dtype=np.float64)
+        if block.size == 0:
+            return
+        end = self.rows + len(block)
+        if end > self.capacity:
+            self._grow(end)
+        self._map[self.rows:end] = block
+        self.rows = end
+        # Row count is recorded per chunk, like a CSV append
+        self._write_sidecar()
+
+    def flush(self):
+        """Push mapped pages to disk and record the durable row count."""
+        self._map.flush()
+        self._write_sidecar()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        del self._map
+        with open(self.filename, 'r+b') as f:
+            f.truncate(self.rows * self.n_cols * 8)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_memmap(filename):
+    """
+    Map a file written by MemmapSink.
+
+    Params:
+        filename (str): Path to the .f64 file.
+
+    Returns:
+        Tuple[np.memmap, List[str], List[str]]: Read-only (rows, n_columns)
+        array, column names and units.
+    """
+    with open(sidecar_path(filename)) as f:
+        meta = json.load(f)
+    shape = (meta["rows"], len(meta["columns"]))
+    if meta["rows"] == 0:
+        return np.empty(shape), meta["columns"], meta["units"]
+    data = np.memmap(filename, dtype=np.float64, mode='r', shape=shape)
+    return data, meta["columns"], meta["units"]
+
+
+class ParquetSink:
+    """
+    Parquet sink writing one row group per chunk (requires pyarrow).
+
+    Params:
+        filename (str): Output path (*.parquet).
+        variables (List[List[str, str]]): Sampled variables ([name, unit]).
+    """
+
+    def __init__(self, filename, variables):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("ParquetSink needs pyarrow (pip install pyarrow)") from e
+
+        self._pa = pa
+        self.filename = filename
+        self.variables = variables
+        self.columns, self.units = column_layout(variables)
+        self.closed = False
+        fields = [
+            pa.field(name, pa.float64(), metadata={"unit": unit})
+            for name, unit in zip(self.columns, self.units)
+        ]
+        self._schema = pa.schema(fields, metadata={"units": json.dumps(dict(zip(self.columns, self.units)))})
+        self._writer = pq.ParquetWriter(filename, self._schema)
+
+    def write_rows(self, rows):
+        """Write a chunk of rows as one row group."""
+        block = np.asarray(rows, dtype=np.float64)
+        if block.size == 0:
+            return
+        arrays = [self._pa.array(block[:, i]) for i in range(block.shape[1])]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def flush(self):
+        # Row groups are written as they arrive; the footer is written on close
+        pass
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# --- Backend selection and loading ---
+BACKEND_EXTENSIONS = {"csv": "csv", "csv-async": "csv", "memmap": "f64", "parquet": "parquet"}
+
+
+def make_sink(filename, variables, backend="csv", **options):
+    """
+    Open an output sink by backend name.
+
+    Params:
+        filename (str): Output path.
+        variables (List[List[str, str]]): Sampled variables ([name, unit]).
+        backend (str): "csv" (default), "csv-async", "memmap" or "parquet".
+        **options: Passed to the sink (e.g. capacity, max_queue).
+
+    Returns:
+        Sink object with write_rows/flush/close.
+    """
+    from simlog.sinks import AsyncCsvSink, CsvSink
+
+    backends = {
+        "csv": CsvSink,
+        "csv-async": AsyncCsvSink,
+        "memmap": MemmapSink,
+        "parquet": ParquetSink,
+    }
+    if backend not in backends:
+        raise ValueError(f"Unknown output backend {backend!r}, expected one of {sorted(backends)}")
+    return backends[backend](filename, variables, **options)
+
+
+def read_output(filename):
+    """
+    Load any simulation output file into a pandas DataFrame with the usual
+    "Name [unit]" column headers.
+
+    Params:
+        filename (str): .csv, .f64 (memmap) or .parquet file.
+
+    Returns:
+        pandas.DataFrame: Output data.
+    """
+    import pandas as pd
+
+    if filename.endswith(".f64"):
+        data, columns, units = load_memmap(filename)
+        headers = [format_column(name, unit) for name, unit in zip(columns, units)]
+        return pd.DataFrame(np.asarray(data), columns=headers)
+    if filename.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(filename)
+        units = json.loads(table.schema.metadata[b"units"])
+        df = table.to_pandas()
+        df.columns = [format_column(name, units[name]) for name in df.columns]
+        return df
+    return pd.read_csv(filename)
@@ -0,0 +1,495 @@
+import ast
+import csv
+import glob
+import io
+import itertools
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simlog.schema import load_schema, split_app, split_column
+
+# -----------------------------------------------------------------------------
+# Module: Derived Columns
+# Description: Batch version of the Δp tool in Motasing.py. A spec file lists
+#              derived signals as expressions over column names, e.g.
+#
+#                  # name [unit] = expression   (unit optional, inferred)
+#                  DP_inlet = `D-13PT2122:MeasuredValue` - `D-13PT2123:MeasuredValue`
+#                  Flow_1min [kg/h] = rolling_mean(`D-36L00040A-1200PRd:OutletStream.f`, 60)
+#
+#              Column names go in backticks and are written without their
+#              "[unit]" suffix; earlier derived columns can be used the same
+#              way. Units are resolved once per header; +/- need
+#              matching units, as in the interactive Δp check. Every
+#              expression is evaluated as whole-column NumPy operations and
+#              each output file is written once. Large CSV files can be
+#              streamed in fixed-size row chunks (stream_file) so memory stays
+#              bounded regardless of file length.
+# -----------------------------------------------------------------------------
+
+_SPEC_RE = re.compile(r"^(?P<name>[^=\[]+?)\s*(?:\[(?P<unit>[^\]]*)\])?\s*=\s*(?P<expr>.+)$")
+_COLUMN_RE = re.compile(r"`([^`]+)`")
+
+
+# --- Vectorized functions available in expressions ---
+def rolling_mean(x, window):
+    """
+    Trailing moving average over `window` samples (shorter at the start).
+    Windows that contain a NaN are NaN; the running sums skip it, so later
+    windows are unaffected.
+    """
+    window = int(window)
+    x = np.asarray(x, dtype=np.float64)
+    missing = np.isnan(x)
+    c = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, x))))
+    m = np.concatenate(([0], np.cumsum(missing)))
+    out = np.empty(len(x))
+    out[window - 1:] = (c[window:] - c[:-window]) / window
+    out[window - 1:][m[window:] - m[:-window] > 0] = np.nan
+    head = min(window - 1, len(x))
+    out[:head] = c[1:head + 1] / np.arange(1, head + 1)
+    out[:head][m[1:head + 1] > 0] = np.nan
+    return out
+
+
+def diff(x):
+    """Sample-to-sample difference, NaN for the first sample."""
+    return np.concatenate(([np.nan], np.diff(x)))
+
+
+FUNCTIONS = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "rolling_mean": rolling_mean,
+    "diff": diff,
+}
+# Functions whose result keeps the unit of their first argument
+_UNIT_PRESERVING = {"abs", "rolling_mean", "diff"}
+
+
+class DerivedColumn:
+    """
+    One line of a spec file.
+
+    Params:
+        name (str): Name of the new column.
+        unit (str | None): Declared unit, or None to infer it.
+        expression (str): Expression over backtick-quoted column names.
+    """
+
+    def __init__(self, name, unit, expression):
+        self.name = name
+        self.unit = unit
+        self.expression = expression
+        self.columns = _COLUMN_RE.findall(expression)
+        # Backtick names become plain identifiers _col0, _col1, ... for the parser
+        self._slots = {col: f"_col{i}" for i, col in enumerate(dict.fromkeys(self.columns))}
+        source = _COLUMN_RE.sub(lambda m: self._slots[m.group(1)], expression)
+        self._tree = ast.parse(source, mode="eval")
+        _check_tree(self._tree, self.expression, set(self._slots.values()))
+        self._code = compile(self._tree, f"<{name}>", "eval")
+
+    def infer_unit(self, units):
+        """Unit of the result given {column name: unit}."""
+        slot_units = {slot: units[col] for col, slot in self._slots.items()}
+        return _node_unit(self._tree.body, slot_units, self.expression)
+
+    def lookback(self, lookbacks):
+        """
+        Number of earlier samples one output sample depends on, given the
+        lookback of the derived columns this one references.
+        """
+        slot_lookback = {slot: lookbacks.get(col, 0) for col, slot in self._slots.items()}
+        return _node_lookback(self._tree.body, slot_lookback)
+
+    def evaluate(self, arrays):
+        """Evaluate on {column name: ndarray}; returns an ndarray."""
+        env = {slot: arrays[col] for col, slot in self._slots.items()}
+        env.update(FUNCTIONS)
+        return np.asarray(eval(self._code, {"__builtins__": {}}, env), dtype=np.float64)
+
+
+_ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load,
+                  ast.Constant, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
+
+
+def _check_tree(tree, expression, slots):
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax in {expression!r}: {type(node).__name__}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                raise ValueError(f"Unknown function in {expression!r}")
+        elif isinstance(node, ast.Name) and node.id not in slots and node.id not in FUNCTIONS:
+            raise ValueError(f"Column names must be in backticks in {expression!r}: {node.id}")
+
+
+def _node_unit(node, slot_units, expression):
+    """Unit of an expression node; None means a plain number."""
+    if isinstance(node, ast.Constant):
+        return None
+    if isinstance(node, ast.Name):
+        return slot_units[node.id]
+    if isinstance(node, ast.UnaryOp):
+        return _node_unit(node.operand, slot_units, expression)
+    if isinstance(node, ast.Call):
+        if node.func.id in _UNIT_PRESERVING:
+            return _node_unit(node.args[0], slot_units, expression)
+        return "-"
+    left = _node_unit(node.left, slot_units, expression)
+    right = _node_unit(node.right, slot_units, expression)
+    if isinstance(node.op, (ast.Add, ast.Sub)):
+        if left and right and left.lower() != right.lower():
+            raise ValueError(f"Units do not match in {expression!r}: {left} vs {right}")
+        return left or right
+    if isinstance(node.op, ast.Mult):
+        return "*".join(u for u in (left, right) if u) or None
+    if isinstance(node.op, ast.Div):
+        if left and right and left.lower() == right.lower():
+            return "-"
+        return f"{left or '1'}/{right}" if right else left
+    return "-"
+
+
+def _node_lookback(node, slot_lookback):
+    if isinstance(node, ast.Name):
+        return slot_lookback.get(node.id, 0)
+    if isinstance(node, ast.UnaryOp):
+        return _node_lookback(node.operand, slot_lookback)
+    if isinstance(node, ast.BinOp):
+        return max(_node_lookback(node.left, slot_lookback), _node_lookback(node.right, slot_lookback))
+    if isinstance(node, ast.Call):
+        inner = max((_node_lookback(arg, slot_lookback) for arg in node.args), default=0)
+        if node.func.id == "rolling_mean":
+            if not isinstance(node.args[1], ast.Constant):
+                raise ValueError("rolling_mean window must be a number")
+            return inner + int(node.args[1].value) - 1
+        if node.func.id == "diff":
+            return inner + 1
+        return inner
+    return 0
+
+
+def load_spec(path):
+    """
+    Read a spec file ("name [unit] = expression" per line, # comments).
+
+    Returns:
+        List[DerivedColumn]: Derived columns in file order.
+    """
+    specs = []
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            m = _SPEC_RE.match(line)
+            if not m:
+                raise ValueError(f"{path}:{lineno}: expected 'name [unit] = expression'")
+            unit = m.group("unit")
+            specs.append(DerivedColumn(m.group("name").strip(), unit.strip() if unit else None,
+                                       m.group("expr").strip()))
+    return specs
+
+
+def header_index(columns):
+    """
+    Map the base column names of a "Name [unit]" header to (column, unit).
+    Columns of several applications ("App/Tag:Attribute") are also found
+    under "Tag:Attribute", for the first application that has them.
+
+    Params:
+        columns (Iterable[str]): Header columns.
+
+    Returns:
+        dict: {name: (header column, unit or None)}.
+    """
+    index = {}
+    for col in columns:
+        name, unit = split_column(col)
+        index[name] = (col, unit)
+    for name, entry in list(index.items()):
+        index.setdefault(split_app(name)[1], entry)
+    return index
+
+
+def derive(df, specs):
+    """
+    Evaluate all derived columns on a DataFrame in one pass.
+
+    Each referenced column is converted to a float array once; derived columns
+    may reference the ones defined before them.
+
+    Params:
+        df (pandas.DataFrame): Simulation output with "Name [unit]" headers.
+        specs (List[DerivedColumn]): Columns to compute.
+
+    Returns:
+        dict: {"Name [unit]": ndarray} of the new columns, in spec order.
+    """
+    import pandas as pd
+
+    index = header_index(df.columns)
+    arrays = {}
+    for name in source_columns(specs):
+        if name not in index:
+            raise KeyError(f"Column {name!r} used in the spec is not in the file")
+        arrays[name] = pd.to_numeric(df[index[name][0]], errors="coerce").to_numpy(np.float64)
+    return derive_arrays(arrays, {name: unit for name, (_, unit) in index.items()}, specs)
+
+
+def source_columns(specs):
+    """File columns (not derived ones) referenced by the specs, in first-use order."""
+    derived = set()
+    columns = {}
+    for spec in specs:
+        for name in spec.columns:
+            if name not in derived:
+                columns[name] = None
+        derived.add(spec.name)
+    return list(columns)
+
+
+def derive_arrays(arrays, units, specs):
+    """
+    Evaluate the specs on {column name: ndarray}.
+
+    Params:
+        arrays (dict): Source columns as float arrays; derived columns are
+            added to it as they are computed.
+        units (dict): {column name: unit} of the source columns.
+        specs (List[DerivedColumn]): Columns to compute.
+
+    Returns:
+        dict: {"Name [unit]": ndarray} of the new columns, in spec order.
+    """
+    units = dict(units)
+    out = {}
+    for spec in specs:
+        unit = spec.unit or spec.infer_unit(units) or "-"
+        values = spec.evaluate(arrays)
+        out[f"{spec.name} [{unit}]"] = values
+        arrays[spec.name] = values
+        units[spec.name] = unit
+    return out
+
+
+def derived_filename(path, out_dir=None, suffix="_upgraded"):
+    """Output path for a processed file: <name><suffix>.csv, optionally in out_dir."""
+    base, _ = os.path.splitext(os.path.basename(path))
+    return os.path.join(out_dir or os.path.dirname(path), f"{base}{suffix}.csv")
+
+
+def _read_numeric(data, usecols):
+    """
+    Parse columns of CSV lines as floats. Cells that are not numbers become
+    NaN, as with pd.to_numeric(errors="coerce") in derive().
+    """
+    import pandas as pd
+
+    try:
+        return pd.read_csv(io.BytesIO(data), header=None, usecols=usecols, dtype=np.float64)
+    except ValueError:
+        # A non-numeric cell somewhere: parse as text and coerce column by column
+        block = pd.read_csv(io.BytesIO(data), header=None, usecols=usecols, dtype=str)
+        return block.apply(pd.to_numeric, errors="coerce")
+
+
+def stream_file(input_file, specs, output_file=None, chunk_rows=100_000):
+    """
+    Add derived columns to a CSV file chunk by chunk.
+
+    Each chunk of raw lines is copied to the output as text, with the derived
+    values appended; only the referenced columns are parsed as numbers.
+    Windowed functions (rolling_mean, diff) see the last rows of the previous
+    chunk, so the result matches a whole-file evaluation.
+
+    Params:
+        input_file (str): CSV simulation output.
+        specs (List[DerivedColumn] | str): Derived columns or a spec file path.
+        output_file (str | None): Output CSV (default: *_upgraded.csv).
+        chunk_rows (int): Rows per chunk; bounds peak memory.
+
+    Returns:
+        str: Output path.
+    """
+    if isinstance(specs, str):
+        specs = load_spec(specs)
+    output_file = output_file or derived_filename(input_file)
+
+    lookbacks = {}
+    for spec in specs:
+        lookbacks[spec.name] = spec.lookback(lookbacks)
+    overlap = max(lookbacks.values(), default=0)
+
+    # Binary I/O: lines are passed through as bytes without decoding
+    with open(input_file, 'rb') as src, open(output_file, 'wb') as out:
+        header_line = src.readline().rstrip(b"\r\n")
+        schema = load_schema(input_file)
+        units = schema.units()
+        sources = source_columns(specs)
+        positions = {schema.position(name): name for name in sources}
+
+        tail = {name: np.empty(0) for name in sources}
+        new_header = None
+        while True:
+            lines = [line for line in itertools.islice(src, chunk_rows) if line.strip()]
+            if not lines:
+                break
+            block = _read_numeric(b"".join(lines), list(positions))
+            # Prepend the previous chunk's tail so windows span chunk borders
+            skip = len(tail[sources[0]]) if sources else 0
+            arrays = {name: np.concatenate((tail[name], block[pos].to_numpy()))
+                      for pos, name in positions.items()}
+            if overlap:
+                tail = {name: arrays[name][-overlap:] for name in sources}
+            new = derive_arrays(arrays, units, specs)
+
+            if new_header is None:
+                new_header = io.StringIO()
+                csv.writer(new_header, lineterminator="").writerow(new)
+                out.write(header_line + b"," + new_header.getvalue().encode("utf-8") + b"\n")
+            values = [[b"" if v != v else repr(v).encode() for v in col[skip:].tolist()]
+                      for col in new.values()]
+            out.write(b"".join(line.rstrip(b"\r\n") + b"," + b",".join(row) + b"\n"
+                               for line, row in zip(lines, zip(*values))))
+    return output_file
+
+
+def process_file(input_file, specs, output_file=None, chunk_rows=None):
+    """
+    Add all derived columns to one file and write the result once.
+
+    Params:
+        input_file (str): .csv, .f64 or .parquet simulation output.
+        specs (List[DerivedColumn] | str): Derived columns or a spec file path.
+        output_file (str | None): Output CSV (default: *_upgraded.csv).
+        chunk_rows (int | None): Stream CSV input in chunks of this many rows
+            (see stream_file) instead of loading the whole file.
+
+    Returns:
+        str: Output path.
+    """
+    import pandas as pd
+    from simlog.columnar import read_output
+
+    if isinstance(specs, str):
+        specs = load_spec(specs)
+    output_file = output_file or derived_filename(input_file)
+    if chunk_rows and input_file.endswith(".csv"):
+        return stream_file(input_file, specs, output_file, chunk_rows)
+    df = read_output(input_file)
+    new = pd.DataFrame(derive(df, specs), index=df.index)
+    pd.concat([df, new], axis=1).to_csv(output_file, index=False)
+    return output_file
+
+
+def process_directory(directory, spec_file, out_dir=None, pattern="*.csv", workers=None, chunk_rows=None):
+    """
+    Run process_file on every matching file of a directory in a process pool.
+
+    Params:
+        directory (str): Directory with result files.
+        spec_file (str): Spec file path (parsed in each worker).
+        out_dir (str | None): Where to write results (default: next to inputs).
+        pattern (str): Glob for the input files.
+        workers (int | None): Worker processes (default: CPU count).
+        chunk_rows (int | None): Stream CSV inputs in chunks (see stream_file).
+
+    Returns:
+        List[str]: Output paths.
+    """
+    load_spec(spec_file)  # fail early on a bad spec
+    files = sorted(f for f in glob.glob(os.path.join(directory, pattern))
+                   if not f.endswith("_upgraded.csv"))
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    outputs = [derived_filename(f, out_dir) for f in files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(process_file, files, [spec_file] * len(files), outputs,
+                             [chunk_rows] * len(files)))
+
+
+# --- Benchmark ---
+def _whole_file_dp(input_file, output_file, first, second):
+    """The original Motasing.py approach: read everything, add a column, write everything."""
+    import pandas as pd
+
+    df = pd.read_csv(input_file)
+    df["DP [barg]"] = pd.to_numeric(df[first], errors="coerce") - pd.to_numeric(df[second], errors="coerce")
+    df.to_csv(output_file, index=False)
+
+
+def _measure(method, input_file, output_file, rows, spec_file, first, second, chunk_rows):
+    """Run one method and report wall time and this process's peak RSS."""
+    start = time.perf_counter()
+    if method == "whole-file":
+        _whole_file_dp(input_file, output_file, first, second)
+    else:
+        stream_file(input_file, spec_file, output_file, chunk_rows)
+    wall = time.perf_counter() - start
+    return method, rows / wall, _peak_rss_mb()
+
+
+def _peak_rss_mb():
+    """Peak RSS of this process in MB (NaN where it cannot be read)."""
+    # VmHWM starts over at exec; ru_maxrss would include the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:  # Windows
+        return float("nan")
+
+
+def benchmark_streaming(rows=1_000_000, n_variables=18, chunk_rows=10_000):
+    """
+    Compare the whole-file Δp approach with stream_file on a synthetic log.
+    Each method runs in a fresh process so the peak RSS figures are separate.
+
+    Returns:
+        List[Tuple[str, float, float]]: (method, rows/s, peak RSS in MB).
+    """
+    import tempfile
+
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, "log.csv")
+        columns = {"ModelTime [s]": np.arange(1, rows + 1, dtype=np.float64)}
+        for i in range(n_variables):
+            columns[f"VAR{i}:Value [barg]"] = np.random.rand(rows)
+        pd.DataFrame(columns).to_csv(input_file, index=False)
+        del columns
+        spec_file = os.path.join(tmp, "dp.spec")
+        with open(spec_file, 'w') as f:
+            f.write("DP = `VAR0:Value` - `VAR1:Value`\n")
+
+        results = []
+        for method in ("whole-file", "streaming"):
+            # spawn, not fork: a forked child would inherit the parent's memory
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                results.append(pool.submit(_measure, method, input_file, os.path.join(tmp, f"{method}.csv"),
+                                           rows, spec_file, "VAR0:Value [barg]", "VAR1:Value [barg]",
+                                           chunk_rows).result())
+        return results
+
+
+if __name__ == "__main__":
+    print(f"{'method':>12} {'rows/s':>10} {'peak RSS [MB]':>14}")
+    for method, rate, peak in benchmark_streaming():
+        print(f"{method:>12} {rate:>10.0f} {peak:>14.0f}")
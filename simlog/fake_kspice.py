@@ -0,0 +1,119 @@
+import json
+import math
+import os
+import time
+from datetime import timedelta
+
+# -----------------------------------------------------------------------------
+# Module: Fake K-Spice
+# Description: Minimal stand-in for the parts of the kspice API used by the
+#              simulation scripts (Simulator, Timeline, applications). Values
+#              are deterministic functions of model time so runs are
+#              reproducible. Optional per-call delays model the cost of the
+#              real simulator for benchmarks. Saved initial conditions are
+#              JSON files in the project directory holding the model time
+#              and the values that were set.
+# -----------------------------------------------------------------------------
+
+
+class FakeApplication:
+    """Application handle exposing a ``name`` like kspice applications."""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeTimeline:
+    """
+    Timeline stand-in with the same call surface as kspice.Timeline.
+
+    Params:
+        applications (List[str]): Application names on the timeline.
+        run_overhead (float): Wall seconds spent per run_for call.
+        read_overhead (float): Wall seconds spent per get_values call.
+        project_path (str | None): Directory of saved initial conditions.
+    """
+
+    def __init__(self, applications=("Hugin A", "Hugin B"), run_overhead=0.0, read_overhead=0.0,
+                 project_path=None):
+        self.applications = [FakeApplication(name) for name in applications]
+        self.run_overhead = run_overhead
+        self.read_overhead = read_overhead
+        self.model_time = timedelta(0)
+        self.speed = 1.0
+        self.loaded = None
+        self.run_calls = 0
+        self.read_calls = 0
+        self.project_path = project_path
+        self._values = {}
+
+    # --- Lifecycle ---
+    def load(self, model, parameters, values):
+        self.loaded = (model, parameters, values)
+
+    def _initial_condition_path(self, name):
+        return os.path.join(self.project_path or ".", f"{name}.fake_ic.json")
+
+    def initialize(self):
+        self.model_time = timedelta(0)
+        self._values = {}
+        path = self._initial_condition_path(self.loaded[2]) if self.loaded else None
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            self.model_time = timedelta(seconds=saved["model_time"])
+            self._values = {(app, name): value for app, name, value in saved["values"]}
+
+    def save_initial_condition(self, name):
+        """Save the current state (model time and set values) as initial condition name."""
+        with open(self._initial_condition_path(name), 'w') as f:
+            json.dump({"model_time": self.model_time.total_seconds(),
+                       "values": [[app, var, value] for (app, var), value in self._values.items()]}, f)
+
+    def set_speed(self, speed):
+        self.speed = speed
+
+    # --- Stepping ---
+    def run_for(self, duration):
+        self.run_calls += 1
+        if self.run_overhead:
+            time.sleep(self.run_overhead)
+        self.model_time += duration
+
+    # --- Values ---
+    def _signal(self, app, name):
+        """Deterministic signal for a variable at the current model time."""
+        key = (app, name)
+        if key in self._values:
+            return self._values[key]
+        seed = sum(map(ord, name)) % 97
+        t = self.model_time.total_seconds()
+        return seed + math.sin(t / (60.0 + seed))
+
+    def get_value(self, app, name):
+        return self._signal(app, name)
+
+    def set_value(self, app, name, value):
+        self._values[(app, name)] = value
+
+    def get_values(self, app, variables):
+        self.read_calls += 1
+        if self.read_overhead:
+            time.sleep(self.read_overhead)
+        return [self._signal(app, var[0]) for var in variables]
+
+
+class FakeSimulator:
+    """Simulator stand-in; every activated timeline is a fresh FakeTimeline."""
+
+    def __init__(self, project_path, **timeline_options):
+        self.project_path = project_path
+        self.timeline_options = timeline_options
+
+    def activate_timeline(self, name):
+        return FakeTimeline(project_path=self.project_path, **self.timeline_options)
+
+
+# kspice-compatible aliases so this module can be passed where kspice is expected
+Simulator = FakeSimulator
+Timeline = FakeTimeline
@@ -0,0 +1,391 @@
+import glob
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simlog.columnar import read_output
+from simlog.manifest import RunManifest, manifest_path
+from simlog.schema import split_column
+
+# -----------------------------------------------------------------------------
+# Module: Step-Response Identification
+# Description: Fits a first-order-plus-dead-time model
+#
+#                  y(t) = y0 + K * (1 - exp(-(t - delay) / tau)),  t > delay
+#
+#              to every logged variable of the step experiments. For a fixed
+#              (delay, tau) the model is linear in K, so instead of one
+#              nonlinear curve_fit per column, the responses of all files and
+#              columns are binned onto one shared time grid and every
+#              candidate (delay, tau) on a grid is scored against every
+#              column with a single matrix product; the best candidate of
+#              each column is then refined on shrinking local grids. Grid
+#              points are weighted by their sample count, so files of
+#              different lengths (e.g. runs ended early on steady state)
+#              share the grid. The step time and input change come from the
+#              run manifest when there is one.
+# -----------------------------------------------------------------------------
+
+# Response of one file after the step, relative to the pre-step baseline
+Response = namedtuple("Response", ["filename", "parameter", "step", "variables", "t", "dy", "baseline"])
+
+# One row per file, one column per variable; gain = change / step
+SweepFit = namedtuple("SweepFit", ["files", "parameters", "variables", "step", "change", "gain",
+                                   "tau", "delay", "r2", "baseline"])
+
+
+def manifest_step(filename, times):
+    """
+    Step time and input change of a scenario output from its manifest.
+
+    Params:
+        filename (str): Output file with a manifest (see simlog.manifest).
+        times (np.ndarray): The file's model times.
+
+    Returns:
+        Tuple[float, str | None, float]: Model time of the step (last
+        pre-step sample), stepped parameter and its change (nan if unknown).
+    """
+    manifest = RunManifest.load(filename)
+    warmup = manifest.data.get("settled", {}).get("warmup")
+    warmup_s = warmup["ended_s"] if warmup else manifest.data["scenario"]["warmup_minutes"] * 60
+    # Recorded times start one sample after the start of the warmup, or after
+    # its end when a restored warmup left its rows out
+    start = times[0] - (times[1] - times[0]) if len(times) > 1 else times[0] - 1
+    warm_start = manifest.data.get("warm_start")
+    if warm_start and not warm_start["warmup_rows"]:
+        warmup_s = 0
+    adjustments = manifest.data["adjustments"]
+    if adjustments:
+        adj = adjustments[0]
+        return start + warmup_s, adj["parameter"], adj["new"] - adj["old"]
+    return start + warmup_s, manifest.data["scenario"].get("parameter"), np.nan
+
+
+def load_response(filename, step_time=None, pre_s=300.0):
+    """
+    Read a result file and split it at the step.
+
+    Params:
+        filename (str): .csv, .f64 or .parquet output.
+        step_time (float | None): Model time of the last sample before the
+            step (default: from the file's manifest).
+        pre_s (float): Seconds before the step averaged for the baseline.
+
+    Returns:
+        Response: Post-step times relative to the step (starting at 0 with
+        the last pre-step sample) and changes from the baseline.
+    """
+    df = read_output(filename)
+    data = df.to_numpy(dtype=np.float64)
+    times, values = data[:, 0], data[:, 1:]
+    parameter, step = None, np.nan
+    if step_time is None:
+        if not os.path.exists(manifest_path(filename)):
+            raise ValueError(f"{filename}: no manifest, pass the step time")
+        step_time, parameter, step = manifest_step(filename, times)
+
+    first = np.searchsorted(times, step_time, side="right") - 1
+    if first < 0 or first >= len(times) - 1:
+        raise ValueError(f"{filename}: step at {step_time}s is outside the recorded time range")
+    pre = (times > step_time - pre_s) & (times <= step_time)
+    baseline = values[pre].mean(axis=0)
+    return Response(filename, parameter, step, [split_column(col)[0] for col in df.columns[1:]],
+                    times[first:] - step_time, values[first:] - baseline, baseline)
+
+
+def response_grid(horizon, dt, n_points=600):
+    """
+    Shared time grid from 0 to horizon: half the points uniform, half
+    geometric from dt, so fast responses are resolved as well as slow ones.
+    """
+    return np.unique(np.concatenate((np.linspace(0, horizon, n_points // 2),
+                                     np.geomspace(dt, horizon, n_points - n_points // 2))))
+
+
+def resample(t, y, grid):
+    """
+    Bin all columns of y (len(t), columns) onto grid in one pass: each grid
+    point gets the mean of the samples nearer to it than to its neighbours,
+    and the sample count as its least-squares weight, so fitting on the grid
+    still uses every sample.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (len(grid), columns) bin means (0 for
+        empty bins) and the (len(grid),) sample counts.
+    """
+    edges = np.concatenate(([-np.inf], (grid[1:] + grid[:-1]) / 2))
+    starts = np.searchsorted(t, edges)
+    counts = np.diff(np.append(starts, len(t)))
+    sums = np.add.reduceat(y, np.minimum(starts, len(t) - 1), axis=0)
+    sums[counts == 0] = 0.0   # reduceat yields a sample, not 0, for an empty bin
+    return sums / np.maximum(counts, 1)[:, None], counts
+
+
+def _basis(t, delay, tau):
+    """First-order step responses of unit gain, one row per (delay, tau)."""
+    return -np.expm1(-np.maximum(t - delay[..., None], 0.0) / tau[..., None])
+
+
+def _explained(num, den):
+    """Squared norm of the least-squares fit, num**2 / den (0 where den is 0)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num * num / den, 0.0)
+
+
+def _zoom(t, ym, mask, tau, delay, log_step, delay_step, rounds, chunk=256):
+    """
+    Refine each column's (tau, delay) on a 5 x 5 local grid of half the
+    previous spacing, rounds times. Columns are processed in chunks to bound
+    the (columns, 25, T) basis.
+    """
+    offsets = np.linspace(-1.0, 1.0, 5)
+    tau_offsets, delay_offsets = np.repeat(offsets, 5), np.tile(offsets, 5)
+    for _ in range(rounds):
+        candidates_tau = tau[:, None] * np.exp(tau_offsets * log_step)
+        candidates_delay = np.maximum(delay[:, None] + delay_offsets * delay_step, 0.0)
+        for lo in range(0, len(tau), chunk):
+            cols = slice(lo, lo + chunk)
+            phi = _basis(t, candidates_delay[cols], candidates_tau[cols])
+            num = np.einsum("cjt,tc->cj", phi, ym[:, cols])
+            den = np.einsum("cjt,tc->cj", phi * phi, mask[:, cols])
+            best = _explained(num, den).argmax(axis=1)
+            rows = np.arange(len(best))
+            tau[cols] = candidates_tau[cols][rows, best]
+            delay[cols] = candidates_delay[cols][rows, best]
+        log_step, delay_step = log_step / 2, delay_step / 2
+    return tau, delay
+
+
+def fit_fopdt(t, dy, mask=None, n_tau=60, n_delay=40, tau_range=None, max_delay=None, refine=5):
+    """
+    Least-squares FOPDT fit of many responses on a shared time grid.
+
+    Params:
+        t (np.ndarray): (T,) times since the step.
+        dy (np.ndarray): (T, C) changes from the pre-step baseline.
+        mask (np.ndarray | None): (T, C) weights, e.g. samples per grid
+            point; 0 where a column has no sample (default all 1).
+        n_tau (int): Candidate time constants (geometric in tau_range).
+        n_delay (int): Candidate delays (uniform in [0, max_delay]).
+        tau_range (Tuple[float, float] | None): Default from the first grid
+            step to twice the horizon.
+        max_delay (float | None): Default a quarter of the horizon.
+        refine (int): Local refinement rounds after the grid search, each
+            halving the spacing around every column's best candidate.
+
+    Returns:
+        Tuple[np.ndarray, ...]: Per column gain, tau, delay and r2 (nan for
+        columns without samples or without any change).
+    """
+    t = np.asarray(t, dtype=np.float64)
+    dy = np.asarray(dy, dtype=np.float64)
+    mask = np.ones_like(dy) if mask is None else np.asarray(mask, dtype=np.float64)
+    horizon = t[-1]
+    low, high = tau_range or (t[t > 0][0], 2 * horizon)
+    taus = np.geomspace(low, high, n_tau)
+    delays = np.linspace(0, max_delay if max_delay is not None else horizon / 4, n_delay)
+
+    # Score of every candidate on every column: K = <phi, dy> / <phi, phi>
+    dd, tt = np.meshgrid(delays, taus, indexing="ij")
+    phi = _basis(t, dd.ravel(), tt.ravel())
+    ym = dy * mask
+    best = _explained(phi @ ym, (phi * phi) @ mask).argmax(axis=0)
+    tau, delay = tt.ravel()[best], dd.ravel()[best]
+    tau, delay = _zoom(t, ym, mask, tau, delay, np.log(taus[1] / taus[0]),
+                       delays[1] - delays[0] if n_delay > 1 else 0.0, refine)
+
+    # Gain and fit quality at the refined parameters, all columns at once
+    phi = _basis(t, delay, tau).T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gain = (phi * ym).sum(axis=0) / (phi * phi * mask).sum(axis=0)
+        n = mask.sum(axis=0)
+        mean = ym.sum(axis=0) / n
+        sst = (((dy - mean) ** 2) * mask).sum(axis=0)
+        sse = (((dy - gain * phi) ** 2) * mask).sum(axis=0)
+        r2 = np.where(sst > 0, 1 - sse / sst, np.nan)
+    empty = n == 0
+    flat = sst == 0
+    gain[empty] = np.nan
+    tau[empty | flat] = np.nan
+    delay[empty | flat] = np.nan
+    return gain, tau, delay, r2
+
+
+def fit_responses(responses, n_points=600, **options):
+    """
+    Fit a list of Responses together on one grid covering the longest.
+
+    Params:
+        responses (List[Response]): From load_response.
+        n_points (int): Grid points (see response_grid).
+        **options: Passed to fit_fopdt.
+
+    Returns:
+        SweepFit: One row per response, columns are the union of their
+        variables (nan where a file does not log one).
+    """
+    variables = list(dict.fromkeys(name for r in responses for name in r.variables))
+    index = {name: j for j, name in enumerate(variables)}
+    dt = min(np.median(np.diff(r.t)) for r in responses)
+    grid = response_grid(max(r.t[-1] for r in responses), dt, n_points)
+
+    n_files, n_vars = len(responses), len(variables)
+    dy = np.zeros((len(grid), n_files, n_vars))
+    mask = np.zeros_like(dy)
+    baseline = np.full((n_files, n_vars), np.nan)
+    for f, r in enumerate(responses):
+        columns = [index[name] for name in r.variables]
+        values, counts = resample(r.t, r.dy, grid)
+        dy[:, f, columns] = values
+        mask[:, f, columns] = counts[:, None]
+        baseline[f, columns] = r.baseline
+
+    gain, tau, delay, r2 = (a.reshape(n_files, n_vars) for a in
+                            fit_fopdt(grid, dy.reshape(len(grid), -1), mask.reshape(len(grid), -1),
+                                      **options))
+    step = np.array([r.step for r in responses], dtype=np.float64)
+    # Without a known input change the gain matrix holds the raw output change
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized = gain / np.where(np.isnan(step) | (step == 0), 1.0, step)[:, None]
+    return SweepFit([r.filename for r in responses], [r.parameter for r in responses], variables,
+                    step, gain, normalized, tau, delay, r2, baseline)
+
+
+def identify_file(filename, step_time=None, pre_s=300.0, **options):
+    """FOPDT fit of every column of one result file (see fit_responses)."""
+    return fit_responses([load_response(filename, step_time, pre_s)], **options)
+
+
+def identify_sweep(directory, pattern="*.csv", step_times=None, workers=None, pre_s=300.0, **options):
+    """
+    Fit every result file of a sweep directory; files are read and split at
+    their step in a process pool, then fitted together in one pass.
+
+    Params:
+        directory (str): Directory with result files and their manifests.
+        pattern (str): Glob for the result files.
+        step_times (dict | None): {filename: step time} for files without a
+            manifest.
+        workers (int | None): Worker processes (default: CPU count).
+        pre_s (float): Seconds before the step averaged for the baseline.
+        **options: Passed to fit_fopdt (or n_points to the grid).
+
+    Returns:
+        SweepFit: Rows in sorted filename order; see gain_frame for the
+        gain matrix as a table.
+    """
+    files = sorted(glob.glob(os.path.join(directory, pattern)))
+    if not files:
+        raise FileNotFoundError(f"No files matching {pattern} in {directory}")
+    step_times = step_times or {}
+    steps = [step_times.get(f) for f in files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        responses = list(pool.map(load_response, files, steps, [pre_s] * len(files)))
+    return fit_responses(responses, **options)
+
+
+def gain_frame(fit, field="gain"):
+    """
+    One field of a SweepFit as a DataFrame: rows labelled by the stepped
+    parameter (or file name), one column per variable.
+    """
+    import pandas as pd
+
+    labels = [parameter or os.path.basename(filename)
+              for parameter, filename in zip(fit.parameters, fit.files)]
+    return pd.DataFrame(getattr(fit, field), index=labels, columns=fit.variables)
+
+
+# --- Benchmark ---
+def write_synthetic_sweep(directory, n_files=36, rows=10_000, n_variables=18, warmup_s=1800,
+                          noise=0.002, seed=0):
+    """
+    Write result files of FOPDT responses to a step, with manifests like the
+    scenario runner's.
+
+    Returns:
+        dict: True gain (change), tau and delay as (n_files, n_variables) arrays.
+    """
+    from simlog.schema import format_column
+
+    rng = np.random.default_rng(seed)
+    truth = {
+        "change": rng.uniform(-5, 5, (n_files, n_variables)),
+        "tau": np.exp(rng.uniform(np.log(20), np.log(1500), (n_files, n_variables))),
+        "delay": rng.uniform(0, 120, (n_files, n_variables)),
+    }
+    t = np.arange(1, rows + 1, dtype=np.float64)
+    header = ",".join([format_column("ModelTime", "s")] +
+                      [format_column(f"VAR{j}:Value", "-") for j in range(n_variables)])
+    for f in range(n_files):
+        since = np.maximum(t[:, None] - warmup_s - truth["delay"][f], 0.0)
+        y = 50 + truth["change"][f] * -np.expm1(-since / truth["tau"][f])
+        y += rng.normal(0, noise * 50, y.shape)
+        filename = os.path.join(directory, f"sweep_state{f:03d}.csv")
+        np.savetxt(filename, np.column_stack((t, y)), delimiter=",", header=header, comments="",
+                   fmt="%.6g")
+        manifest = RunManifest.create(filename, f, {"warmup_minutes": warmup_s / 60,
+                                                    "parameter": f"P{f}", "multiplier": 1.1})
+        manifest.record_adjustment("app", f"P{f}", 10.0, 11.0)
+    return truth
+
+
+def benchmark_identify(n_files=36, rows=10_000, n_variables=18, curve_fit_columns=18, directory=None):
+    """
+    Time identify_sweep on a synthetic sweep against per-column
+    scipy.optimize.curve_fit (on curve_fit_columns columns, extrapolated),
+    and report the parameter errors.
+
+    Returns:
+        List[dict]: Method, columns, wall time and median relative errors.
+    """
+    import tempfile
+
+    from scipy.optimize import curve_fit
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        truth = write_synthetic_sweep(tmp, n_files, rows, n_variables)
+        results = []
+
+        def errors(gain, tau, delay, true):
+            return {
+                "gain_err": float(np.median(np.abs(gain / true["change"] - 1))),
+                "tau_err": float(np.median(np.abs(tau / true["tau"] - 1))),
+                "delay_err_s": float(np.median(np.abs(delay - true["delay"]))),
+            }
+
+        start = time.perf_counter()
+        fit = identify_sweep(tmp)
+        wall = time.perf_counter() - start
+        results.append({"method": "identify_sweep", "columns": n_files * n_variables, "wall_s": wall,
+                        **errors(fit.change, fit.tau, fit.delay, truth)})
+
+        def model(t, k, tau, delay):
+            return k * -np.expm1(-np.maximum(t - delay, 0.0) / tau)
+
+        start = time.perf_counter()
+        params = []
+        for c in range(curve_fit_columns):
+            f, j = divmod(c, n_variables)
+            r = load_response(fit.files[f])
+            p, _ = curve_fit(model, r.t, r.dy[:, j], p0=(r.dy[-1, j], 300.0, 10.0),
+                             bounds=([-np.inf, 1.0, 0.0], [np.inf, 1e5, r.t[-1] / 4]))
+            params.append(p)
+        wall = time.perf_counter() - start
+        gain, tau, delay = np.array(params).T
+        f, j = np.divmod(np.arange(curve_fit_columns), n_variables)
+        results.append({"method": "curve_fit (extrapolated)", "columns": n_files * n_variables,
+                        "wall_s": wall / curve_fit_columns * n_files * n_variables,
+                        **errors(gain, tau, delay, {key: value[f, j] for key, value in truth.items()})})
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'method':>24} {'columns':>8} {'wall [s]':>9} {'gain err':>9} {'tau err':>8} {'delay err [s]':>13}")
+    for r in benchmark_identify():
+        print(f"{r['method']:>24} {r['columns']:>8} {r['wall_s']:>9.2f} {r['gain_err']:>9.4f} "
+              f"{r['tau_err']:>8.4f} {r['delay_err_s']:>13.2f}")
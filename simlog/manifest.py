@@ -0,0 +1,210 @@
+import glob
+import json
+import os
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Module: Run Manifests
+# Description: A small JSON file written next to each output file that records
+#              how far a scenario got (model time at its start, completed
+#              phases, last flushed model time, applied parameter
+#              adjustments). Together with the rows
+#              already on disk it lets an interrupted scenario be resumed
+#              instead of restarted.
+# -----------------------------------------------------------------------------
+
+
+def manifest_path(filename):
+    """Path of the manifest that belongs to an output file."""
+    return filename + ".manifest.json"
+
+
+class RunManifest:
+    """
+    Progress record of one scenario's output file.
+
+    Params:
+        filename (str): Output file the manifest describes.
+        data (dict): Manifest content (see create()).
+    """
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.data = data
+
+    @classmethod
+    def create(cls, filename, state, scenario, start_model_time=0.0):
+        """
+        Start a new manifest for a scenario (a dict of its parameters).
+        start_model_time is the timeline clock after loading the initial
+        condition; the recorded model times are absolute, so progress in
+        seconds is measured from it.
+        """
+        return cls(filename, {
+            "state": state,
+            "scenario": scenario,
+            "output": os.path.basename(filename),
+            "start_model_time": start_model_time,
+            "phases_completed": [],
+            "adjustments": [],
+            "last_model_time": None,
+            "rows_flushed": 0,
+            "settled": {},
+            "warm_start": None,
+            "complete": False,
+        })
+
+    @classmethod
+    def load(cls, filename):
+        with open(manifest_path(filename)) as f:
+            return cls(filename, json.load(f))
+
+    def save(self):
+        """Write the manifest atomically (write temp file, then rename)."""
+        path = manifest_path(self.filename)
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, path)
+
+    def elapsed(self, model_time):
+        """Seconds into the scenario at a recorded model time (manifests without a start: 0)."""
+        return model_time - self.data.get("start_model_time", 0.0)
+
+    def phase_done(self, phase):
+        return phase in self.data["phases_completed"]
+
+    def mark_phase(self, phase):
+        if not self.phase_done(phase):
+            self.data["phases_completed"].append(phase)
+        self.save()
+
+    def record_adjustment(self, app, parameter, old_value, new_value):
+        self.data["adjustments"].append({
+            "app": app, "parameter": parameter, "old": old_value, "new": new_value,
+        })
+        self.save()
+
+    def record_flush(self, last_model_time, rows):
+        self.data["last_model_time"] = last_model_time
+        self.data["rows_flushed"] += rows
+        self.save()
+
+    def record_settle(self, phase, settled_s, ended_s):
+        """Record that steady-state detection ended a phase early (seconds from the phase start)."""
+        self.data.setdefault("settled", {})[phase] = {"settled_s": settled_s, "ended_s": ended_s}
+        self.save()
+
+    def record_warm_start(self, key, mode, warmup_rows):
+        """
+        Record that the run started from a cached warmup (simlog.warmcache):
+        mode "initial-condition" (full state, warmup rows copied into the
+        output) or "state-variables" (approximate, output starts after the warmup).
+        """
+        self.data["warm_start"] = {"key": key, "mode": mode, "warmup_rows": warmup_rows}
+        self.save()
+
+    def mark_complete(self):
+        self.data["complete"] = True
+        self.save()
+
+
+class ManifestSink:
+    """
+    Sink wrapper that records every chunk handed to the wrapped sink in the
+    manifest (last model time and row count).
+
+    Params:
+        sink (object): Sink from simlog.columnar.make_sink.
+        manifest (RunManifest): Manifest of the same output file.
+    """
+
+    def __init__(self, sink, manifest):
+        self.sink = sink
+        self.manifest = manifest
+        self.filename = sink.filename
+
+    def write_rows(self, rows):
+        if len(rows) == 0:
+            return
+        last_time = float(rows[-1][0])
+        self.sink.write_rows(rows)
+        self.manifest.record_flush(last_time, len(rows))
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def truncate_to_durable(filename, tail_bytes=65536):
+    """
+    Cut an output file back to its last complete row.
+
+    A CSV line that was only partly written when the process died is removed;
+    a memmap file is trusted up to the row count in its sidecar.
+
+    Params:
+        filename (str): .csv or .f64 output file.
+        tail_bytes (int): How much of the end of a CSV file is inspected.
+
+    Returns:
+        float: Model time of the last complete row (0.0 if there is none).
+    """
+    if filename.endswith(".f64"):
+        from simlog.columnar import load_memmap
+
+        data, _, _ = load_memmap(filename)
+        return float(data[-1, 0]) if len(data) else 0.0
+    if filename.endswith(".parquet"):
+        raise ValueError("Parquet output has no footer until it is closed and cannot be resumed")
+
+    if not os.path.exists(filename):
+        return 0.0
+    with open(filename, 'rb+') as f:
+        size = f.seek(0, 2)
+        start = max(0, size - tail_bytes)
+        f.seek(start)
+        tail = f.read()
+        end = tail.rfind(b"\n") + 1
+        if start + end != size:
+            # Drop the partial last line
+            f.truncate(start + end)
+    lines = tail[:end].splitlines()
+    if not lines:
+        return 0.0
+    try:
+        return float(lines[-1].split(b",", 1)[0])
+    except ValueError:
+        # Only the header is on disk
+        return 0.0
+
+
+def latest_manifest(project_name, state, extension):
+    """
+    Find the most recent manifest for a project/state, as generated by
+    generate_filename.
+
+    Returns:
+        RunManifest | None: Latest manifest, or None if the state never ran.
+    """
+    pattern = f"{glob.escape(project_name)}_state{state}_*.{extension}"
+    candidates = glob.glob(manifest_path(pattern))
+    if not candidates:
+        return None
+    path = max(candidates, key=os.path.getmtime)
+    return RunManifest.load(path[:-len(".manifest.json")])
+
+
+def rows_after(rows, model_time):
+    """Rows of a (n, columns) array whose model time is later than model_time."""
+    rows = np.asarray(rows)
+    return rows[rows[:, 0] > model_time] if len(rows) else rows
@@ -0,0 +1,375 @@
+import bisect
+import json
+import os
+import shutil
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from simlog.schema import HeaderSchema, load_schema
+
+# -----------------------------------------------------------------------------
+# Module: Plot Pyramid
+# Description: Min/max/mean decimation of long result files for plotting.
+#              One streaming pass over a .csv, .f64 or .parquet log reduces
+#              every base_rows samples to a bucket (time span, sample count,
+#              and per column the minimum, mean and maximum); each further
+#              level merges factor buckets of the one below, until a level
+#              has at most max_points buckets. The levels are stored as
+#              float64 files in <file>.pyramid/ next to the log. A time window
+#              is then served from the finest level that fits the requested
+#              number of points, reading only the buckets inside the window
+#              instead of the raw file. Keeping the minimum and maximum (as
+#              in M4 decimation) means spikes survive at every zoom level.
+# -----------------------------------------------------------------------------
+
+# Samples per level-0 bucket, buckets merged per level, and the most buckets
+# the top level may have
+BASE_ROWS = 10
+FACTOR = 8
+MAX_POINTS = 2000
+
+# Bucket record layout: t_start, t_end, count, then min, mean and max blocks
+# with one entry per data column (all columns but ModelTime)
+_T_START, _T_END, _COUNT, _STATS = 0, 1, 2, 3
+
+Window = namedtuple("Window", ["level", "rows_per_bucket", "t_start", "t_end", "count",
+                               "min", "mean", "max", "columns"])
+
+
+def pyramid_path(filename):
+    """Directory of the plot pyramid that belongs to a result file."""
+    return filename + ".pyramid"
+
+
+def iter_blocks(filename, chunk_rows=100_000):
+    """
+    Read a result file as consecutive float64 row blocks.
+
+    Params:
+        filename (str): .csv, .f64 (memmap) or .parquet file.
+        chunk_rows (int): Rows per block; bounds peak memory.
+
+    Yields:
+        np.ndarray: (rows, columns) block, ModelTime in column 0.
+    """
+    if filename.endswith(".f64"):
+        from simlog.columnar import load_memmap
+
+        data, _, _ = load_memmap(filename)
+        for start in range(0, len(data), chunk_rows):
+            yield np.asarray(data[start:start + chunk_rows])
+    elif filename.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(filename).iter_batches(batch_size=chunk_rows):
+            yield np.column_stack([column.to_numpy(zero_copy_only=False).astype(np.float64)
+                                   for column in batch.columns])
+    else:
+        import pandas as pd
+
+        for block in pd.read_csv(filename, chunksize=chunk_rows, dtype=np.float64):
+            yield block.to_numpy()
+
+
+def _reduce_rows(rows, size):
+    """Level-0 buckets of size consecutive samples (the last may be shorter)."""
+    n, k = len(rows), rows.shape[1] - 1
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n)
+    out = np.empty((len(starts), _STATS + 3 * k))
+    out[:, _T_START] = rows[starts, 0]
+    out[:, _T_END] = rows[ends - 1, 0]
+    out[:, _COUNT] = ends - starts
+    data = rows[:, 1:]
+    # fmin/fmax skip NaN samples; a NaN makes the bucket mean NaN
+    out[:, _STATS:_STATS + k] = np.fmin.reduceat(data, starts, axis=0)
+    out[:, _STATS + k:_STATS + 2 * k] = np.add.reduceat(data, starts, axis=0) / out[:, _COUNT, None]
+    out[:, _STATS + 2 * k:] = np.fmax.reduceat(data, starts, axis=0)
+    return out
+
+
+def _reduce_buckets(buckets, size):
+    """Merge size consecutive buckets (the last group may be shorter)."""
+    n, k = len(buckets), (buckets.shape[1] - _STATS) // 3
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n)
+    count = buckets[:, _COUNT]
+    out = np.empty((len(starts), buckets.shape[1]))
+    out[:, _T_START] = buckets[starts, _T_START]
+    out[:, _T_END] = buckets[ends - 1, _T_END]
+    out[:, _COUNT] = np.add.reduceat(count, starts)
+    out[:, _STATS:_STATS + k] = np.fmin.reduceat(buckets[:, _STATS:_STATS + k], starts, axis=0)
+    # Sample-weighted mean of the bucket means
+    weighted = buckets[:, _STATS + k:_STATS + 2 * k] * count[:, None]
+    out[:, _STATS + k:_STATS + 2 * k] = np.add.reduceat(weighted, starts, axis=0) / out[:, _COUNT, None]
+    out[:, _STATS + 2 * k:] = np.fmax.reduceat(buckets[:, _STATS + 2 * k:], starts, axis=0)
+    return out
+
+
+class _Level:
+    """
+    One pyramid level being written: reduces its input in whole groups of
+    size and keeps the remainder until more input (or the end) arrives.
+    """
+
+    def __init__(self, directory, index, size, reduce):
+        self.path = os.path.join(directory, f"level{index}.f64")
+        self.file = open(self.path, 'wb')
+        self.size = size
+        self.reduce = reduce
+        self.pending = None
+        self.buckets = 0
+
+    def feed(self, records, final=False):
+        """Reduce the complete groups (all groups if final); returns the new buckets."""
+        if self.pending is not None:
+            records = np.concatenate((self.pending, records)) if len(records) else self.pending
+        whole = len(records) if final else len(records) // self.size * self.size
+        self.pending = records[whole:] if whole < len(records) else None
+        if whole == 0:
+            return np.empty((0, 0))
+        buckets = self.reduce(records[:whole], self.size)
+        self.file.write(buckets.tobytes())
+        self.buckets += len(buckets)
+        return buckets
+
+    def read_all(self, width):
+        self.file.flush()
+        return np.fromfile(self.path).reshape(-1, width)
+
+
+def _feed(levels, directory, rows, width, factor, max_points, final=False):
+    """Push raw rows through the levels, adding a level whenever the top one outgrows max_points."""
+    records = rows
+    i = 0
+    while i < len(levels):
+        level = levels[i]
+        if len(records) or final:
+            records = level.feed(records, final)
+        if i == len(levels) - 1 and level.buckets > max_points:
+            # The new level starts from everything this one has written so far
+            levels.append(_Level(directory, i + 1, factor, _reduce_buckets))
+            records = level.read_all(width)
+        i += 1
+
+
+def build_pyramid(filename, base_rows=BASE_ROWS, factor=FACTOR, max_points=MAX_POINTS,
+                  chunk_rows=100_000):
+    """
+    Build the plot pyramid of a result file in one streaming pass.
+
+    Params:
+        filename (str): .csv, .f64 (memmap) or .parquet file.
+        base_rows (int): Samples per level-0 bucket.
+        factor (int): Buckets merged per level.
+        max_points (int): Levels are added until the top has at most this many buckets.
+        chunk_rows (int): Rows read per block; bounds peak memory.
+
+    Returns:
+        str: Pyramid directory.
+    """
+    st = os.stat(filename)
+    schema = load_schema(filename)
+    width = _STATS + 3 * (len(schema.columns) - 1)
+    directory = pyramid_path(filename)
+    tmp = directory + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    levels = [_Level(tmp, 0, base_rows, _reduce_rows)]
+    try:
+        for rows in iter_blocks(filename, chunk_rows):
+            _feed(levels, tmp, rows, width, factor, max_points)
+        _feed(levels, tmp, np.empty((0, len(schema.columns))), width, factor, max_points, final=True)
+    finally:
+        for level in levels:
+            level.file.close()
+
+    meta = {
+        "source": os.path.abspath(filename),
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "columns": schema.columns,
+        "base_rows": base_rows,
+        "factor": factor,
+        "levels": [{"rows_per_bucket": base_rows * factor ** i, "buckets": level.buckets}
+                   for i, level in enumerate(levels)],
+    }
+    with open(os.path.join(tmp, "pyramid.json"), 'w') as f:
+        json.dump(meta, f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+    return directory
+
+
+class Pyramid:
+    """
+    Read side of a plot pyramid; the levels are memory-mapped, so a window
+    only touches the buckets it returns.
+
+    Params:
+        directory (str): Pyramid directory (see pyramid_path).
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "pyramid.json")) as f:
+            self.meta = json.load(f)
+        self.schema = HeaderSchema(self.meta["columns"])
+        self.n_columns = len(self.schema.columns) - 1
+        width = _STATS + 3 * self.n_columns
+        self.levels = []
+        for i, level in enumerate(self.meta["levels"]):
+            path = os.path.join(directory, f"level{i}.f64")
+            shape = (level["buckets"], width)
+            self.levels.append(np.memmap(path, dtype=np.float64, mode='r', shape=shape)
+                               if level["buckets"] else np.empty(shape))
+
+    def is_current(self, filename):
+        """Whether the pyramid was built from this version of filename."""
+        st = os.stat(filename)
+        return (self.meta["source"] == os.path.abspath(filename)
+                and self.meta["mtime_ns"] == st.st_mtime_ns and self.meta["size"] == st.st_size)
+
+    def _bounds(self, level, t0, t1):
+        """Bucket range of a level that overlaps [t0, t1] (binary search on the mapped times)."""
+        data = self.levels[level]
+        lo = 0 if t0 is None else bisect.bisect_left(data[:, _T_END], t0)
+        hi = len(data) if t1 is None else bisect.bisect_right(data[:, _T_START], t1)
+        return lo, max(lo, hi)
+
+    def window(self, t0=None, t1=None, columns=None, max_points=MAX_POINTS):
+        """
+        Buckets covering [t0, t1] from the finest level with at most
+        max_points of them there (the coarsest level if none fits).
+
+        Params:
+            t0, t1 (float | None): Model time range; None for the start/end.
+            columns (List[str] | None): Base names or header columns (default all).
+            max_points (int): Most buckets to return.
+
+        Returns:
+            Window: Level, samples per bucket, bucket times and counts, and
+            (buckets, columns) min/mean/max arrays.
+        """
+        for level in range(len(self.levels)):
+            lo, hi = self._bounds(level, t0, t1)
+            if hi - lo <= max_points:
+                break
+        positions = (list(range(1, self.n_columns + 1)) if columns is None
+                     else [self.schema.position(name) for name in columns])
+        k = self.n_columns
+        block = np.asarray(self.levels[level][lo:hi])
+        stats = [block[:, [_STATS + offset + p - 1 for p in positions]] for offset in (0, k, 2 * k)]
+        return Window(level, self.meta["levels"][level]["rows_per_bucket"], block[:, _T_START],
+                      block[:, _T_END], block[:, _COUNT], *stats,
+                      [self.schema.columns[p] for p in positions])
+
+
+def load_pyramid(filename, build=True, **options):
+    """
+    Open the pyramid of a result file, (re)building it if it is missing or
+    was made from another version of the file.
+
+    Params:
+        filename (str): .csv, .f64 (memmap) or .parquet file.
+        build (bool): Build when missing or stale; otherwise raise FileNotFoundError.
+        **options: Passed to build_pyramid.
+
+    Returns:
+        Pyramid: Opened pyramid.
+    """
+    directory = pyramid_path(filename)
+    try:
+        pyramid = Pyramid(directory)
+        if pyramid.is_current(filename):
+            return pyramid
+    except (OSError, ValueError, KeyError):
+        pass  # missing or damaged: build again
+    if not build:
+        raise FileNotFoundError(f"No current pyramid for {filename}")
+    return Pyramid(build_pyramid(filename, **options))
+
+
+def plot_window(window, ax=None):
+    """
+    Draw a window as a min/max band with the mean line, one per column.
+
+    Params:
+        window (Window): Result of Pyramid.window.
+        ax (matplotlib.axes.Axes | None): Axes to draw on; current axes if None.
+
+    Returns:
+        matplotlib.axes.Axes: The axes.
+    """
+    import matplotlib.pyplot as plt
+
+    ax = ax or plt.gca()
+    t = (window.t_start + window.t_end) / 2
+    for j, column in enumerate(window.columns):
+        line, = ax.plot(t, window.mean[:, j], label=column)
+        ax.fill_between(t, window.min[:, j], window.max[:, j], color=line.get_color(), alpha=0.3,
+                        linewidth=0)
+    ax.set_xlabel("ModelTime [s]")
+    ax.legend()
+    return ax
+
+
+# --- Benchmark ---
+def _write_log(filename, rows, n_variables, seed=0):
+    """Synthetic 1 Hz log: slow drifts with noise and rare spikes."""
+    from simlog.columnar import make_sink
+
+    rng = np.random.default_rng(seed)
+    variables = [[f"Tag{i}:Value", "barg"] for i in range(n_variables)]
+    sink = make_sink(filename, variables, "memmap" if filename.endswith(".f64") else "csv")
+    t = np.arange(rows, dtype=np.float64)
+    with sink:
+        for start in range(0, rows, 100_000):
+            tt = t[start:start + 100_000]
+            values = np.sin(tt[:, None] / 3600 + np.arange(n_variables)) + rng.normal(0, 0.05, (len(tt), n_variables))
+            values[rng.random(values.shape) < 1e-5] += 5
+            sink.write_rows(np.column_stack((tt, values)))
+
+
+def benchmark_pyramid(rows=86_400, n_variables=18, directory=None):
+    """
+    One day of 1 Hz samples as CSV and .f64: time the pyramid build, a full-day
+    and a one-hour window against reading the whole file, and check that the
+    spikes survive in the full-day maximum.
+
+    Returns:
+        List[dict]: Step, file format, wall time and points returned.
+    """
+    import tempfile
+
+    import pandas as pd
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        for ext in ("csv", "f64"):
+            filename = os.path.join(tmp, f"log.{ext}")
+            _write_log(filename, rows, n_variables)
+
+            def record(step, run):
+                start = time.perf_counter()
+                points = run()
+                results.append({"step": step, "format": ext, "wall_s": time.perf_counter() - start,
+                                "points": points})
+
+            if ext == "csv":
+                record("read whole file", lambda: len(pd.read_csv(filename)))
+            record("build pyramid", lambda: load_pyramid(filename).meta["levels"][0]["buckets"])
+            pyramid = load_pyramid(filename, build=False)
+            record("full-day window", lambda: len(pyramid.window()[2]))
+            record("1 h window", lambda: len(pyramid.window(43_200, 46_800)[2]))
+            raw_max = max(block[:, 1:].max() for block in iter_blocks(filename))
+            assert pyramid.window().max.max() == raw_max, "spike lost in decimation"
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'step':>16} {'format':>6} {'wall [ms]':>10} {'points':>8}")
+    for r in benchmark_pyramid():
+        print(f"{r['step']:>16} {r['format']:>6} {r['wall_s'] * 1e3:>10.2f} {r['points']:>8}")
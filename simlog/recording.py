@@ -0,0 +1,322 @@
+import csv
+from datetime import datetime
+
+from simlog.schema import format_column
+from simlog.samplebuffer import SampleBuffer
+from simlog.stepping import MultiAppReader, resolve_applications, sampled_columns, step_samples
+
+# -----------------------------------------------------------------------------
+# Module: Buffered Recording
+# Description: The chunked sampling loop and helpers used by the simulation
+#              scripts: run a timeline for a duration, buffer the samples and
+#              write them in chunks so a failure loses as little as possible.
+#              SimulationRecorder is the one implementation of the loop;
+#              run_buffered_simulation is its one-call form.
+# -----------------------------------------------------------------------------
+
+# --- CSV Buffering Helpers ---
+def _write_header_if_needed(filename, variables):
+    """
+    Write the CSV header if the file does not exist or is empty.
+
+    Params:
+        filename (str): Path to the CSV file.
+        variables (List[List[str, str]]): List of [name, unit] pairs for columns.
+    """
+    try:
+        with open(filename, 'r', newline='') as f:
+            # If file already has content, skip writing header
+            if f.read(1):
+                return
+    except FileNotFoundError:
+        # File does not exist -> will write header
+        pass
+
+    header = [['ModelTime', 's']] + variables
+    # Flatten header to "Name [unit]" format
+    header_flat = [format_column(name, unit) for name, unit in header]
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header_flat)
+
+
+def _flush_buffer(filename, buffer):
+    """
+    Append all rows in the buffer to the CSV file and clear the buffer.
+
+    Params:
+        filename (str): Path to the CSV file.
+        buffer (List[List[float]] | np.ndarray): Rows to flush to disk.
+    """
+    if hasattr(buffer, "tolist"):
+        # One bulk conversion of the (rows, columns) array
+        buffer = buffer.tolist()
+    with open(filename, 'a', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerows(buffer)
+    # Caller should clear buffer after flush
+
+
+class SimulationRecorder:
+    """
+    The chunked sampling loop shared by the simulation scripts: run a
+    timeline for a duration, sample variables every sample_period model
+    seconds into a preallocated buffer and hand full chunks to a sink, so a
+    failure loses at most one chunk.
+
+    Params:
+        timeline (kspice.Timeline): Active K-Spice timeline object (or a
+            simlog.fake_kspice.FakeTimeline).
+        app (str | None): Application name within the timeline (unused when
+            variables maps applications to their variables).
+        variables (List[List[str, str]] | Dict[int | str, List[List[str, str]]]):
+            Variables to sample ([name, unit]), or {app: variables} to record
+            several applications in one pass on one ModelTime column, with
+            columns named "app/name" (see simlog.stepping.app_columns); app is
+            an index into timeline.applications or an application name.
+        chunk_size (int): Number of samples to buffer before writing.
+        sample_period (int): Model seconds between samples (default 1 Hz).
+        block_seconds (int | None): Longest single run_for advance
+            (default: one run_for call per sample).
+        backend (str | None): Output backend opened per run when run() gets
+            no sink (see simlog.columnar.make_sink); None appends to a CSV
+            inline.
+        report (Callable[[str], None]): Receives progress messages (default print).
+        hooks (Iterable[Callable[[int, float, Sequence[float]], bool]]): Called
+            with (elapsed seconds, model time, values) after every sample; a
+            hook that returns True ends the run early.
+        telemetry (simlog.telemetry.Telemetry | None): Times run_for, get_values
+            and flushes and tracks the real-time factor; the caller owns it
+            across runs. None runs the loop uninstrumented.
+        concurrent_reads (bool): With several applications, read them from
+            a thread pool (see MultiAppReader; only for bindings that allow it).
+    """
+
+    def __init__(self, timeline, app, variables, chunk_size=500, sample_period=1, block_seconds=None,
+                 backend=None, report=print, hooks=(), telemetry=None, concurrent_reads=False):
+        self.timeline = timeline
+        self.app = app
+        self.variables = resolve_applications(timeline, variables)
+        self.columns = sampled_columns(self.variables)
+        self.chunk_size = chunk_size
+        self.sample_period = sample_period
+        self.block_seconds = block_seconds
+        self.backend = backend
+        self.report = report
+        self.hooks = tuple(hooks)
+        self.telemetry = telemetry
+        self.concurrent_reads = concurrent_reads
+
+    def run(self, minutes, filename, sink=None, time_offset=0.0):
+        """
+        Record one run.
+
+        Params:
+            minutes (float): Simulation duration in minutes (whole seconds).
+            filename (str): Output file path.
+            sink (object | None): Open sink from simlog.columnar.make_sink that
+                receives full chunks as (rows, columns) array views that are
+                reused after the call. The caller owns it across calls; on
+                failure it is drained and closed here. Default: a sink of the
+                recorder's backend, or CSV rows appended inline to filename.
+            time_offset (float): Added to the recorded model time (see step_samples).
+
+        Returns:
+            int: Model seconds recorded (less than the duration if a hook
+            ended the run).
+        """
+        report, telemetry, hooks = self.report, self.telemetry, self.hooks
+        timeline, variables = self.timeline, self.columns
+        total_seconds = int(round(minutes * 60))
+        # Preallocated (chunk_size, 1 + variables) array, model time in column 0
+        buffer = SampleBuffer(self.chunk_size, 1 + len(variables))
+
+        # Progress checkpoints at 25%, 50%, 75%, 100%
+        checkpoints = [
+            int(total_seconds * 0.25),
+            int(total_seconds * 0.50),
+            int(total_seconds * 0.75),
+            total_seconds
+        ]
+        next_cp = 0
+
+        # Chunks go to the sink if given, otherwise are appended to the CSV inline
+        owned = sink is None and self.backend is not None
+        if owned:
+            from simlog.columnar import make_sink
+
+            sink = make_sink(filename, variables, self.backend)
+        if sink is None:
+            # Ensure CSV header is present
+            _write_header_if_needed(filename, variables)
+
+            def flush(rows):
+                _flush_buffer(filename, rows)
+        else:
+            flush = sink.write_rows
+        if telemetry is not None:
+            timeline = telemetry.wrap_timeline(timeline)
+            flush = telemetry.timed("flush", flush)
+            telemetry.start_run(total_seconds)
+        reader = read = None
+        if isinstance(self.variables, dict):
+            # The combined read of all applications counts as one sample
+            reader = read = MultiAppReader(self.timeline, self.variables, self.concurrent_reads)
+            if telemetry is not None:
+                read = telemetry.timed_read(reader)
+        report(f"Starting {minutes:g}min simulation (chunk {self.chunk_size}) → {filename}")
+
+        sec = 0
+        try:
+            # Advance to each sample instant; samples are copied into the next buffer row
+            for sec, model_time, values in step_samples(timeline, self.app, variables, total_seconds,
+                                                        self.sample_period, self.block_seconds,
+                                                        time_offset, read):
+                # Flush to disk if buffer is full
+                if buffer.append(model_time, values):
+                    # Hand the filled rows over in one call and start again at row 0
+                    flush(buffer.filled())
+                    buffer.clear()
+
+                # Print progress at defined checkpoints
+                while next_cp < len(checkpoints) and sec >= checkpoints[next_cp]:
+                    report(f"  Progress {25 * (next_cp + 1)}%...")
+                    next_cp += 1
+
+                if hooks and any([hook(sec, model_time, values) for hook in hooks]):
+                    report(f"  Stopped by hook after {sec}s of {total_seconds}s")
+                    break
+
+            # Final flush of any remaining rows
+            if len(buffer):
+                flush(buffer.filled())
+                buffer.clear()
+            if owned:
+                sink.close()
+
+            if telemetry is not None:
+                telemetry.emit()
+            report(f"Completed {sec / 60:g}min simulation → data in {filename}")
+            return sec
+
+        except Exception as e:
+            # On error, flush what's left, log, then re-raise
+            if len(buffer):
+                flush(buffer.filled())
+            if sink is not None:
+                # Drains every queued chunk before the file is closed
+                sink.close()
+            report(f"[ERROR] Simulation failed: {e!r}")
+            report(f"Partial data flushed to {filename}")
+            raise
+
+        finally:
+            if reader is not None:
+                reader.close()
+
+
+def run_buffered_simulation(timeline, app, variables, minutes, chunk_size, filename,
+                            sample_period=1, block_seconds=None, sink=None, report=print,
+                            time_offset=0.0, telemetry=None, hooks=(), concurrent_reads=False):
+    """
+    Run a chunked simulation for a given duration, writing results in increments
+    to CSV to avoid data loss on errors or process termination.
+
+    One-call form of SimulationRecorder(...).run(...); see there for the
+    parameters.
+
+    Returns:
+        int: Model seconds recorded.
+    """
+    recorder = SimulationRecorder(timeline, app, variables, chunk_size, sample_period, block_seconds,
+                                  report=report, hooks=hooks, telemetry=telemetry,
+                                  concurrent_reads=concurrent_reads)
+    return recorder.run(minutes, filename, sink, time_offset)
+
+
+# --- Parameter Adjustment Helper ---
+def adjust_parameter(timeline, app, parameter_name, multiplier, report=print):
+    """
+    Multiply a control parameter by a given factor and update the timeline.
+
+    Params:
+        timeline (kspice.Timeline): Active timeline object.
+        app (str): Application name.
+        parameter_name (str): Name of the parameter to adjust.
+        multiplier (float): Factor to multiply the current value by.
+        report (Callable[[str], None]): Receives the log message (default print).
+
+    Returns:
+        Tuple[float, float]: Old and new value.
+    """
+    current = timeline.get_value(app, parameter_name)
+    new_val = current * multiplier
+    timeline.set_value(app, parameter_name, new_val)
+    report(f"Adjusted {parameter_name}: {current} → {new_val} ({multiplier*100:.1f}%)")
+    return current, new_val
+
+
+# --- Filename Generator ---
+def generate_filename(project_name, state, extension="csv"):
+    """
+    Create a filename with project name, state index, and timestamp.
+
+    Params:
+        project_name (str): Base name for the project.
+        state (int): Simulation state index.
+        extension (str): File extension of the output backend.
+
+    Returns:
+        str: Generated filename.
+    """
+    ts = datetime.now().strftime("%d.%m.%Y_%H-%M")
+    return f"{project_name}_state{state}_{ts}.{extension}"
+
+
+# --- Benchmark ---
+def benchmark_recorder(total_seconds=3600, backends=(None, "csv", "csv-async", "memmap"), n_variables=18,
+                       chunk_size=500, directory=None):
+    """
+    Record a fake timeline with every backend, check each output against
+    step_timeline sample for sample, and report samples per wall second.
+    Needs no K-Spice, so it can run as a regression check anywhere.
+
+    Returns:
+        List[dict]: Backend, samples, wall time and samples/s.
+    """
+    import os
+    import tempfile
+    import time
+
+    import numpy as np
+
+    from simlog.columnar import BACKEND_EXTENSIONS, read_output
+    from simlog.fake_kspice import FakeTimeline
+    from simlog.stepping import step_timeline
+
+    variables = [[f"VAR{i}:Value", "-"] for i in range(n_variables)]
+    reference_tl = FakeTimeline()
+    expected = np.array([row for _, row in step_timeline(reference_tl, reference_tl.applications[0].name,
+                                                         variables, total_seconds)])
+    results = []
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        for backend in backends:
+            filename = os.path.join(tmp, f"{backend or 'inline'}.{BACKEND_EXTENSIONS.get(backend, 'csv')}")
+            tl = FakeTimeline()
+            recorder = SimulationRecorder(tl, tl.applications[0].name, variables, chunk_size,
+                                          backend=backend, report=lambda msg: None)
+            start = time.perf_counter()
+            recorded = recorder.run(total_seconds / 60, filename)
+            wall = time.perf_counter() - start
+            data = read_output(filename).to_numpy()
+            if recorded != total_seconds or not np.allclose(data, expected, rtol=0, atol=1e-12):
+                raise AssertionError(f"{backend or 'inline'} output differs from step_timeline")
+            results.append({"backend": backend or "inline", "samples": len(data), "wall_s": wall,
+                            "samples_per_s": len(data) / wall})
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'backend':>10} {'samples':>8} {'wall [s]':>9} {'samples/s':>10}")
+    for r in benchmark_recorder():
+        print(f"{r['backend']:>10} {r['samples']:>8} {r['wall_s']:>9.3f} {r['samples_per_s']:>10.0f}")
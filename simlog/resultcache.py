@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict
+
+from simlog.manifest import RunManifest
+from simlog.stepping import sampled_columns
+
+# -----------------------------------------------------------------------------
+# Module: Result Cache
+# Description: Content-addressed store of completed scenario outputs. The key
+#              hashes everything that determines a run's output: the
+#              simulator configuration (project, timeline, loaded files,
+#              speed), the scenario (warmup, stepped parameter, multiplier,
+#              duration), the sampled variables, the output backend, the
+#              steady-state criteria and whether the warmup may be restored
+#              from a warm-state cache (and with which state variables),
+#              plus fingerprints of the model source files. A sweep that is run again with nothing changed copies
+#              the stored output (and its manifest) instead of simulating;
+#              a changed model file changes the key. Entries are evicted by
+#              age and total size, least recently used first.
+# -----------------------------------------------------------------------------
+
+# Files stored with an output: the output itself, the .f64 sidecar and the manifest
+COMPANION_SUFFIXES = ("", ".json", ".manifest.json")
+
+# Content hashes of this process, keyed by (path, mtime_ns, size)
+_hashes = {}
+
+
+def fingerprint(paths, content=False):
+    """
+    Fingerprints of source files: [mtime, size], or with content=True a
+    SHA-1 of the bytes (hashed once per file version), so a file that is
+    touched but not changed keeps its fingerprint.
+
+    Returns:
+        dict: {path: fingerprint, or None for a missing file}.
+    """
+    fp = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            fp[path] = None
+            continue
+        if not content:
+            fp[path] = [st.st_mtime, st.st_size]
+            continue
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        if key not in _hashes:
+            digest = hashlib.sha1()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            _hashes[key] = digest.hexdigest()
+        fp[path] = _hashes[key]
+    return fp
+
+
+def result_key(config, scenario, variables, backend, steady=None, content=False, warm_start=None):
+    """
+    Cache key of a scenario run.
+
+    Params:
+        config (SimulatorConfig): Simulator and initial-condition files; its
+            source_files are fingerprinted.
+        scenario (Scenario): The experiment.
+        variables (List[List[str, str]] | dict): Sampled variables ([name,
+            unit]) or {application: variables}.
+        backend (str): Output backend name.
+        steady (SteadyState | None): Steady-state criteria, if phases may end early.
+        content (bool): Fingerprint source files by content instead of mtime/size.
+        warm_start (dict | None): Warm-state cache settings of the run
+            ({"state_variables": [...]}), None for a cold warmup.
+
+    Returns:
+        Tuple[str, dict]: Hex digest and the description it hashes.
+    """
+    description = {
+        "config": asdict(config),
+        "scenario": asdict(scenario),
+        "variables": [list(v) for v in sampled_columns(variables)],
+        "backend": backend,
+        "steady": asdict(steady) if steady is not None else None,
+        "warm_start": warm_start,
+        "sources": fingerprint(config.source_files, content),
+    }
+    text = json.dumps(description, sort_keys=True, default=list)
+    return hashlib.sha1(text.encode()).hexdigest(), description
+
+
+class ResultCache:
+    """
+    Directory of completed outputs, one sub-directory per key.
+
+    Entries older than max_age_days are stale; beyond max_bytes (or
+    max_entries) the least recently used entries are removed.
+
+    Params:
+        cache_dir (str): Cache directory (created if missing).
+        max_bytes (int | None): Total size kept (default unlimited).
+        max_entries (int | None): Number of entries kept (default unlimited).
+        max_age_days (float): Entries older than this are stale.
+        content_hash (bool): Fingerprint source files by content instead of
+            mtime/size (see fingerprint).
+    """
+
+    def __init__(self, cache_dir, max_bytes=None, max_entries=None, max_age_days=90, content_hash=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.content_hash = content_hash
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, config, scenario, variables, backend, steady=None, warm_start=None):
+        """result_key with this cache's fingerprint mode."""
+        return result_key(config, scenario, variables, backend, steady, self.content_hash, warm_start)
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _meta(self, path):
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError):
+            return None
+
+    def get(self, key):
+        """
+        Look up a run.
+
+        Returns:
+            dict | None: Entry metadata ("created", "description", "files",
+            "bytes"), or None on a miss (stale entries are removed).
+        """
+        path = self._entry(key)
+        meta = self._meta(path)
+        if meta is None:
+            return None
+        if time.time() - meta["created"] > self.max_age:
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        os.utime(path)  # mark as recently used
+        return meta
+
+    def fetch(self, key, filename):
+        """
+        Copy a cached output (and its companions) to filename.
+
+        Returns:
+            bool: False on a miss.
+        """
+        meta = self.get(key)
+        if meta is None:
+            return False
+        path = self._entry(key)
+        for suffix in meta["files"]:
+            shutil.copyfile(os.path.join(path, "output" + suffix), filename + suffix)
+        if ".manifest.json" in meta["files"]:
+            manifest = RunManifest.load(filename)
+            manifest.data["output"] = os.path.basename(filename)
+            manifest.data["result_cache"] = key
+            manifest.save()
+        return True
+
+    def put(self, key, filename, description=None):
+        """
+        Store a completed output.
+
+        Params:
+            key (str): Result of result_key.
+            filename (str): Output file; its .f64 sidecar and manifest are
+                stored with it.
+            description (dict | None): What the key hashes, kept for inspection.
+        """
+        path = self._entry(key)
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        files = [suffix for suffix in COMPANION_SUFFIXES if os.path.exists(filename + suffix)]
+        for suffix in files:
+            shutil.copyfile(filename + suffix, os.path.join(tmp, "output" + suffix))
+        meta = {
+            "created": time.time(),
+            "description": description,
+            "source": os.path.abspath(filename),
+            "files": files,
+            "bytes": sum(os.path.getsize(filename + suffix) for suffix in files),
+        }
+        with open(os.path.join(tmp, "meta.json"), 'w') as f:
+            json.dump(meta, f, default=list)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Remove stale entries, then trim to max_bytes/max_entries, least recently used first."""
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            path = self._entry(key)
+            meta = self._meta(path)
+            if meta is None:
+                continue
+            if time.time() - meta["created"] > self.max_age:
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                entries.append((os.path.getmtime(path), meta["bytes"], path))
+        entries.sort(reverse=True)
+        kept_bytes = 0
+        for n, (_, size, path) in enumerate(entries):
+            kept_bytes += size
+            if (self.max_entries is not None and n >= self.max_entries) or \
+                    (self.max_bytes is not None and kept_bytes > self.max_bytes and n > 0):
+                shutil.rmtree(path, ignore_errors=True)
+                kept_bytes -= size
+
+    def size(self):
+        """Total bytes of the stored outputs."""
+        return sum(meta["bytes"] for meta in map(self._meta, map(self._entry, os.listdir(self.cache_dir)))
+                   if meta is not None)
+
+
+# --- Benchmark ---
+def benchmark_result_cache(n_scenarios=4, workers=2, directory=None):
+    """
+    Run a sweep on the fake simulator with an empty cache, again with every
+    scenario cached, and with force.
+
+    Returns:
+        List[dict]: Pass, wall time and scenarios served from the cache.
+    """
+    import tempfile
+
+    from simlog.scenarios import Scenario, SimulatorConfig, run_scenarios
+
+    variables = [[f"VAR{i}:Value", "-"] for i in range(18)]
+    sweep = [Scenario(i, 0, 10, "VAR0:Value", 1.1, 30) for i in range(n_scenarios)]
+    results = []
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        model = os.path.join(tmp, "model.mdl")
+        with open(model, "w") as f:
+            f.write("model")
+        # Fake simulator with 0.2 ms per run_for call, roughly a fast real model
+        config = SimulatorConfig("fake", "fake", "m", "p", "v", simulator_module="simlog.fake_kspice",
+                                 simulator_options=(("run_overhead", 2e-4),), source_files=(model,))
+        cache = ResultCache(os.path.join(tmp, "cache"))
+        for name, force in (("cold", False), ("cached", False), ("force", True)):
+            start = time.perf_counter()
+            done, _ = run_scenarios(sweep, config, variables, os.path.join(tmp, name), workers=workers,
+                                    report=lambda msg: None, result_cache=cache, force=force)
+            results.append({"pass": name, "wall_s": time.perf_counter() - start,
+                            "cached": sum(r.get("cached", False) for r in done)})
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'pass':>7} {'wall [s]':>9} {'cached':>7}")
+    for r in benchmark_result_cache():
+        print(f"{r['pass']:>7} {r['wall_s']:>9.2f} {r['cached']:>7}")
@@ -0,0 +1,132 @@
+import sys
+import time
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Module: Sample Buffer
+# Description: Preallocated store for one chunk of samples. Instead of a new
+#              Python list per sample (and a list of those per chunk), each
+#              sample is copied into the next row of a (chunk_size, columns)
+#              float64 array with model time in column 0. A flush hands the
+#              filled slice to the sink in one call and the buffer starts over
+#              at row 0, so the same array is reused for the whole run.
+# -----------------------------------------------------------------------------
+
+
+class SampleBuffer:
+    """
+    Fixed-size row buffer for one chunk of samples.
+
+    The slice returned by filled() is a view of the buffer: a sink has to
+    consume or copy it before the next sample is appended.
+
+    Params:
+        chunk_size (int): Rows per chunk.
+        n_columns (int): Columns per row, 1 + number of variables.
+    """
+
+    def __init__(self, chunk_size, n_columns):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.data = np.empty((chunk_size, n_columns), dtype=np.float64)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def full(self):
+        return self.size == len(self.data)
+
+    def append(self, model_time, values):
+        """
+        Store one sample in the next free row.
+
+        Returns:
+            bool: True when the buffer is full and should be flushed.
+        """
+        row = self.data[self.size]
+        row[0] = model_time
+        row[1:] = values
+        self.size += 1
+        return self.size == len(self.data)
+
+    def filled(self):
+        """View of the rows written since the last clear()."""
+        return self.data[:self.size]
+
+    def clear(self):
+        self.size = 0
+
+
+# --- Benchmark ---
+def _list_store(timeline, app, variables, total_seconds, chunk_size, flush):
+    """The original loop: one list per sample, model time inserted at the front."""
+    from datetime import timedelta
+
+    buffer = []
+    for _ in range(total_seconds):
+        timeline.run_for(timedelta(seconds=1))
+        sample = list(timeline.get_values(app, variables))
+        sample.insert(0, timeline.model_time.total_seconds())
+        buffer.append(sample)
+        if len(buffer) >= chunk_size:
+            flush(buffer)
+            buffer = []
+    if buffer:
+        flush(buffer)
+
+
+def _array_store(timeline, app, variables, total_seconds, chunk_size, flush):
+    from simlog.stepping import step_samples
+
+    buffer = SampleBuffer(chunk_size, 1 + len(variables))
+    for _, model_time, values in step_samples(timeline, app, variables, total_seconds):
+        if buffer.append(model_time, values):
+            flush(buffer.filled())
+            buffer.clear()
+    if len(buffer):
+        flush(buffer.filled())
+
+
+def benchmark_sample_store(total_seconds=36_000, chunk_size=500, n_variables=18):
+    """
+    Compare the per-sample list store with SampleBuffer against a fake timeline.
+
+    Allocations are counted as the number of memory blocks still held when a
+    full chunk is handed to the sink (sys.getallocatedblocks); wall time covers
+    stepping, reading and storing, but no disk I/O.
+
+    Returns:
+        List[dict]: One result row per store.
+    """
+    from simlog.fake_kspice import FakeTimeline
+
+    variables = [[f"VAR{i}:Value", "-"] for i in range(n_variables)]
+    results = []
+    for name, store in (("list", _list_store), ("ndarray", _array_store)):
+        tl = FakeTimeline()
+        app = tl.applications[0].name
+        held = []
+
+        def flush(rows):
+            held.append(sys.getallocatedblocks() - baseline)
+
+        baseline = sys.getallocatedblocks()
+        start = time.perf_counter()
+        store(tl, app, variables, total_seconds, chunk_size, flush)
+        wall = time.perf_counter() - start
+        results.append({
+            "store": name,
+            "samples": total_seconds,
+            "blocks_per_chunk": max(held),
+            "us_per_sample": wall / total_seconds * 1e6,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'store':>8} {'samples':>8} {'blocks/chunk':>13} {'us/sample':>10}")
+    for r in benchmark_sample_store():
+        print(f"{r['store']:>8} {r['samples']:>8} {r['blocks_per_chunk']:>13} {r['us_per_sample']:>10.2f}")
@@ -0,0 +1,453 @@
+import contextlib
+import importlib
+import multiprocessing
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import asdict, dataclass
+
+from simlog.columnar import BACKEND_EXTENSIONS, make_sink
+from simlog.manifest import ManifestSink, RunManifest, latest_manifest, rows_after, truncate_to_durable
+from simlog.recording import adjust_parameter, generate_filename, run_buffered_simulation
+from simlog.sinks import MemorySink
+from simlog.stepping import fast_forward, resolve_applications, sampled_columns
+from simlog.telemetry import Telemetry
+from simlog.warmcache import can_save_state, capture_state, is_full_state, restore_state, warmup_key
+
+# -----------------------------------------------------------------------------
+# Module: Scenario Runner
+# Description: Declarative description of the step experiments (load initial
+#              condition, settle, step one parameter, record the response) and
+#              a scheduler that runs them on a pool of worker processes. Each
+#              worker owns its own simulator and timeline; progress messages
+#              from all workers are merged into one view in the parent. With a
+#              WarmStateCache, each distinct warmup prefix is simulated once
+#              and every scenario starts from the restored settled state
+#              (saved by the timeline as an initial condition).
+#              With a SteadyState, settle and response phases end as soon as
+#              the sampled variables are steady (see simlog.steady).
+# -----------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class SimulatorConfig:
+    """Where a worker finds the simulator and what it loads before each scenario."""
+    project_path: str
+    timeline: str
+    model_file: str
+    parameter_file: str
+    values_file: str
+    speed: float = 2.0
+    simulator_module: str = "kspice"  # "simlog.fake_kspice" for tests and benchmarks
+    simulator_options: tuple = ()     # extra (key, value) arguments for Simulator()
+    source_files: tuple = ()          # model file paths; changes invalidate cached warmups
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    One step experiment.
+
+    Params:
+        state (int): State index, used in the output filename.
+        app (int): Index into timeline.applications (0 = Hugin A, 1 = Hugin B)
+            of the stepped application, which is also the one sampled unless
+            the variables map several applications.
+        warmup_minutes (int): Settle time before the step (the longest, with
+            steady-state detection).
+        parameter (str): Parameter that is stepped.
+        multiplier (float): Step factor applied to the parameter.
+        run_minutes (int): Recording time after the step (the longest, with
+            steady-state detection).
+    """
+    state: int
+    app: int
+    warmup_minutes: int
+    parameter: str
+    multiplier: float
+    run_minutes: int
+
+    @property
+    def name(self):
+        return f"state{self.state}"
+
+
+def _activate(config):
+    # The simulator SDK is imported on first use, so importing simlog stays cheap
+    kspice = importlib.import_module(config.simulator_module)
+    sim = kspice.Simulator(config.project_path, **dict(config.simulator_options))
+    return sim, sim.activate_timeline(config.timeline)
+
+
+def _load(tl, config):
+    tl.load(config.model_file, config.parameter_file, config.values_file)
+    tl.initialize()
+    tl.set_speed(config.speed)
+    return tl
+
+
+def open_timeline(config):
+    """
+    Start the simulator, activate the timeline and load the initial condition,
+    for scripts that drive one timeline themselves.
+
+    Params:
+        config (SimulatorConfig): Simulator and initial-condition files.
+
+    Returns:
+        Tuple[Simulator, Timeline]: The simulator (keep it referenced while
+        the timeline is used) and the initialized timeline.
+    """
+    sim, tl = _activate(config)
+    return sim, _load(tl, config)
+
+
+# --- Worker side ---
+_worker = {}
+
+
+def _init_worker(config, messages):
+    """Process-pool initializer: create this worker's simulator and timeline."""
+    sim, _worker["timeline"] = _activate(config)
+    _worker["simulator"] = sim
+    _worker["config"] = config
+    _worker["messages"] = messages
+
+
+def _reporter(scenario):
+    messages = _worker["messages"]
+
+    def report(msg):
+        messages.put((scenario.name, msg))
+    return report
+
+
+def _load_initial_condition():
+    """Reload the initial condition on this worker's timeline."""
+    return _load(_worker["timeline"], _worker["config"])
+
+
+def _warm_values_file(config, key):
+    """Name of the initial condition a cached warmup is saved as."""
+    return f"{config.values_file}_warm_{key[:12]}"
+
+
+def _scenario_warmup_key(config, scenario, variables, state_variables, steady=None):
+    return warmup_key(config.model_file, config.parameter_file, config.values_file,
+                      scenario.warmup_minutes, scenario.app, sampled_columns(variables), state_variables,
+                      steady)
+
+
+def _steady_hooks(steady, variables, report):
+    """Recorder hooks for one phase: a fresh monitor, or none without steady."""
+    return [steady.monitor(sampled_columns(variables), report)] if steady is not None else []
+
+
+def _settled(hooks):
+    """The phase's monitor if it ended the phase early, else None."""
+    return hooks[0] if hooks and hooks[0].stopped_s is not None else None
+
+
+def _prewarm_in_worker(scenario, variables, chunk_size, cache, state_variables, steady=None):
+    """
+    Simulate a scenario's warmup once and store it in the warm-state cache.
+    The timeline saves its full state as an initial condition; a timeline
+    that cannot do that captures state_variables instead, and without them
+    the warmup is not cached.
+    """
+    config = _worker["config"]
+    report = _reporter(scenario)
+    tl = _load_initial_condition()
+    app = tl.applications[scenario.app].name
+    full = can_save_state(tl)
+    if not full and not state_variables:
+        report("Timeline cannot save initial conditions and no state_variables are given; "
+               "warmup not cached")
+        return
+
+    # Keyed by the variables as given, like the scheduler's lookup
+    key = _scenario_warmup_key(config, scenario, variables, state_variables, steady)
+    variables = resolve_applications(tl, variables)
+    hooks = _steady_hooks(steady, variables, report)
+    with MemorySink(f"warm cache ({scenario.warmup_minutes}min)") as mem:
+        recorded = run_buffered_simulation(tl, app, variables, scenario.warmup_minutes, chunk_size,
+                                           mem.filename, sink=mem, report=report, hooks=hooks)
+    snapshot = capture_state(tl, app, _warm_values_file(config, key) if full else None, state_variables,
+                             config.project_path)
+    monitor = _settled(hooks)
+    if monitor is not None:
+        snapshot.update(warmup_s=recorded, settled_s=monitor.settled_s)
+    cache.put(key, snapshot, mem.rows, sources=config.source_files)
+
+
+def _run_in_worker(scenario, variables, filename, chunk_size, backend, cache=None, state_variables=(),
+                   resume=False, metrics=False, steady=None):
+    """
+    Run one scenario on this worker's timeline and write it to filename.
+
+    With resume=True the scenario continues an interrupted run of the same
+    file: the file is cut back to its last complete row, the timeline is
+    fast-forwarded (or restored from the cache) to that point, recorded
+    adjustments are replayed, and recording appends from there.
+
+    With metrics=True both recording runs are timed into
+    <filename>.metrics.jsonl (see simlog.telemetry).
+
+    With steady (simlog.steady.SteadyState) the warmup and the response end
+    once the variables are steady; when that happens the detected settle
+    time is recorded in the manifest's "settled" entry and in the result.
+    """
+    config = _worker["config"]
+    report = _reporter(scenario)
+
+    started = time.perf_counter()
+    tl = _load_initial_condition()
+    app = tl.applications[scenario.app].name
+    warmup_s = scenario.warmup_minutes * 60
+
+    if resume:
+        manifest = RunManifest.load(filename)
+        # Recorded model time is the timeline clock, which starts where the
+        # initial condition left it; done_s counts from the scenario start
+        last_time = truncate_to_durable(filename)
+        done_s = max(0, int(round(manifest.elapsed(last_time))))
+        settled = manifest.data.get("settled", {})
+        if "warmup" in settled:
+            # The warmup ended early, so the response starts sooner in the file
+            warmup_s = settled["warmup"]["ended_s"]
+        report(f"Resuming {filename} from model time {last_time:g}s ({done_s}s into the scenario)")
+    else:
+        last_time = tl.model_time.total_seconds()
+        manifest = RunManifest.create(filename, scenario.state, asdict(scenario), last_time)
+        manifest.save()
+        done_s = 0
+
+    cached = key = None
+    if cache is not None:
+        key = _scenario_warmup_key(config, scenario, variables, state_variables, steady)
+        cached = cache.get(key)
+    # Application indices become names only now: the cache keys use the variables as given
+    variables = resolve_applications(tl, variables)
+
+    telemetry = Telemetry(filename + ".metrics.jsonl", target_speed=config.speed,
+                          label=scenario.name) if metrics else None
+    with ManifestSink(make_sink(filename, sampled_columns(variables), backend), manifest) as sink, \
+            telemetry or contextlib.nullcontext():
+        time_offset = 0.0
+        if cached is not None:
+            snapshot, rows = cached
+            time_offset = restore_state(tl, snapshot, config.model_file, config.parameter_file)
+            if "warmup_s" in snapshot:
+                warmup_s = snapshot["warmup_s"]
+                manifest.record_settle("warmup", snapshot["settled_s"], warmup_s)
+            full = is_full_state(snapshot)
+            manifest.record_warm_start(key, "initial-condition" if full else "state-variables", full)
+            if full:
+                # The full settled state; its warmup rows keep the file complete
+                tl.set_speed(config.speed)
+                rows = rows_after(rows, last_time)
+                for i in range(0, len(rows), chunk_size):
+                    sink.write_rows(rows[i:i + chunk_size].tolist())
+                report(f"Restored {warmup_s / 60:g}min warmup from cache")
+            else:
+                # Only the state variables were written back: the plant is near,
+                # not at, the settled point, so no warmup rows pretend otherwise
+                report(f"Restored {len(snapshot['values'])} state variables of the "
+                       f"{warmup_s / 60:g}min warmup; warmup rows not in the output")
+        else:
+            fast_forward(tl, min(done_s, warmup_s))
+            if done_s < warmup_s:
+                hooks = _steady_hooks(steady, variables, report)
+                recorded = run_buffered_simulation(tl, app, variables, (warmup_s - done_s) / 60, chunk_size,
+                                                   filename, sink=sink, report=report, telemetry=telemetry,
+                                                   hooks=hooks)
+                monitor = _settled(hooks)
+                if monitor is not None:
+                    warmup_s = done_s + recorded
+                    manifest.record_settle("warmup", done_s + monitor.settled_s, warmup_s)
+        manifest.mark_phase("warmup")
+
+        if manifest.data["adjustments"]:
+            # Replay the step exactly as it was applied before the interruption
+            for adj in manifest.data["adjustments"]:
+                tl.set_value(adj["app"], adj["parameter"], adj["new"])
+        else:
+            old, new = adjust_parameter(tl, app, scenario.parameter, scenario.multiplier, report=report)
+            manifest.record_adjustment(app, scenario.parameter, old, new)
+        manifest.mark_phase("adjust")
+
+        ran_s = max(0, done_s - warmup_s)
+        fast_forward(tl, ran_s)
+        hooks = _steady_hooks(steady, variables, report)
+        recorded = run_buffered_simulation(tl, app, variables, scenario.run_minutes - ran_s / 60, chunk_size,
+                                           filename, sink=sink, report=report, time_offset=time_offset,
+                                           telemetry=telemetry, hooks=hooks)
+        monitor = _settled(hooks)
+        if monitor is not None:
+            manifest.record_settle("run", ran_s + monitor.settled_s, ran_s + recorded)
+        manifest.mark_phase("run")
+    manifest.mark_complete()
+    return {
+        "scenario": scenario.name,
+        "filename": filename,
+        "wall_s": time.perf_counter() - started,
+        "settled": manifest.data.get("settled", {}),
+        "cached": False,
+    }
+
+
+# --- Scheduler ---
+def run_scenarios(scenarios, config, variables, project_name, workers=2,
+                  chunk_size=500, backend="csv", report=print,
+                  warm_cache=None, state_variables=(), resume=False, metrics=False, steady=None,
+                  catalog=None, result_cache=None, force=False):
+    """
+    Run scenarios across a pool of worker processes, one output file each.
+
+    Params:
+        scenarios (List[Scenario]): Experiments to run.
+        config (SimulatorConfig): Simulator and initial-condition files.
+        variables (List[List[str, str]] | Dict[int | str, List[List[str, str]]]):
+            Variables to sample ([name, unit]), or {application: variables}
+            to record several applications into each file (see
+            SimulationRecorder). Applications are given like Scenario.app,
+            as indices into timeline.applications; each worker resolves them
+            to the names the columns are prefixed with.
+        project_name (str): Prefix of the output filenames.
+        workers (int): Number of worker processes (simulator instances).
+        chunk_size (int): Samples buffered before each write.
+        backend (str): Output backend name (see simlog.columnar.make_sink).
+        report (Callable[[str], None]): Receives the merged progress view.
+        warm_cache (WarmStateCache | None): Cache of settled warmup states.
+            Missing prefixes are simulated first, then every scenario restores
+            from the cache instead of running its own warmup.
+        state_variables (List[str]): Only for timelines that cannot save
+            initial conditions: the variables (model states, controller
+            setpoints/outputs) captured and written back instead. Such
+            outputs lack the warmup rows and are marked in the manifest.
+        resume (bool): Continue each scenario's latest incomplete output file
+            (see simlog.manifest) and skip scenarios that already completed.
+        metrics (bool): Write per-phase timings, real-time factor and ETA of
+            each scenario to <output>.metrics.jsonl (see simlog.telemetry).
+        steady (SteadyState | None): End each warmup and response once the
+            sampled variables are steady instead of after its full duration;
+            settle times go to the manifest and the results (see simlog.steady).
+        catalog (Catalog | None): Index each output file as its scenario
+            finishes (see simlog.catalog).
+        result_cache (ResultCache | None): Completed outputs by input hash.
+            A scenario whose inputs (and model source files) are unchanged is
+            copied from the cache instead of simulated, and new outputs are
+            stored (see simlog.resultcache).
+        force (bool): Simulate every scenario even on a result cache hit
+            (the new output replaces the cached one).
+
+    Returns:
+        Tuple[List[dict], dict]: Results of the finished scenarios in
+        completion order, and {scenario name: exception} for failed ones.
+    """
+    extension = BACKEND_EXTENSIONS[backend]
+    manager = multiprocessing.Manager()
+    messages = manager.Queue()
+    results, failures = [], {}
+
+    def drain():
+        while True:
+            try:
+                name, msg = messages.get_nowait()
+            except queue.Empty:
+                return
+            report(f"[{name}] {msg.strip()}")
+
+    def collect(pending, on_result):
+        while pending:
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            drain()
+            for future in done:
+                sc = pending.pop(future)
+                try:
+                    on_result(sc, future.result())
+                except Exception as e:
+                    failures[sc.name] = e
+                    report(f"[{sc.name}] [FATAL] {e!r}")
+        drain()
+
+    keys = {}
+    # Restored warmups are keyed apart from cold ones
+    warm_start = {"state_variables": list(state_variables)} if warm_cache is not None else None
+
+    def finished(sc, result):
+        if sc.name in keys and not result["cached"]:
+            key, description = keys[sc.name]
+            result_cache.put(key, result["filename"], description)
+        if catalog is not None:
+            catalog.add(result["filename"])
+        results.append(result)
+        report(f"[{sc.name}] done ({len(results) + len(failures)}/{len(scenarios)})")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(config, messages)) as pool:
+            # Scenarios that completed before or are in the result cache are not simulated
+            todo = []
+            for sc in scenarios:
+                previous = latest_manifest(project_name, sc.state, extension) if resume else None
+                if previous is not None and previous.data["complete"]:
+                    report(f"[{sc.name}] already complete in {previous.filename}, skipped")
+                    continue
+                if result_cache is not None:
+                    keys[sc.name] = result_cache.key(config, sc, variables, backend, steady, warm_start)
+                    key, description = keys[sc.name]
+                    filename = generate_filename(project_name, sc.state, extension)
+                    if previous is None and not force and result_cache.fetch(key, filename):
+                        report(f"[{sc.name}] unchanged inputs, output copied from the result cache")
+                        finished(sc, {
+                            "scenario": sc.name,
+                            "filename": filename,
+                            "wall_s": 0.0,
+                            "settled": RunManifest.load(filename).data.get("settled", {}),
+                            "cached": True,
+                        })
+                        continue
+                todo.append((sc, previous))
+
+            if warm_cache is not None:
+                # One warmup run per distinct prefix that is not cached yet
+                prefixes = {}
+                for sc, _ in todo:
+                    key = _scenario_warmup_key(config, sc, variables, state_variables, steady)
+                    if key not in prefixes and warm_cache.get(key) is None:
+                        prefixes[key] = sc
+                collect({pool.submit(_prewarm_in_worker, sc, variables, chunk_size,
+                                     warm_cache, state_variables, steady): sc
+                         for sc in prefixes.values()}, lambda sc, result: None)
+                failures.clear()  # a failed prewarm falls back to a full warmup
+
+            pending = {}
+            for sc, previous in todo:
+                if previous is not None:
+                    filename = previous.filename
+                else:
+                    filename = generate_filename(project_name, sc.state, extension)
+                future = pool.submit(_run_in_worker, sc, variables, filename, chunk_size, backend,
+                                     warm_cache, state_variables, previous is not None, metrics, steady)
+                pending[future] = sc
+            collect(pending, finished)
+    finally:
+        manager.shutdown()
+    return results, failures
+
+
+# --- Benchmark ---
+if __name__ == "__main__":
+    import tempfile
+
+    variables = [[f"VAR{i}:Value", "-"] for i in range(18)]
+    sweep = [Scenario(i, 0, 10, "VAR0:Value", 1.1, 30) for i in range(6)]
+    # Fake simulator with 0.2 ms per run_for call, roughly a fast real model
+    config = SimulatorConfig("fake", "fake", "m", "p", "v", simulator_module="simlog.fake_kspice",
+                             simulator_options=(("run_overhead", 2e-4),))
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (1, 2, 3, 6):
+            start = time.perf_counter()
+            run_scenarios(sweep, config, variables, f"{tmp}/bench{n}", workers=n, report=lambda msg: None)
+            print(f"workers={n}: {time.perf_counter() - start:.2f}s for {len(sweep)} scenarios")
@@ -0,0 +1,228 @@
+import csv
+import json
+import os
+import re
+from collections import namedtuple
+
+from simlog.stepping import APP_SEPARATOR
+
+# -----------------------------------------------------------------------------
+# Module: Header Schema
+# Description: One parse of a result file's header, shared by the analysis
+#              tools. Recording writes columns as "Tag:Attribute [unit]"
+#              (format_column); parse_column turns them back into
+#              (tag, attribute, unit, app) with precompiled patterns, and
+#              HeaderSchema keeps a name → column index and a tag → columns
+#              index so tools can select columns without scanning the header.
+#              Runs that record several applications prefix each column
+#              with its application ("App/Tag:Attribute [unit]"); the prefix
+#              is parsed into its own field, so tags and "Tag:Attribute"
+#              names still find those columns.
+#              load_schema caches the parse in a <file>.schema.json sidecar
+#              keyed by the file's path and mtime, so repeated tools over the
+#              same sweep files skip the header parse altogether.
+# -----------------------------------------------------------------------------
+
+# "Name [unit]" as written by the recorder
+_BRACKET_RE = re.compile(r"^(?P<name>.*?)\s*\[(?P<unit>[^\]]*)\]\s*$")
+# Fallbacks for hand-made files: "Name (unit)", a [unit] or (unit) anywhere
+# in the name, and a bare pressure unit token
+_PAREN_RE = re.compile(r"^(?P<name>.*?)\s*\((?P<unit>[^)]+)\)\s*$")
+_BRACKET_ANY_RE = re.compile(r"\[(?P<unit>[^\]]+)\]")
+_PAREN_ANY_RE = re.compile(r"\((?P<unit>[^)]+)\)")
+_TOKEN_RE = re.compile(r"\b(?P<unit>mbar|kpa|mpa|psi|bar|pa)\b", re.IGNORECASE)
+# "App/Tag:Attribute" as written for several applications (simlog.stepping.app_columns)
+_APP_RE = re.compile(rf"^(?P<app>[^{APP_SEPARATOR}:]+){APP_SEPARATOR}(?P<name>[^{APP_SEPARATOR}]+:.*)$")
+
+# app is None for columns of a single-application run
+Column = namedtuple("Column", ["tag", "attribute", "unit", "app"], defaults=(None,))
+
+
+def format_column(name, unit):
+    """Header text of one column: "Name [unit]"."""
+    return f"{name} [{unit}]"
+
+
+def split_column(col):
+    """
+    Split a header column into its base name and unit.
+
+    Params:
+        col (str): Header column, e.g. "D-13PT2122:MeasuredValue [barg]".
+
+    Returns:
+        Tuple[str, str | None]: Base name and unit (None if not found).
+    """
+    # The first [unit] wins over any (unit), as it always has; the base name
+    # is only split off when that first delimiter also ends the column
+    for anchored_re, any_re in ((_BRACKET_RE, _BRACKET_ANY_RE), (_PAREN_RE, _PAREN_ANY_RE)):
+        first = any_re.search(col)
+        anchored = anchored_re.match(col)
+        if anchored and (first is None or first.start("unit") == anchored.start("unit")):
+            return anchored.group("name"), anchored.group("unit").strip()
+        if first:
+            return col, first.group("unit").strip()
+    m = _TOKEN_RE.search(col)
+    return col, m.group("unit").strip() if m else None
+
+
+def split_app(name):
+    """
+    Split a base name into its application and the name within it.
+
+    "Hugin A/D-13PT2122:MeasuredValue" gives ("Hugin A",
+    "D-13PT2122:MeasuredValue"); a name without an application prefix gives
+    (None, name). Only a "Tag:Attribute" name after the separator counts, so
+    derived columns such as "DP/DT" keep their name.
+    """
+    m = _APP_RE.match(name)
+    return (m.group("app"), m.group("name")) if m else (None, name)
+
+
+def parse_column(col):
+    """
+    Parse a header column into (tag, attribute, unit, app).
+
+    "D-13PT2122:MeasuredValue [barg]" gives ("D-13PT2122", "MeasuredValue",
+    "barg", None); columns without ":" such as "ModelTime [s]" have attribute
+    None, and "Hugin A/D-13PT2122:MeasuredValue [barg]" has app "Hugin A".
+    """
+    name, unit = split_column(col)
+    app, name = split_app(name)
+    tag, sep, attribute = name.partition(":")
+    return Column(tag, attribute if sep else None, unit, app)
+
+
+class HeaderSchema:
+    """
+    Parsed header of one result file.
+
+    Params:
+        columns (List[str]): Header columns in file order.
+        fields (List[Column] | None): Their parse (computed if None).
+    """
+
+    def __init__(self, columns, fields=None):
+        self.columns = list(columns)
+        self.fields = [Column(*f) for f in fields] if fields is not None else \
+            [parse_column(col) for col in self.columns]
+        self.names = [split_column(col)[0] for col in self.columns]
+        # Base names and full header columns both map to the column position;
+        # so do names without their application, for the first application
+        # that has them
+        self.index = {}
+        self.by_tag = {}
+        for i, (col, name, field) in enumerate(zip(self.columns, self.names, self.fields)):
+            self.index.setdefault(name, i)
+            self.index.setdefault(col, i)
+            self.by_tag.setdefault(field.tag, []).append(i)
+        for i, name in enumerate(self.names):
+            self.index.setdefault(split_app(name)[1], i)
+
+    def position(self, name):
+        """Column index of a base name ("Tag:Attribute", optionally "App/Tag:Attribute") or full header column."""
+        try:
+            return self.index[name]
+        except KeyError:
+            raise KeyError(f"Column {name!r} is not in the file") from None
+
+    def unit(self, name):
+        return self.fields[self.position(name)].unit
+
+    def units(self):
+        """{base name: unit} for every column, also under the names without their application."""
+        units = {name: field.unit for name, field in zip(self.names, self.fields)}
+        for name, field in zip(self.names, self.fields):
+            units.setdefault(split_app(name)[1], field.unit)
+        return units
+
+    def select(self, tag):
+        """Header columns that belong to a tag (in any application), in file order."""
+        return [self.columns[i] for i in self.by_tag.get(tag, [])]
+
+    def to_dict(self):
+        return {"columns": self.columns, "fields": [list(f) for f in self.fields]}
+
+
+def schema_path(filename):
+    """Path of the cached header schema that belongs to a result file."""
+    return filename + ".schema.json"
+
+
+def read_columns(filename):
+    """
+    Read the header columns of a result file without loading its data.
+
+    Params:
+        filename (str): .csv, .f64 (memmap) or .parquet file.
+
+    Returns:
+        List[str]: "Name [unit]" header columns.
+    """
+    if filename.endswith(".f64"):
+        from simlog.columnar import sidecar_path
+
+        with open(sidecar_path(filename)) as f:
+            meta = json.load(f)
+        return [format_column(name, unit) for name, unit in zip(meta["columns"], meta["units"])]
+    if filename.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        schema = pq.read_schema(filename)
+        units = json.loads(schema.metadata[b"units"])
+        return [format_column(name, units[name]) for name in schema.names]
+    with open(filename, 'r', newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), [])
+
+
+# Parsed schemas of this process, keyed by (path, mtime)
+_schemas = {}
+
+# Bumped when parse_column changes, so sidecars from an older parse are ignored
+PARSER_VERSION = 4
+
+
+def load_schema(filename, use_sidecar=True):
+    """
+    Header schema of a result file, parsed once per file version.
+
+    The parse is kept in memory and, if use_sidecar, in <file>.schema.json;
+    both are keyed by the absolute path and mtime, so a rewritten file is
+    parsed again.
+
+    Params:
+        filename (str): .csv, .f64 (memmap) or .parquet file.
+        use_sidecar (bool): Read and write the sidecar cache file.
+
+    Returns:
+        HeaderSchema: Parsed header.
+    """
+    path = os.path.abspath(filename)
+    mtime = os.stat(path).st_mtime_ns
+    key = (path, mtime)
+    if key in _schemas:
+        return _schemas[key]
+
+    schema = None
+    sidecar = schema_path(filename)
+    if use_sidecar:
+        try:
+            with open(sidecar) as f:
+                cached = json.load(f)
+            if cached["path"] == path and cached["mtime_ns"] == mtime and \
+                    cached.get("parser") == PARSER_VERSION:
+                schema = HeaderSchema(cached["columns"], cached["fields"])
+        except (OSError, ValueError, KeyError):
+            pass  # missing or stale: parse again
+    if schema is None:
+        schema = HeaderSchema(read_columns(filename))
+        if use_sidecar:
+            try:
+                tmp = sidecar + ".tmp"
+                with open(tmp, 'w') as f:
+                    json.dump({"path": path, "mtime_ns": mtime, "parser": PARSER_VERSION, **schema.to_dict()}, f)
+                os.replace(tmp, sidecar)
+            except OSError:
+                pass  # read-only location: the in-memory cache still applies
+    _schemas[key] = schema
+    return schema
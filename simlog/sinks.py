@@ -0,0 +1,243 @@
+import csv
+import queue
+import threading
+import time
+
+import numpy as np
+
+from simlog.schema import format_column
+
+# -----------------------------------------------------------------------------
+# Module: Output Sinks
+# Description: Destinations for sampled rows. A sink keeps its file open for the
+#              whole run and receives whole chunks (lists of rows, or a 2-D
+#              array view that the sampling loop reuses after the call).
+#              AsyncCsvSink hands the chunks to a writer thread through a
+#              bounded queue so the loop never waits on the disk.
+# -----------------------------------------------------------------------------
+
+
+def header_columns(variables):
+    """
+    Build the flat "Name [unit]" header, with ModelTime as the first column.
+
+    Params:
+        variables (List[List[str, str]]): List of [name, unit] pairs.
+
+    Returns:
+        List[str]: Column headers.
+    """
+    header = [['ModelTime', 's']] + list(variables)
+    return [format_column(name, unit) for name, unit in header]
+
+
+def open_csv_for_append(filename, variables):
+    """
+    Open a CSV file for appending, writing the header first if the file does
+    not exist or is empty.
+
+    Params:
+        filename (str): Path to the CSV file.
+        variables (List[List[str, str]]): List of [name, unit] pairs for columns.
+
+    Returns:
+        file: Handle opened in append mode.
+    """
+    f = open(filename, 'a+', newline='')
+    f.seek(0)
+    if not f.read(1):
+        csv.writer(f).writerow(header_columns(variables))
+        f.flush()
+    f.seek(0, 2)
+    return f
+
+
+class CsvSink:
+    """
+    Synchronous CSV sink holding one file handle open for the whole run.
+
+    Params:
+        filename (str): Output CSV file path.
+        variables (List[List[str, str]]): Sampled variables ([name, unit]).
+    """
+
+    def __init__(self, filename, variables):
+        self.filename = filename
+        self.variables = variables
+        self._file = open_csv_for_append(filename, variables)
+        self._writer = csv.writer(self._file)
+        self.closed = False
+
+    def write_rows(self, rows):
+        """Write a chunk of rows; the sink takes ownership of a list."""
+        if isinstance(rows, np.ndarray):
+            rows = rows.tolist()
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MemorySink:
+    """
+    Sink that keeps the rows in memory, e.g. to cache a warmup phase.
+
+    Params:
+        filename (str): Label used in progress messages.
+    """
+
+    def __init__(self, filename="<memory>"):
+        self.filename = filename
+        self.rows = []
+        self.closed = False
+
+    def write_rows(self, rows):
+        if isinstance(rows, np.ndarray):
+            rows = rows.tolist()
+        self.rows.extend(rows)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_STOP = object()
+
+
+class AsyncCsvSink:
+    """
+    CSV sink drained by a background writer thread.
+
+    The sampling loop fills one chunk while the writer thread writes the
+    previous one (double buffering). The queue is bounded, so if the disk falls
+    behind by more than max_queue chunks the loop waits instead of buffering
+    without limit. close() always drains everything that was queued, which is
+    what keeps partial data on disk when a run fails.
+
+    Params:
+        filename (str): Output CSV file path.
+        variables (List[List[str, str]]): Sampled variables ([name, unit]).
+        max_queue (int): Maximum number of chunks waiting to be written.
+    """
+
+    def __init__(self, filename, variables, max_queue=4):
+        self.filename = filename
+        self.variables = variables
+        self._file = open_csv_for_append(filename, variables)
+        self._writer = csv.writer(self._file)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._error = None
+        self.closed = False
+
+        # Metrics (written by both threads, read with metrics())
+        self._chunks = 0
+        self._rows = 0
+        self._max_depth = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latency_last = 0.0
+
+        self._thread = threading.Thread(target=self._drain, name=f"csv-writer:{filename}", daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        """Writer thread: write chunks in arrival order until the stop marker."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                queued_at, rows = item
+                if self._error is None:
+                    try:
+                        self._writer.writerows(rows)
+                        self._file.flush()
+                    except Exception as e:
+                        self._error = e
+                latency = time.perf_counter() - queued_at
+                self._chunks += 1
+                self._rows += len(rows)
+                self._latency_last = latency
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+            finally:
+                self._queue.task_done()
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            raise IOError(f"Background write to {self.filename} failed") from self._error
+
+    def write_rows(self, rows):
+        """
+        Queue a chunk of rows for writing; the sink takes ownership of a list,
+        so the caller must start a new list instead of clearing this one. An
+        array is copied, since the caller reuses it for the next chunk.
+        """
+        if self.closed:
+            raise ValueError(f"Sink for {self.filename} is closed")
+        self._raise_pending_error()
+        if isinstance(rows, np.ndarray):
+            rows = rows.tolist()
+        self._queue.put((time.perf_counter(), rows))
+        self._max_depth = max(self._max_depth, self._queue.qsize())
+
+    def flush(self):
+        """Block until every queued chunk has been written."""
+        self._queue.join()
+        self._raise_pending_error()
+
+    def close(self):
+        """Drain the queue, stop the writer thread and close the file."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._file.close()
+        self._raise_pending_error()
+
+    def metrics(self):
+        """
+        Snapshot of the writer metrics.
+
+        Returns:
+            dict: queue_depth, max_queue_depth, chunks, rows and flush latency
+            (seconds from queueing a chunk until it is on disk) last/mean/max.
+        """
+        chunks = self._chunks
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self._max_depth,
+            "chunks": chunks,
+            "rows": self._rows,
+            "flush_latency_last": self._latency_last,
+            "flush_latency_mean": self._latency_total / chunks if chunks else 0.0,
+            "flush_latency_max": self._latency_max,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
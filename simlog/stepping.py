@@ -0,0 +1,278 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+# -----------------------------------------------------------------------------
+# Module: Stepping Engine
+# Description: Advances a K-Spice timeline in blocks and samples variables at a
+#              configurable model-time period. The K-Spice timeline only offers
+#              point reads (get_values at the current model time), so the
+#              saving comes from advancing straight to the next sample instant
+#              in as few run_for calls as possible and skipping the reads in
+#              between when only coarse data is needed. MultiAppReader
+#              samples several applications of the timeline into one row, so
+#              one run records plant-wide data on a shared model time.
+# -----------------------------------------------------------------------------
+
+# Separates the application from the variable name in multi-application columns
+APP_SEPARATOR = "/"
+
+
+def step_schedule(total_seconds, sample_period=1, block_seconds=None):
+    """
+    Plan the run_for advances and sample points for a run.
+
+    Params:
+        total_seconds (int): Simulated duration in seconds.
+        sample_period (int): Model seconds between recorded samples.
+        block_seconds (int | None): Longest single run_for advance. Defaults to
+            the sample period, i.e. one run_for call per sample.
+
+    Yields:
+        Tuple[int, int, bool]: (advance seconds, elapsed seconds after the
+        advance, whether a sample is taken at that point). The last sample is
+        always taken at total_seconds, even if the period does not divide it.
+    """
+    if sample_period < 1:
+        raise ValueError("sample_period must be at least 1 second")
+    if block_seconds is None:
+        block_seconds = sample_period
+    if block_seconds < 1:
+        raise ValueError("block_seconds must be at least 1 second")
+
+    elapsed = 0
+    while elapsed < total_seconds:
+        next_sample = min(elapsed + sample_period, total_seconds)
+        while elapsed < next_sample:
+            step = min(block_seconds, next_sample - elapsed)
+            elapsed += step
+            yield step, elapsed, elapsed == next_sample
+
+
+def app_columns(app_variables):
+    """
+    Columns of a {app: variables} mapping in read order, each name
+    qualified as "app/name" so equal tags in different applications differ.
+
+    Returns:
+        List[List[str, str]]: [name, unit] per column.
+    """
+    return [[f"{app}{APP_SEPARATOR}{name}", unit]
+            for app, variables in app_variables.items() for name, unit in variables]
+
+
+def resolve_applications(timeline, variables):
+    """
+    A {app: variables} mapping keyed by application name: integer keys are
+    indices into timeline.applications, like Scenario.app, and are replaced
+    by that application's name. Variable lists are returned unchanged.
+    """
+    if not isinstance(variables, dict):
+        return variables
+    return {timeline.applications[app].name if isinstance(app, int) else app: app_variables
+            for app, app_variables in variables.items()}
+
+
+def sampled_columns(variables):
+    """[name, unit] columns of a variable list, or of a {app: variables} mapping (see app_columns)."""
+    return app_columns(variables) if isinstance(variables, dict) else variables
+
+
+class MultiAppReader:
+    """
+    Reads the variables of several applications at the current model time
+    as one row, in mapping order.
+
+    Params:
+        timeline (kspice.Timeline): Active timeline.
+        app_variables (Dict[str, List[List[str, str]]]): Variables to sample
+            per application name.
+        concurrent (bool): Issue the per-application get_values calls from a
+            thread pool. Only for simulator bindings that accept calls from
+            several threads; otherwise the calls are made one after another.
+    """
+
+    def __init__(self, timeline, app_variables, concurrent=False):
+        self.timeline = timeline
+        self.calls = [(app, list(variables)) for app, variables in app_variables.items()]
+        self._pool = None
+        if concurrent and len(self.calls) > 1:
+            self._pool = ThreadPoolExecutor(max_workers=len(self.calls) - 1)
+
+    def __call__(self):
+        get_values = self.timeline.get_values
+        calls = self.calls
+        if self._pool is None:
+            parts = [get_values(app, variables) for app, variables in calls]
+        else:
+            # The first application is read on this thread while the others run in the pool
+            futures = [self._pool.submit(get_values, app, variables) for app, variables in calls[1:]]
+            parts = [get_values(*calls[0])] + [future.result() for future in futures]
+        row = []
+        for part in parts:
+            row.extend(part)
+        return row
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def step_samples(timeline, app, variables, total_seconds, sample_period=1, block_seconds=None,
+                 time_offset=0.0, read=None):
+    """
+    Run the timeline for a duration, yielding the raw samples.
+
+    Same parameters as step_timeline; no row list is built, so the caller can
+    copy the values straight into its own storage (see SampleBuffer). read
+    (e.g. a MultiAppReader) replaces timeline.get_values(app, variables).
+
+    Yields:
+        Tuple[int, float, List[float]]: Elapsed seconds, model time and the
+        values returned by get_values at that point.
+    """
+    # timedelta objects are reused instead of rebuilt for every call
+    durations = {}
+    for step, elapsed, take_sample in step_schedule(total_seconds, sample_period, block_seconds):
+        duration = durations.get(step)
+        if duration is None:
+            duration = durations[step] = timedelta(seconds=step)
+        timeline.run_for(duration)
+        if take_sample:
+            values = read() if read is not None else timeline.get_values(app, variables)
+            yield elapsed, timeline.model_time.total_seconds() + time_offset, values
+
+
+def step_timeline(timeline, app, variables, total_seconds, sample_period=1, block_seconds=None,
+                  time_offset=0.0):
+    """
+    Run the timeline for a duration, yielding sampled rows.
+
+    Params:
+        timeline (kspice.Timeline): Active K-Spice timeline object.
+        app (str): Application name within the timeline.
+        variables (List[List[str, str]]): Variables to sample ([name, unit]).
+        total_seconds (int): Simulated duration in seconds.
+        sample_period (int): Model seconds between recorded samples.
+        block_seconds (int | None): Longest single run_for advance.
+        time_offset (float): Added to the recorded model time, e.g. when the
+            timeline was restored from a snapshot and restarted its clock.
+
+    Yields:
+        Tuple[int, List[float]]: Elapsed seconds and the row
+        [model_time, *values] sampled at that point.
+    """
+    for elapsed, model_time, values in step_samples(timeline, app, variables, total_seconds,
+                                                    sample_period, block_seconds, time_offset):
+        row = [model_time]
+        row.extend(values)
+        yield elapsed, row
+
+
+def fast_forward(timeline, total_seconds, block_seconds=60):
+    """
+    Advance the timeline without sampling, e.g. to get back to where an
+    interrupted run stopped.
+
+    Params:
+        timeline (kspice.Timeline): Active K-Spice timeline object.
+        total_seconds (int): Model seconds to advance.
+        block_seconds (int): Longest single run_for advance.
+    """
+    if total_seconds <= 0:
+        return
+    for step, _, _ in step_schedule(total_seconds, total_seconds, block_seconds):
+        timeline.run_for(timedelta(seconds=step))
+
+
+# --- Benchmark ---
+def benchmark_stepping(total_seconds=3600, configs=((1, None), (5, None), (10, None), (60, 10)),
+                       run_overhead=50e-6, read_overhead=50e-6, n_variables=18):
+    """
+    Measure simulated seconds per wall second against a fake timeline.
+
+    Params:
+        total_seconds (int): Simulated duration per configuration.
+        configs (Iterable[Tuple[int, int | None]]): (sample_period, block_seconds) pairs.
+        run_overhead (float): Fake wall cost per run_for call.
+        read_overhead (float): Fake wall cost per get_values call.
+        n_variables (int): Number of sampled variables.
+
+    Returns:
+        List[dict]: One result row per configuration.
+    """
+    from simlog.fake_kspice import FakeTimeline
+
+    variables = [[f"VAR{i}:Value", "-"] for i in range(n_variables)]
+    results = []
+    for sample_period, block_seconds in configs:
+        tl = FakeTimeline(run_overhead=run_overhead, read_overhead=read_overhead)
+        app = tl.applications[0].name
+        start = time.perf_counter()
+        rows = sum(1 for _ in step_timeline(tl, app, variables, total_seconds, sample_period, block_seconds))
+        wall = time.perf_counter() - start
+        results.append({
+            "sample_period": sample_period,
+            "block_seconds": block_seconds or sample_period,
+            "rows": rows,
+            "run_calls": tl.run_calls,
+            "read_calls": tl.read_calls,
+            "wall_s": wall,
+            "sim_s_per_wall_s": total_seconds / wall if wall else float("inf"),
+        })
+    return results
+
+
+def benchmark_multi_app(total_seconds=600, run_overhead=200e-6, read_overhead=200e-6, n_variables=18):
+    """
+    Record two applications with one run each against one shared pass
+    (sequential and concurrent reads), and check the shared pass returns the
+    same values.
+
+    Returns:
+        List[dict]: Mode, run_for and get_values calls, wall time.
+    """
+    from simlog.fake_kspice import FakeTimeline
+
+    apps = ("Hugin A", "Hugin B")
+    app_variables = {app: [[f"VAR{i}:Value", "-"] for i in range(n_variables)] for app in apps}
+    results = []
+
+    tl = FakeTimeline(apps, run_overhead=run_overhead, read_overhead=read_overhead)
+    start = time.perf_counter()
+    separate = []
+    for app in apps:
+        tl.initialize()
+        separate.append([values for _, _, values in step_samples(tl, app, app_variables[app], total_seconds)])
+    results.append({"mode": "one run per app", "run_calls": tl.run_calls, "read_calls": tl.read_calls,
+                    "wall_s": time.perf_counter() - start})
+    expected = [a + b for a, b in zip(*separate)]
+
+    for mode, concurrent in (("shared pass", False), ("shared, concurrent", True)):
+        tl = FakeTimeline(apps, run_overhead=run_overhead, read_overhead=read_overhead)
+        start = time.perf_counter()
+        with MultiAppReader(tl, app_variables, concurrent) as read:
+            rows = [values for _, _, values in step_samples(tl, None, None, total_seconds, read=read)]
+        wall = time.perf_counter() - start
+        if rows != expected:
+            raise AssertionError(f"{mode} differs from separate runs")
+        results.append({"mode": mode, "run_calls": tl.run_calls, "read_calls": tl.read_calls, "wall_s": wall})
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'period':>6} {'block':>6} {'rows':>6} {'run_for':>8} {'reads':>6} {'wall [s]':>9} {'sim s/wall s':>13}")
+    for r in benchmark_stepping():
+        print(f"{r['sample_period']:>6} {r['block_seconds']:>6} {r['rows']:>6} {r['run_calls']:>8} "
+              f"{r['read_calls']:>6} {r['wall_s']:>9.3f} {r['sim_s_per_wall_s']:>13.0f}")
+
+    print(f"\n{'applications':>18} {'run_for':>8} {'reads':>6} {'wall [s]':>9}")
+    for r in benchmark_multi_app():
+        print(f"{r['mode']:>18} {r['run_calls']:>8} {r['read_calls']:>6} {r['wall_s']:>9.3f}")
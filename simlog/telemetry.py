@@ -0,0 +1,290 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -----------------------------------------------------------------------------
+# Module: Run Telemetry
+# Description: In-process metrics for the recording loop. A Telemetry object
+#              wraps the timeline (run_for, get_values) and the chunk flush
+#              of run_buffered_simulation with timers that feed log2-bucketed
+#              latency histograms, and tracks model seconds advanced against
+#              wall time for the real-time factor and an ETA. Snapshots are
+#              appended as JSON lines to a metrics file every interval
+#              seconds and/or served from a local HTTP endpoint. Without a
+#              Telemetry object the loop runs unwrapped, so switching it off
+#              costs nothing.
+# -----------------------------------------------------------------------------
+
+PHASES = ("run_for", "get_values", "flush")
+
+
+class Histogram:
+    """
+    Latency histogram with power-of-two nanosecond buckets: bucket b counts
+    durations in [2**(b-1), 2**b) ns, so recording is one bit_length().
+    """
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * 64
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        self.counts[ns.bit_length()] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def quantile(self, q):
+        """Estimate of the q-quantile in ns, interpolated inside its power-of-two bucket."""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for b, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = 1 << (b - 1) if b else 0
+                return min(low + (low or 1) * (rank - seen) / n, self.max_ns)
+            seen += n
+        return self.max_ns
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_s": self.total_ns / 1e9,
+            "mean_us": self.total_ns / self.count / 1e3 if self.count else 0.0,
+            "p50_us": self.quantile(0.50) / 1e3,
+            "p90_us": self.quantile(0.90) / 1e3,
+            "p99_us": self.quantile(0.99) / 1e3,
+            "max_us": self.max_ns / 1e3,
+        }
+
+
+class _TimedTimeline:
+    """Timeline proxy that times run_for and get_values; everything else passes through."""
+
+    def __init__(self, timeline, telemetry):
+        self._timeline = timeline
+        self._telemetry = telemetry
+        self._run_for = telemetry.phases["run_for"]
+        self._get_values = telemetry.phases["get_values"]
+
+    def run_for(self, duration):
+        start = time.perf_counter_ns()
+        result = self._timeline.run_for(duration)
+        now = time.perf_counter_ns()
+        self._run_for.record(now - start)
+        telemetry = self._telemetry
+        telemetry.model_s += duration.total_seconds()
+        if now >= telemetry._next_emit:
+            telemetry.emit(now)
+        return result
+
+    def get_values(self, app, variables):
+        start = time.perf_counter_ns()
+        result = self._timeline.get_values(app, variables)
+        self._get_values.record(time.perf_counter_ns() - start)
+        self._telemetry.samples += 1
+        return result
+
+    @property
+    def model_time(self):
+        # Read once per sample; spared the __getattr__ fallback
+        return self._timeline.model_time
+
+    def __getattr__(self, name):
+        return getattr(self._timeline, name)
+
+
+class Telemetry:
+    """
+    Metrics of one or more recording runs (e.g. a scenario's warmup and
+    step response), passed to run_buffered_simulation as telemetry=.
+
+    Params:
+        path (str | None): Append a JSON-lines snapshot here every interval.
+        port (int | None): Serve the latest snapshot at http://127.0.0.1:port/
+            (0 picks a free port; see url).
+        interval (float): Wall seconds between periodic snapshots.
+        target_speed (float | None): Requested simulator speed (set_speed),
+            reported next to the measured real-time factor.
+        label (str | None): Added to every snapshot, e.g. the scenario name.
+    """
+
+    def __init__(self, path=None, port=None, interval=5.0, target_speed=None, label=None):
+        self.path = path
+        self.interval_ns = int(interval * 1e9)
+        self.target_speed = target_speed
+        self.label = label
+        self.phases = {name: Histogram() for name in PHASES}
+        self.samples = 0
+        self.model_s = 0.0
+        self.total_model_s = 0.0
+        self._file = open(path, 'a') if path else None
+        self._started = time.perf_counter_ns()
+        self._next_emit = self._started + self.interval_ns
+        self._last = (self._started, 0.0)   # (wall ns, model s) of the previous snapshot
+        self._recent_factor = None
+        self._server = None
+        if port is not None:
+            self._serve(port)
+
+    # --- Wrapping ---
+    def wrap_timeline(self, timeline):
+        """Timeline whose run_for/get_values calls are timed."""
+        return _TimedTimeline(timeline, self)
+
+    def timed(self, phase, fn):
+        """fn with each call recorded in the phase's histogram."""
+        histogram = self.phases.setdefault(phase, Histogram())
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.record(time.perf_counter_ns() - start)
+        return wrapper
+
+    def timed_read(self, read):
+        """
+        read() timed as one get_values call and counted as one sample, for
+        readers that combine several get_values calls (MultiAppReader).
+        """
+        histogram = self.phases["get_values"]
+
+        def wrapper():
+            start = time.perf_counter_ns()
+            result = read()
+            histogram.record(time.perf_counter_ns() - start)
+            self.samples += 1
+            return result
+        return wrapper
+
+    def start_run(self, total_seconds):
+        """Add a run of total_seconds model seconds to the expected total (for the ETA)."""
+        self.total_model_s += total_seconds
+
+    # --- Snapshots ---
+    def snapshot(self, now=None):
+        """Current metrics as a JSON-serializable dict."""
+        now = now or time.perf_counter_ns()
+        wall_s = (now - self._started) / 1e9
+        factor = self.model_s / wall_s if wall_s > 0 else None
+        # Rate since the previous snapshot, so the ETA follows slowdowns
+        last_ns, last_model = self._last
+        if now - last_ns >= self.interval_ns // 2 and now > last_ns:
+            self._recent_factor = (self.model_s - last_model) / ((now - last_ns) / 1e9)
+        rate = self._recent_factor or factor
+        remaining = max(0.0, self.total_model_s - self.model_s)
+        return {
+            "time": time.time(),
+            "label": self.label,
+            "wall_s": wall_s,
+            "model_s": self.model_s,
+            "total_model_s": self.total_model_s,
+            "progress": self.model_s / self.total_model_s if self.total_model_s else None,
+            "real_time_factor": factor,
+            "recent_real_time_factor": self._recent_factor,
+            "target_speed": self.target_speed,
+            "eta_s": remaining / rate if rate else None,
+            "samples": self.samples,
+            "samples_per_s": self.samples / wall_s if wall_s > 0 else None,
+            "phases": {name: h.summary() for name, h in self.phases.items()},
+        }
+
+    def emit(self, now=None):
+        """Write a snapshot to the metrics file and schedule the next one."""
+        now = now or time.perf_counter_ns()
+        snap = self.snapshot(now)
+        self._last = (now, self.model_s)
+        self._next_emit = now + self.interval_ns
+        if self._file is not None:
+            self._file.write(json.dumps(snap) + "\n")
+            self._file.flush()
+        return snap
+
+    # --- HTTP endpoint ---
+    def _serve(self, port):
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(telemetry.snapshot()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep the simulation's console clean
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        """Address of the HTTP endpoint, or None."""
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def close(self):
+        """Write a final snapshot and stop the file and endpoint."""
+        if self._file is not None:
+            self.emit()
+            self._file.close()
+            self._file = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# --- Benchmark ---
+def benchmark_telemetry(total_seconds=20_000, n_variables=18, chunk_size=500, repeats=5):
+    """
+    Cost of the instrumentation: run_buffered_simulation against a zero-cost
+    fake timeline with telemetry off and on (best of repeats).
+
+    Returns:
+        List[dict]: Mode, wall time and overhead per sample.
+    """
+    from simlog.fake_kspice import FakeTimeline
+    from simlog.recording import run_buffered_simulation
+    from simlog.sinks import MemorySink
+
+    variables = [[f"VAR{i}:Value", "-"] for i in range(n_variables)]
+    results = []
+    for mode in ("off", "on"):
+        best = float("inf")
+        for _ in range(repeats):
+            tl = FakeTimeline()
+            telemetry = Telemetry(interval=1.0) if mode == "on" else None
+            with MemorySink("bench") as sink:
+                start = time.perf_counter()
+                run_buffered_simulation(tl, tl.applications[0].name, variables, total_seconds / 60,
+                                        chunk_size, sink.filename, sink=sink, report=lambda msg: None,
+                                        telemetry=telemetry)
+                best = min(best, time.perf_counter() - start)
+        results.append({"mode": mode, "wall_s": best, "us_per_sample": best / total_seconds * 1e6})
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'telemetry':>9} {'wall [ms]':>10} {'us/sample':>10}")
+    for r in benchmark_telemetry():
+        print(f"{r['mode']:>9} {r['wall_s'] * 1e3:>10.1f} {r['us_per_sample']:>10.2f}")
@@ -0,0 +1,260 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Module: Warm-State Cache
+# Description: Stores the settled operating point reached after a scenario's
+#              warmup, so the shared prefix (load initial condition, run N
+#              minutes) is simulated once per sweep instead of once per
+#              scenario. The full simulator state (holdups, levels,
+#              controller integrators) is saved by the timeline as an
+#              initial-condition values file and loaded again in place of
+#              the original one; the warmup rows stored with it are copied
+#              into each scenario's output, which then matches a full warmup.
+#              Timelines that cannot save initial conditions fall back to
+#              writing an explicit list of state variables back; that only
+#              approximates the operating point, so the warmup rows are not
+#              copied and the manifest marks the output as restored.
+#              The saved initial-condition files belong to their cache entry
+#              and are deleted with it, so evicted warmups do not pile up in
+#              the K-Spice project.
+# -----------------------------------------------------------------------------
+
+
+def can_save_state(timeline):
+    """
+    Whether the timeline can save its full state as an initial condition.
+
+    timeline.save_initial_condition(name) is an assumed API (the "save
+    initial condition" action of the K-Spice GUI), not part of the kspice
+    calls used elsewhere; this probes for it so timelines without it fall
+    back to state variables.
+    """
+    return callable(getattr(timeline, "save_initial_condition", None))
+
+
+def _saved_files(project_path, values_file):
+    """Files under project_path that make up the saved initial condition values_file."""
+    if project_path is None:
+        return []
+    pattern = os.path.join(glob.escape(project_path), "**", glob.escape(values_file) + "*")
+    return sorted(glob.glob(pattern, recursive=True))
+
+
+def capture_state(timeline, app, values_file=None, state_variables=(), project_path=None):
+    """
+    Capture the settled operating point.
+
+    Params:
+        timeline (kspice.Timeline): Timeline at the end of the warmup.
+        app (str): Application name.
+        values_file (str | None): Save the full state as this initial
+            condition (see can_save_state).
+        project_path (str | None): K-Spice project the initial condition is
+            saved in; the files found there are recorded so the cache can
+            delete them with the entry.
+        state_variables (List[str]): Without values_file, the variables read
+            instead; they must cover the model states and controller
+            setpoints/outputs, not just the logged signals.
+
+    Returns:
+        dict: {"app", "model_time"} and either "values_file" and
+        "saved_files" or "values" ({name: value}).
+    """
+    snapshot = {"app": app, "model_time": timeline.model_time.total_seconds()}
+    if values_file is not None:
+        timeline.save_initial_condition(values_file)
+        snapshot["values_file"] = values_file
+        snapshot["saved_files"] = _saved_files(project_path, values_file)
+    elif state_variables:
+        snapshot["values"] = {name: timeline.get_value(app, name) for name in state_variables}
+    else:
+        raise ValueError("Need a values_file or state_variables to capture the state")
+    return snapshot
+
+
+def is_full_state(snapshot):
+    """Whether a snapshot restores the full simulator state (not just state variables)."""
+    return "values_file" in snapshot
+
+
+def restore_state(timeline, snapshot, model_file, parameter_file):
+    """
+    Put a timeline back at a captured operating point: load the saved
+    initial condition, or write the state variables into the (loaded and
+    initialized) timeline.
+
+    Params:
+        timeline (kspice.Timeline): Timeline to restore.
+        snapshot (dict): Result of capture_state.
+        model_file, parameter_file (str): Loaded with the saved initial condition.
+
+    Returns:
+        float: Offset to add to the timeline clock so recorded model time
+        continues from the end of the warmup.
+    """
+    if is_full_state(snapshot):
+        timeline.load(model_file, parameter_file, snapshot["values_file"])
+        timeline.initialize()
+    else:
+        app = snapshot["app"]
+        for name, value in snapshot["values"].items():
+            timeline.set_value(app, name, value)
+    return snapshot["model_time"] - timeline.model_time.total_seconds()
+
+
+def warmup_key(model_file, parameter_file, values_file, warmup_minutes, app, variables,
+               state_variables, steady=None):
+    """
+    Cache key of a warmup prefix: the loaded files, the warmup length and what
+    is recorded/captured during it. steady (simlog.steady.SteadyState) is
+    part of the key when detection may end the warmup early.
+
+    Returns:
+        str: Hex digest.
+    """
+    description = {
+        "model": model_file,
+        "parameters": parameter_file,
+        "values": values_file,
+        "warmup_minutes": warmup_minutes,
+        "app": app,
+        "variables": [list(v) for v in variables],
+        "state_variables": list(state_variables),
+    }
+    if steady is not None:
+        description["steady"] = asdict(steady)
+    return hashlib.sha1(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def _fingerprint(paths):
+    fp = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            fp[path] = [st.st_mtime, st.st_size]
+        except FileNotFoundError:
+            fp[path] = None
+    return fp
+
+
+class WarmStateCache:
+    """
+    Directory of warmup snapshots, one sub-directory per key.
+
+    Entries are evicted when they are older than max_age_days, when any of the
+    source files recorded with them has changed (mtime/size), or when more than
+    max_entries exist (least recently used first). Removing an entry also
+    deletes the initial-condition files saved for it (snapshot "saved_files").
+
+    Params:
+        cache_dir (str): Cache directory (created if missing).
+        max_entries (int): Maximum number of entries kept.
+        max_age_days (float): Entries older than this are stale.
+    """
+
+    def __init__(self, cache_dir, max_entries=16, max_age_days=30):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _remove(self, path, meta, keep=()):
+        """Delete an entry and the saved initial-condition files that are not in keep."""
+        for saved in meta["snapshot"].get("saved_files", []):
+            if saved not in keep:
+                try:
+                    os.remove(saved)
+                except OSError:
+                    pass  # already gone
+        shutil.rmtree(path, ignore_errors=True)
+
+    def _read_meta(self, path):
+        try:
+            with open(os.path.join(path, "snapshot.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError):
+            return None
+
+    def _is_stale(self, path, meta):
+        if time.time() - meta["created"] > self.max_age:
+            return True
+        return _fingerprint(meta["sources"]) != meta["fingerprint"]
+
+    def get(self, key):
+        """
+        Look up a warmup prefix.
+
+        Returns:
+            Tuple[dict, np.ndarray] | None: Snapshot and warmup rows, or None
+            on a miss (stale entries are removed and count as a miss).
+        """
+        path = self._entry(key)
+        meta = self._read_meta(path)
+        if meta is None:
+            return None
+        if self._is_stale(path, meta):
+            self._remove(path, meta)
+            return None
+        rows = np.load(os.path.join(path, "warmup.npy"))
+        os.utime(path)  # mark as recently used
+        return meta["snapshot"], rows
+
+    def put(self, key, snapshot, rows, sources=()):
+        """
+        Store a warmup prefix.
+
+        Params:
+            key (str): Result of warmup_key.
+            snapshot (dict): Result of capture_state.
+            rows (List[List[float]] | np.ndarray): Rows recorded during warmup.
+            sources (Iterable[str]): Files whose change invalidates the entry
+                (e.g. the K-Spice model/parameter/values files).
+        """
+        path = self._entry(key)
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, "warmup.npy"), np.asarray(rows, dtype=np.float64))
+        sources = list(sources)
+        meta = {
+            "created": time.time(),
+            "snapshot": snapshot,
+            "sources": sources,
+            "fingerprint": _fingerprint(sources),
+        }
+        with open(os.path.join(tmp, "snapshot.json"), 'w') as f:
+            json.dump(meta, f)
+        previous = self._read_meta(path)
+        if previous is not None:
+            # The same key saves under the same name, so the new files are kept
+            self._remove(path, previous, keep=snapshot.get("saved_files", []))
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Remove stale entries and trim to max_entries, least recently used first."""
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            path = self._entry(key)
+            meta = self._read_meta(path)
+            if meta is None:
+                continue
+            if self._is_stale(path, meta):
+                self._remove(path, meta)
+            else:
+                entries.append((os.path.getmtime(path), path, meta))
+        entries.sort(key=lambda entry: entry[0])
+        for _, path, meta in entries[:max(0, len(entries) - self.max_entries)]:
+            self._remove(path, meta)
@@ -0,0 +1,31 @@
+import pytest
+
+from simlog.catalog import Catalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    filename = tmp_path / "Yggdrasil_state0_01.01.2026_10-00.csv"
+    rows = [f"{t},{t},{10 + t}" for t in range(5)]
+    filename.write_text("ModelTime [s],Hugin A/D-13PT2122:MeasuredValue [barg],"
+                        "Hugin B/D-13PT2122:MeasuredValue [barg]\n" + "\n".join(rows) + "\n")
+    with Catalog(str(tmp_path / "runs.sqlite")) as catalog:
+        catalog.add(str(filename))
+        yield catalog
+
+
+@pytest.mark.parametrize("variable, expected", [
+    ("D-13PT2122", 14.0),
+    ("D-13PT2122:MeasuredValue", 14.0),
+    ("Hugin A/D-13PT2122", 4.0),
+    ("Hugin A/D-13PT2122:MeasuredValue", 4.0),
+    ("Hugin C/D-13PT2122", None),
+])
+def test_multi_application_columns_match_tag_queries(catalog, variable, expected):
+    assert catalog.aggregate(variable, "max") == expected
+    assert len(catalog.runs(variable=variable)) == (expected is not None)
+
+
+def test_load_filters_one_application(catalog):
+    (rows,) = catalog.load("Hugin B/D-13PT2122", above=12).values()
+    assert len(rows) == 2
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simlog.derived import DerivedColumn, process_file
+
+
+@pytest.mark.parametrize("bad", ["", "n/a", "ERR", "1.2.3"])
+def test_streaming_matches_whole_file_on_bad_cells(tmp_path, bad):
+    rows = [f"{t},{10 + t},{t / 2}" for t in range(1, 41)]
+    rows[7] = f"8,{bad},4.0"
+    src = tmp_path / "run.csv"
+    src.write_text("ModelTime [s],A:Value [bar],B:Value [bar]\n" + "\n".join(rows) + "\n")
+    specs = [
+        DerivedColumn("DP", None, "`A:Value` - `B:Value`"),
+        DerivedColumn("DP_avg", None, "rolling_mean(`DP`, 3)"),
+    ]
+
+    whole = pd.read_csv(process_file(str(src), specs, str(tmp_path / "whole.csv")))
+    streamed = pd.read_csv(process_file(str(src), specs, str(tmp_path / "streamed.csv"), chunk_rows=5))
+
+    assert list(whole.columns) == list(streamed.columns)
+    for col in ("DP [bar]", "DP_avg [bar]"):
+        np.testing.assert_allclose(streamed[col].to_numpy(), whole[col].to_numpy(), equal_nan=True)
+    assert np.isnan(whole["DP [bar]"][7])
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from numerics.quadrature import adaptive_simpson, romberg, simpson, trapezoidal
+
+
+@pytest.mark.parametrize("f, a, b, exact", [
+    # Trapezoid estimates on 1 and 2 intervals are both 0
+    (lambda x: np.sin(x) ** 2, 0.0, 2 * np.pi, np.pi),
+    (lambda x: x * (x - 0.5) ** 2 * (1 - x), 0.0, 1.0, 1 / 120),
+])
+def test_romberg_no_false_convergence(f, a, b, exact):
+    result = romberg(f, a, b, tol=1e-10)
+    assert result.value == pytest.approx(exact, abs=1e-10)
+    assert result.evaluations > 2 ** 5
+
+
+def test_romberg_smooth_integrand():
+    result = romberg(lambda x: 5 * x ** 4 - 3 * x ** 2 + np.exp(x), 0.0, 1.0, tol=1e-12)
+    assert result.value == pytest.approx(np.e - 1, abs=1e-12)
+
+
+@pytest.mark.parametrize("method", [
+    lambda f: romberg(f, 0.0, 1.0).value,
+    lambda f: adaptive_simpson(f, 0.0, 1.0).value,
+    lambda f: trapezoidal(f, 0.0, 1.0, 10),
+    lambda f: simpson(f, 0.0, 1.0, 10),
+])
+def test_constant_integrand(method):
+    assert method(lambda x: 2.0) == pytest.approx(2.0, abs=1e-12)
+
+
+def test_romberg_constant_integrand_stops_early():
+    assert romberg(lambda x: 2.0, 0.0, 1.0).evaluations < 2 ** 8
@@ -0,0 +1,39 @@
+import json
+
+import numpy as np
+
+from simlog.columnar import read_output
+from simlog.manifest import RunManifest
+from simlog.scenarios import Scenario, SimulatorConfig, run_scenarios
+
+
+def test_resume_from_nonzero_initial_clock(tmp_path):
+    # The initial condition starts the timeline clock at 5000s, so recorded
+    # model times are not seconds into the scenario
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "v.fake_ic.json").write_text(json.dumps({"model_time": 5000.0, "values": []}))
+    config = SimulatorConfig(str(project), "fake", "m", "p", "v", simulator_module="simlog.fake_kspice")
+    variables = [[f"VAR{i}:Value", "-"] for i in range(3)]
+    scenario = Scenario(0, 0, 3, "VAR0:Value", 1.1, 4)
+    quiet = lambda msg: None
+
+    results, _ = run_scenarios([scenario], config, variables, str(tmp_path / "run"), workers=1, report=quiet)
+    filename = results[0]["filename"]
+    reference = read_output(filename).to_numpy()
+
+    # Interrupt 300s in, during the response, with a partly written last line
+    with open(filename) as f:
+        lines = f.readlines()
+    with open(filename, "w") as f:
+        f.writelines(lines[:301] + [lines[301][:5]])
+    manifest = RunManifest.load(filename)
+    manifest.data["complete"] = False
+    manifest.save()
+
+    results, failures = run_scenarios([scenario], config, variables, str(tmp_path / "run"), workers=1,
+                                      report=quiet, resume=True)
+    assert not failures
+    resumed = read_output(results[0]["filename"]).to_numpy()
+    assert resumed.shape == reference.shape
+    np.testing.assert_array_equal(resumed, reference)
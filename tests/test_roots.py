@@ -0,0 +1,21 @@
+import numpy as np
+
+from numerics.roots import bisection, hybrid
+
+
+def test_hybrid_flat_root_iterations_bounded():
+    # False position crawls on a flat root; the bracket must still halve
+    # at least every third step
+    f = lambda x: x ** 9
+    result = hybrid(f, -1.0, 2.0)
+    reference = bisection(f, -1.0, 2.0)
+    assert result.converged.all()
+    assert abs(result.root) < 1e-11
+    assert result.iterations <= 2 * reference.iterations
+
+
+def test_hybrid_batched_roots():
+    targets = np.array([0.5, 2.0, 7.0])
+    result = hybrid(lambda x, c: x ** 3 - c, np.zeros(3), np.full(3, 2.0), args=(targets,))
+    assert result.converged.all()
+    np.testing.assert_allclose(result.root, np.cbrt(targets), rtol=1e-12)
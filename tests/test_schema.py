@@ -0,0 +1,24 @@
+import pytest
+
+from simlog.schema import HeaderSchema, split_column
+
+
+@pytest.mark.parametrize("col, expected", [
+    ("D-13PT2122:MeasuredValue [barg]", ("D-13PT2122:MeasuredValue", "barg")),
+    ("Flow (kg/h)", ("Flow", "kg/h")),
+    ("Flow [kg/h] (raw)", ("Flow [kg/h] (raw)", "kg/h")),
+    ("Flow (raw) [kg/h]", ("Flow (raw)", "kg/h")),
+    ("Pressure bar abs", ("Pressure bar abs", "bar")),
+    ("ModelTime", ("ModelTime", None)),
+])
+def test_split_column_precedence(col, expected):
+    assert split_column(col) == expected
+
+
+def test_app_prefix_is_its_own_field():
+    schema = HeaderSchema(["ModelTime [s]", "Hugin A/D-1:Value [bar]", "Hugin B/D-1:Value [bar]", "DP/DT [bar/s]"])
+    assert schema.fields[1] == ("D-1", "Value", "bar", "Hugin A")
+    assert schema.fields[3] == ("DP/DT", None, "bar/s", None)
+    assert schema.select("D-1") == ["Hugin A/D-1:Value [bar]", "Hugin B/D-1:Value [bar]"]
+    assert schema.position("D-1:Value") == 1
+    assert schema.position("Hugin B/D-1:Value") == 2
@@ -0,0 +1,15 @@
+import numpy as np
+import pytest
+
+from numerics.stiff import integrate
+
+A = np.diag([-1000.0, -1.0])
+
+
+def test_bdf2_stiff_linear_system_step_count():
+    # Newton must converge relative to the error tolerance; an absolute 1e-8
+    # kept rejecting steps long after the fast mode had decayed (20k steps)
+    result = integrate(lambda x: A @ x, [1.0, 1.0], (0.0, 10.0), dt=1e-3, method="bdf2",
+                       jacobian=lambda x: A, rtol=1e-6, atol=1e-10)
+    assert result.stats["steps"] < 3000
+    assert result.x[-1, 1] == pytest.approx(np.exp(-10.0), rel=1e-2)
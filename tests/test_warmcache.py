@@ -0,0 +1,23 @@
+import os
+
+from simlog.fake_kspice import FakeTimeline
+from simlog.warmcache import WarmStateCache, capture_state
+
+
+def test_evicted_entries_delete_saved_initial_conditions(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    cache = WarmStateCache(str(tmp_path / "cache"), max_entries=2)
+    tl = FakeTimeline(project_path=str(project))
+    for i in range(4):
+        snapshot = capture_state(tl, "Hugin A", f"ic_warm_{i}", project_path=str(project))
+        cache.put(f"key{i}", snapshot, [[0.0]])
+        os.utime(cache._entry(f"key{i}"), (i, i))  # oldest first
+
+    assert sorted(os.listdir(project)) == ["ic_warm_2.fake_ic.json", "ic_warm_3.fake_ic.json"]
+
+    # Replacing an entry keeps the initial condition it just saved again
+    snapshot = capture_state(tl, "Hugin A", "ic_warm_3", project_path=str(project))
+    cache.put("key3", snapshot, [[0.0]])
+    assert cache.get("key3")[0]["saved_files"] == [str(project / "ic_warm_3.fake_ic.json")]
+    assert os.path.exists(project / "ic_warm_3.fake_ic.json")